@@ -1,8 +1,20 @@
 import yaml
 import os
 import re
+import sys
 from collections import defaultdict
 
+sys.path.insert(0, 'tools')
+from ref_scanner import scan_file
+
+# --reachable: only scan files reachable from openapi.yaml through $ref
+reachable_files = None
+if '--reachable' in sys.argv:
+    from spec_reach import Reachability
+    reach = Reachability('.').walk()
+    reachable_files = {reach.relpath(f) for f in reach.files}
+    print(f"Scanning {len(reachable_files)} reachable files only")
+
 # Load all schemas
 with open('components/schemas.yaml', 'r', encoding='utf-8') as f:
     schemas_data = yaml.safe_load(f)
@@ -15,20 +27,20 @@ missing_schemas = set()
 reference_files = defaultdict(list)
 
 def find_refs_in_file(filepath, relpath):
+    if reachable_files is not None and relpath.replace(os.sep, '/') not in reachable_files:
+        return
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-            # Find all $ref patterns
-            refs = re.findall(r'\$ref:\s*[\'"]([^\'"]+)[\'"]', content)
-            for ref in refs:
-                if 'schemas.yaml#/' in ref:
-                    # Extract schema name
-                    match = re.search(r'#/([^/]+)$', ref)
-                    if match:
-                        schema_name = match.group(1)
-                        if schema_name not in defined_schemas:
-                            missing_schemas.add(schema_name)
-                            reference_files[schema_name].append((relpath, ref))
+        # Every $ref, including flow-style and multi-line ones
+        for site in scan_file(filepath, root='.'):
+            ref = site.ref
+            if 'schemas.yaml#/' in ref:
+                # Extract schema name
+                match = re.search(r'#/([^/]+)$', ref)
+                if match:
+                    schema_name = match.group(1)
+                    if schema_name not in defined_schemas:
+                        missing_schemas.add(schema_name)
+                        reference_files[schema_name].append((relpath, ref))
     except Exception as e:
         pass
 
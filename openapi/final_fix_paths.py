@@ -1,36 +1,21 @@
 #!/usr/bin/env python3
-import re
+"""
+Fix path reference fragments in openapi.yaml that have #~1 but not #/~1
 
-file_path = r'd:\worksites\canvastack\projects\stencil\openapi\openapi.yaml'
+Runs the final-fix-paths codemod (tools/codemods/final-fix-paths.yaml)
+through tools/codemod.py, in one pass per file; pass --dry-run to only
+report the changes.
 
-with open(file_path, 'r', encoding='utf-8') as f:
-    content = f.read()
+Usage:
+    python final_fix_paths.py [--dry-run] [-v]
+"""
 
-original = content
+import sys
+from pathlib import Path
 
-# Fix all path references that have #~1 but not #/~1
-# Pattern: #(~[0-9]) that comes after yaml
-pattern = r"(\.yaml)#(~[0-9])"
+sys.path.insert(0, str(Path(__file__).resolve().parent / 'tools'))
 
-def replace_func(match):
-    return match.group(1) + "#/" + match.group(2)
+from codemod import main
 
-fixed = re.sub(pattern, replace_func, content)
-
-if fixed != original:
-    # Count changes
-    matches = list(re.finditer(pattern, original))
-    print(f"Fixed {len(matches)} path reference fragments")
-    for i, m in enumerate(matches[:3]):
-        before = original[m.start()-20:m.end()+10]
-        print(f"  ...{before}...")
-    if len(matches) > 3:
-        print(f"  ... and {len(matches) - 3} more")
-    
-    # Write fixed
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.write(fixed)
-    
-    print("\nChanges applied!")
-else:
-    print("No changes needed")
+if __name__ == '__main__':
+    sys.exit(main(['final-fix-paths', *sys.argv[1:]]))
@@ -1,10 +1,13 @@
 #!/usr/bin/env python3
-import yaml
-import re
 import os
+import sys
 import glob
 
-base_path = r'd:\worksites\canvastack\projects\stencil\openapi'
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tools'))
+from ref_scanner import scan_file
+from spec_loader import OPENAPI_ROOT, load_yaml
+
+base_path = str(OPENAPI_ROOT)
 
 def load_components():
     """Load all component definitions from component files"""
@@ -15,27 +18,24 @@ def load_components():
     }
     
     # Load parameters
-    with open(os.path.join(base_path, 'components/parameters.yaml'), 'r', encoding='utf-8') as f:
-        components['parameters'] = yaml.safe_load(f) or {}
+    components['parameters'] = load_yaml(os.path.join(base_path, 'components/parameters.yaml')) or {}
     
     # Load responses
-    with open(os.path.join(base_path, 'components/responses.yaml'), 'r', encoding='utf-8') as f:
-        components['responses'] = yaml.safe_load(f) or {}
+    components['responses'] = load_yaml(os.path.join(base_path, 'components/responses.yaml')) or {}
     
     # Load schemas
-    with open(os.path.join(base_path, 'components/schemas.yaml'), 'r', encoding='utf-8') as f:
-        components['schemas'] = yaml.safe_load(f) or {}
+    components['schemas'] = load_yaml(os.path.join(base_path, 'components/schemas.yaml')) or {}
     
     return components
 
 def validate_refs_in_file(file_path, components):
     """Validate all $ref in a YAML file"""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    # Find all $ref patterns
-    pattern = r"\$ref:\s*['\"]([^'\"]+\.yaml)#/([^'\"]+)['\"]"
-    matches = re.findall(pattern, content)
+    # Find all cross-file $ref patterns
+    matches = []
+    for site in scan_file(file_path):
+        if '.yaml#/' in site.ref:
+            file_ref, fragment = site.ref.split('#/', 1)
+            matches.append((file_ref, fragment))
     
     errors = []
     valid = 0
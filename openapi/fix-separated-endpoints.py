@@ -8,31 +8,49 @@ separated endpoint architecture following the pattern established by the
 authentication system (/platform/* and /tenant/*).
 
 Features:
-- Converts generic endpoints to separated platform/tenant endpoints
+- Converts generic endpoints to separated platform/tenant endpoints, per
+  HTTP method as mapped in PLATFORM_OPERATIONS/TENANT_OPERATIONS
+- Leaves paths that are already separated (/platform/*, /tenant/*) alone and
+  reports them as skipped, so re-running it changes nothing
+- Splits the modules across worker processes (--jobs)
 - Maintains proper security schemes for each endpoint type
 - Preserves existing response schemas and documentation
-- Creates backup of original files
+- Edits the files in place (round-trip): comments, key order and formatting
+  are kept, only the entries that change are rewritten
+- Writes all files in one transaction with a rollback journal
+  (undo with: python tools/file_transaction.py rollback)
 - Generates detailed refactor report
 
 Usage:
     python fix-separated-endpoints.py
+    python fix-separated-endpoints.py --dry-run > separated.patch   # unified diff, nothing written
+    python fix-separated-endpoints.py -j 0 faq.yaml users.yaml      # one worker per CPU
+    python fix-separated-endpoints.py --reformat    # re-dump whole files with yaml.dump
 
 Requirements:
     - PyYAML
     - pathlib
 """
 
+import argparse
+import contextlib
+import difflib
 import yaml
 import os
 import re
-import shutil
+import sys
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from typing import Dict, List, Any, Optional
 
+sys.path.insert(0, str(Path(__file__).resolve().parent / 'tools'))
+from file_transaction import FileTransaction
+from spec_loader import add_jobs_argument, load_yaml, resolve_jobs
+from yaml_splice import SpliceDocument, TextEdits, render_entry, render_scalar, sync_mapping
+
 # Configuration
 PATHS_DIR = Path("paths/content-management")
-BACKUP_DIR = Path("backups/original-non-compliant")
 REPORT_FILE = "separated-endpoints-refactor-report.md"
 
 # Files to refactor (all non-compliant content management modules)
@@ -44,6 +62,9 @@ NON_COMPLIANT_FILES = [
     "suppliers.yaml", "theme.yaml", "users.yaml", "vendors.yaml"
 ]
 
+# Path prefixes of endpoints that are already separated
+SEPARATED_PREFIXES = ('/platform', '/tenant')
+
 # Platform-level operations (administrative/management operations)
 PLATFORM_OPERATIONS = {
     'users': ['POST', 'GET', 'PATCH', 'DELETE'],  # Platform user management
@@ -72,27 +93,32 @@ TENANT_OPERATIONS = {
 }
 
 class EndpointRefactor:
-    def __init__(self):
+    def __init__(self, reformat: bool = False, dry_run: bool = False):
+        # Re-dump whole files with yaml.dump instead of editing them in place
+        self.reformat = reformat
+        # Collect a unified diff instead of writing
+        self.dry_run = dry_run
+        self.diff = []
         self.stats = {
             'files_processed': 0,
             'endpoints_converted': 0,
             'platform_endpoints': 0,
             'tenant_endpoints': 0,
+            'skipped_paths': 0,
             'errors': []
         }
         self.report = []
-    
-    def create_backup(self, file_path: Path) -> None:
-        """Create backup of original file."""
-        backup_path = BACKUP_DIR / file_path.name
-        BACKUP_DIR.mkdir(parents=True, exist_ok=True)
-        shutil.copy2(file_path, backup_path)
-        print(f"✅ Created backup: {backup_path}")
+        # Every output is staged here and written together at the end of run()
+        self.transaction = FileTransaction('fix-separated-endpoints')
     
     def extract_module_name(self, file_path: Path) -> str:
         """Extract module name from file path."""
         return file_path.stem
     
+    def is_separated(self, path: str) -> bool:
+        """Whether path already sits under /platform or /tenant."""
+        return any(path == prefix or path.startswith(f'{prefix}/') for prefix in SEPARATED_PREFIXES)
+    
     def convert_endpoint_path(self, original_path: str, module: str, method: str) -> Dict[str, str]:
         """Convert generic endpoint to separated platform/tenant paths."""
         separated_paths = {}
@@ -188,90 +214,185 @@ class EndpointRefactor:
         
         return updated_endpoint
     
-    def refactor_file(self, file_path: Path) -> None:
-        """Refactor a single OpenAPI file to use separated endpoints."""
-        print(f"\\n🔧 Refactoring: {file_path}")
+    def split_endpoints(self, data: Dict, module: str, log: List[str], skipped: List[str]) -> Dict[str, List]:
+        """Group the operations of every path into their platform/tenant variants.
+
+        Each method is mapped on its own (PLATFORM_OPERATIONS/TENANT_OPERATIONS),
+        so a variant only carries the methods that belong to it. Paths that
+        are already separated, and variants whose path the file already
+        defines, are left out; the paths left as they are go to skipped. Returns
+        {path: [(endpoint_type, new_path, {method: updated_endpoint})]}.
+        """
+        variants = {}
+        for path, methods in data.items():
+            if not isinstance(methods, dict):
+                continue
+            if self.is_separated(path):
+                log.append(f"  ⏭️  Already separated, skipped: {path}")
+                skipped.append(path)
+                continue
+            
+            log.append(f"  🔍 Processing path: {path}")
+            grouped = {}
+            for method, endpoint_data in methods.items():
+                if not isinstance(endpoint_data, dict):
+                    continue
+                
+                # Convert to separated endpoints for this method
+                for endpoint_type, new_path in self.convert_endpoint_path(path, module, method.upper()).items():
+                    # Update endpoint data for separated architecture
+                    updated_endpoint = self.update_security_schemes(endpoint_data, endpoint_type)
+                    updated_endpoint = self.update_tags(updated_endpoint, module, endpoint_type)
+                    updated_endpoint = self.update_descriptions(updated_endpoint, endpoint_type)
+                    grouped.setdefault((endpoint_type, new_path), {})[method] = updated_endpoint
+            
+            # Platform variant first, as before
+            for (endpoint_type, new_path), new_methods in sorted(grouped.items(), key=lambda item: item[0][0] != 'platform'):
+                if new_path in data:
+                    log.append(f"    ⏭️  {endpoint_type.upper()}: {new_path} already defined, skipped")
+                    continue
+                log.append(f"    ↳ {endpoint_type.upper()}: {new_path} ({', '.join(m.upper() for m in new_methods)})")
+                variants.setdefault(path, []).append((endpoint_type, new_path, new_methods))
+            if path not in variants:
+                skipped.append(path)
+        return variants
+    
+    def split_file(self, file_path: Path) -> Dict[str, Any]:
+        """Compute the separated version of one file without writing anything."""
+        result = {
+            'file': file_path.name,
+            'path': str(file_path),
+            'module': self.extract_module_name(file_path),
+            'endpoints_converted': 0,
+            'platform_endpoints': 0,
+            'tenant_endpoints': 0,
+            'skipped_paths': 0,
+            'status': 'success',
+            'log': [f"\n🔧 Refactoring: {file_path}"],
+        }
         
         try:
-            # Create backup
-            self.create_backup(file_path)
-            
             # Load YAML file
             with open(file_path, 'r', encoding='utf-8') as f:
-                data = yaml.safe_load(f)
+                text = f.read()
+            data = load_yaml(file_path)
             
             if not data:
-                print(f"⚠️  Empty file: {file_path}")
-                return
-            
-            # Extract module name
-            module = self.extract_module_name(file_path)
-            print(f"📦 Module: {module}")
-            
-            # Process each endpoint
-            new_data = {}
-            endpoints_converted = 0
-            
-            for path, methods in data.items():
-                if not isinstance(methods, dict):
-                    continue
-                
-                print(f"  🔍 Processing path: {path}")
-                
-                # Convert to separated endpoints
-                separated_paths = self.convert_endpoint_path(path, module, 'GET')  # Use GET as default for path conversion
-                
-                for endpoint_type, new_path in separated_paths.items():
-                    print(f"    ↳ {endpoint_type.upper()}: {new_path}")
-                    
-                    # Process each HTTP method
-                    new_methods = {}
-                    for method, endpoint_data in methods.items():
-                        if not isinstance(endpoint_data, dict):
-                            continue
-                        
-                        # Update endpoint data for separated architecture
-                        updated_endpoint = self.update_security_schemes(endpoint_data, endpoint_type)
-                        updated_endpoint = self.update_tags(updated_endpoint, module, endpoint_type)
-                        updated_endpoint = self.update_descriptions(updated_endpoint, endpoint_type)
-                        
-                        new_methods[method] = updated_endpoint
-                        endpoints_converted += 1
-                        
-                        if endpoint_type == 'platform':
-                            self.stats['platform_endpoints'] += 1
-                        else:
-                            self.stats['tenant_endpoints'] += 1
-                    
-                    new_data[new_path] = new_methods
+                result['status'] = 'empty'
+                result['log'].append(f"⚠️  Empty file: {file_path}")
+                return result
             
-            # Write updated file
-            with open(file_path, 'w', encoding='utf-8') as f:
-                yaml.dump(new_data, f, default_flow_style=False, allow_unicode=True, indent=2)
+            module = result['module']
+            result['log'].append(f"📦 Module: {module}")
+            skipped = []
+            variants = self.split_endpoints(data, module, result['log'], skipped)
+            result['skipped_paths'] = len(skipped)
             
-            print(f"✅ Refactored {endpoints_converted} endpoints in {file_path}")
-            self.stats['endpoints_converted'] += endpoints_converted
-            
-            # Add to report
-            self.report.append({
-                'file': file_path.name,
-                'module': module,
-                'endpoints_converted': endpoints_converted,
-                'status': 'success'
-            })
+            for path_variants in variants.values():
+                for endpoint_type, _, new_methods in path_variants:
+                    result[f'{endpoint_type}_endpoints'] += len(new_methods)
+            result['endpoints_converted'] = result['platform_endpoints'] + result['tenant_endpoints']
             
+            if not variants:
+                result['text'] = text  # Nothing left to separate
+            elif self.reformat:
+                new_data = {}
+                for path in data:
+                    if path in variants:
+                        new_data.update((new_path, new_methods) for _, new_path, new_methods in variants[path])
+                    elif path in skipped:
+                        new_data[path] = data[path]
+                result['text'] = yaml.dump(new_data, default_flow_style=False, allow_unicode=True, indent=2)
+            else:
+                result['text'] = self.splice_separated(text, data, variants, str(file_path))
+            result['original'] = text
+        
         except Exception as e:
-            error_msg = f"Error refactoring {file_path}: {str(e)}"
+            result['status'] = 'error'
+            result['error'] = str(e)
+        
+        return result
+    
+    def record(self, result: Dict[str, Any]) -> None:
+        """Print the log of a split file, count it and stage (or diff) its new text."""
+        for line in result['log']:
+            print(line)
+        
+        if result['status'] == 'empty':
+            return
+        if result['status'] == 'error':
+            error_msg = f"Error refactoring {result['path']}: {result['error']}"
             print(f"❌ {error_msg}")
             self.stats['errors'].append(error_msg)
+            self.report.append({key: result[key] for key in ('file', 'module', 'endpoints_converted', 'skipped_paths', 'status', 'error')})
+            return
+        
+        # Stage updated file
+        self.output(Path(result['path']), result['text'], result['original'])
+        skipped = f", {result['skipped_paths']} already separated paths skipped" if result['skipped_paths'] else ''
+        print(f"✅ Refactored {result['endpoints_converted']} endpoints in {result['path']}{skipped}")
+        for key in ('endpoints_converted', 'platform_endpoints', 'tenant_endpoints', 'skipped_paths'):
+            self.stats[key] += result[key]
+        
+        # Add to report
+        self.report.append({key: result[key] for key in ('file', 'module', 'endpoints_converted', 'skipped_paths', 'status')})
+    
+    def refactor_file(self, file_path: Path) -> None:
+        """Refactor a single OpenAPI file to use separated endpoints."""
+        self.record(self.split_file(file_path))
+    
+    def output(self, path: Path, text: str, original: Optional[str] = None) -> None:
+        """Stage text for path, or add its unified diff in dry-run mode."""
+        if not self.dry_run:
+            self.transaction.write(path, text)
+            return
+        
+        if original is None:
+            original = path.read_text(encoding='utf-8') if path.exists() else ''
+        name = path.as_posix()
+        for line in difflib.unified_diff(original.splitlines(keepends=True), text.splitlines(keepends=True),
+                                         fromfile=f'a/{name}', tofile=f'b/{name}'):
+            self.diff.append(line if line.endswith('\n') else f'{line}\n\\ No newline at end of file\n')
+    
+    def splice_separated(self, text: str, data: Dict, variants: Dict[str, List], name: str) -> str:
+        """Replace each path entry of text by its separated variants, editing only what changed."""
+        document = SpliceDocument(text, name)
+        pieces = []
+        position = 0
+        
+        for path, key_node, value_node, start, end in document.entries(document.root):
+            if path not in variants:
+                continue  # Not converted, kept as it is
             
-            self.report.append({
-                'file': file_path.name,
-                'module': self.extract_module_name(file_path),
-                'endpoints_converted': 0,
-                'status': 'error',
-                'error': str(e)
-            })
+            pieces.append(text[position:start])
+            rendered = []
+            for _, new_path, new_methods in variants[path]:
+                edits = TextEdits()
+                if value_node.flow_style:
+                    kept = {key: value for key, value in data[path].items() if not isinstance(value, dict)}
+                    edits.replace(start, end, render_entry(new_path, {**kept, **new_methods}, 0))
+                    rendered.append(edits.apply(text, start, end))
+                    continue
+                
+                edits.replace(key_node.start_mark.index, key_node.end_mark.index, render_scalar(new_path))
+                for method, method_key, method_node, method_start, method_end in document.entries(value_node):
+                    if method not in new_methods:
+                        if isinstance(data[path].get(method), dict):
+                            # Operation of the other variant only
+                            edits.replace(document.offset(method_key.start_mark.line), method_end, '')
+                        continue
+                    if not sync_mapping(document, edits, method_node, data[path][method], new_methods[method]):
+                        edits.replace(method_start, method_end,
+                                      render_entry(method, new_methods[method], method_key.start_mark.column))
+                variant = edits.apply(text, start, end)
+                rendered.append(variant if variant.endswith('\n') else variant + '\n')
+            
+            # A blank line between the platform and tenant variants
+            pieces.append('\n'.join(rendered))
+            position = end
+        
+        pieces.append(text[position:])
+        return ''.join(pieces)
     
     def generate_report(self) -> None:
         """Generate refactoring report."""
@@ -286,19 +407,20 @@ class EndpointRefactor:
 - **Total Endpoints Converted:** {self.stats['endpoints_converted']}
 - **Platform Endpoints Created:** {self.stats['platform_endpoints']}
 - **Tenant Endpoints Created:** {self.stats['tenant_endpoints']}
+- **Paths Skipped (already separated):** {self.stats['skipped_paths']}
 - **Errors:** {len(self.stats['errors'])}
 
 ## Refactoring Results
 
-| File | Module | Endpoints Converted | Status |
-|------|--------|-------------------|--------|
+| File | Module | Endpoints Converted | Paths Skipped | Status |
+|------|--------|-------------------|---------------|--------|
 """
         
         for result in self.report:
             status_emoji = "✅" if result['status'] == 'success' else "❌"
             error_info = f" ({result.get('error', '')})" if result['status'] == 'error' else ""
             
-            report_content += f"| {result['file']} | {result['module']} | {result['endpoints_converted']} | {status_emoji} {result['status'].title()}{error_info} |\\n"
+            report_content += f"| {result['file']} | {result['module']} | {result['endpoints_converted']} | {result['skipped_paths']} | {status_emoji} {result['status'].title()}{error_info} |\n"
         
         if self.stats['errors']:
             report_content += f"""
@@ -307,7 +429,7 @@ class EndpointRefactor:
 
 """
             for error in self.stats['errors']:
-                report_content += f"- {error}\\n"
+                report_content += f"- {error}\n"
         
         report_content += f"""
 
@@ -356,48 +478,86 @@ After this refactoring:
 **🎉 All OpenAPI specifications now follow separated endpoint architecture!**
 """
         
-        # Write report
-        with open(REPORT_FILE, 'w', encoding='utf-8') as f:
-            f.write(report_content)
+        # Stage report
+        self.output(Path(REPORT_FILE), report_content)
         
-        print(f"\\n📊 Report generated: {REPORT_FILE}")
+        print(f"\n📊 Report generated: {REPORT_FILE}")
 
-    def run(self) -> None:
-        """Run the refactoring process."""
+    def run(self, files: Optional[List[str]] = None, jobs: int = 1) -> None:
+        """Run the refactoring process, splitting the modules across jobs worker processes."""
         print("🚀 Starting OpenAPI Separated Endpoints Refactor")
         print("=" * 60)
         
         # Process each non-compliant file
-        for filename in NON_COMPLIANT_FILES:
-            file_path = PATHS_DIR / filename
+        file_paths = []
+        for filename in files or NON_COMPLIANT_FILES:
+            # Bare names are modules in PATHS_DIR
+            file_path = Path(filename) if Path(filename).parent != Path('.') else PATHS_DIR / filename
             
             if not file_path.exists():
                 error_msg = f"File not found: {file_path}"
                 print(f"⚠️  {error_msg}")
                 self.stats['errors'].append(error_msg)
                 continue
-            
-            self.refactor_file(file_path)
-            self.stats['files_processed'] += 1
+            file_paths.append(file_path)
         
-        # Generate report
-        self.generate_report()
+        jobs = min(resolve_jobs(jobs), len(file_paths) or 1)
+        if jobs == 1:
+            results = map(self.split_file, file_paths)
+        else:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                results = list(pool.map(_split_file, [(str(p), self.reformat) for p in file_paths]))
+        
+        # Nothing is written unless every file and the report were staged
+        with self.transaction:
+            for result in results:
+                self.record(result)
+                self.stats['files_processed'] += 1
+            
+            # Generate report (a run that converted nothing leaves the last one as it is)
+            if self.stats['endpoints_converted'] or self.stats['errors']:
+                self.generate_report()
+            else:
+                print("\nℹ️  Nothing left to separate, report not regenerated")
         
         # Summary
-        print("\\n" + "=" * 60)
+        print("\n" + "=" * 60)
         print("🎉 REFACTORING COMPLETED!")
         print("=" * 60)
         print(f"Files Processed: {self.stats['files_processed']}")
         print(f"Endpoints Converted: {self.stats['endpoints_converted']}")
         print(f"Platform Endpoints: {self.stats['platform_endpoints']}")
         print(f"Tenant Endpoints: {self.stats['tenant_endpoints']}")
+        print(f"Skipped (already separated): {self.stats['skipped_paths']} paths")
         print(f"Errors: {len(self.stats['errors'])}")
+        if self.transaction.journal:
+            print(f"Journal: {self.transaction.journal.stem} (undo: python tools/file_transaction.py rollback)")
         
         if self.stats['errors']:
-            print("\\n⚠️  Errors encountered:")
+            print("\n⚠️  Errors encountered:")
             for error in self.stats['errors']:
                 print(f"  - {error}")
 
+def _split_file(task):
+    """Worker entry point: the split result of one file."""
+    file_path, reformat = task
+    return EndpointRefactor(reformat=reformat).split_file(Path(file_path))
+
 if __name__ == "__main__":
-    refactor = EndpointRefactor()
-    refactor.run()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Split content-management endpoints into platform/tenant endpoints')
+    parser.add_argument('files', nargs='*', help=f'files to refactor (default: the {len(NON_COMPLIANT_FILES)} non-compliant modules)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='print a unified diff of every change (report included) instead of writing')
+    parser.add_argument('--reformat', action='store_true',
+                        help='re-dump whole files with yaml.dump instead of editing them in place')
+    add_jobs_argument(parser)
+    args = parser.parse_args()
+    
+    refactor = EndpointRefactor(reformat=args.reformat, dry_run=args.dry_run)
+    if args.dry_run:
+        # Progress to stderr, so stdout is a patch (apply with: patch -p1)
+        with contextlib.redirect_stdout(sys.stderr):
+            refactor.run(args.files, jobs=args.jobs)
+        sys.stdout.writelines(refactor.diff)
+    else:
+        refactor.run(args.files, jobs=args.jobs)
\ No newline at end of file
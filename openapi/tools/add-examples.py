@@ -7,6 +7,8 @@ import yaml
 import json
 from pathlib import Path
 
+from spec_loader import load_yaml
+
 def add_examples():
     print('=' * 90)
     print(' ' * 30 + 'ADDING EXAMPLES TO ENDPOINTS')
@@ -39,8 +41,7 @@ def add_examples():
         module_name = path_file.stem
         
         try:
-            with open(path_file, 'r', encoding='utf-8') as f:
-                content = yaml.safe_load(f)
+            content = load_yaml(path_file)
             
             if not isinstance(content, dict):
                 continue
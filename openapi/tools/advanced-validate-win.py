@@ -10,11 +10,12 @@ Validates:
 """
 
 import os
-import yaml
 import re
 from pathlib import Path
 from collections import defaultdict
 
+from spec_loader import load_yaml, load_yaml_text
+
 def advanced_validation():
     """Run advanced OpenAPI validation"""
     
@@ -53,8 +54,7 @@ def advanced_validation():
         for schema_file in sorted(schemas_dir.glob('*.yaml')):
             module_name = schema_file.stem
             try:
-                with open(schema_file, 'r', encoding='utf-8') as f:
-                    content = yaml.safe_load(f)
+                content = load_yaml(schema_file)
                 
                 all_schemas[module_name] = content
                 if isinstance(content, dict):
@@ -77,14 +77,13 @@ def advanced_validation():
     base_has_tenant = False
     base_entity_path = base_path / 'schemas' / 'common' / 'base.yaml'
     try:
-        with open(base_entity_path, 'r', encoding='utf-8') as f:
-            base_content = yaml.safe_load(f)
-            if isinstance(base_content, dict):
-                base_entity = base_content.get('BaseEntity', {})
-                if isinstance(base_entity, dict):
-                    props = base_entity.get('properties', {})
-                    if 'tenant_id' in props:
-                        base_has_tenant = True
+        base_content = load_yaml(base_entity_path)
+        if isinstance(base_content, dict):
+            base_entity = base_content.get('BaseEntity', {})
+            if isinstance(base_entity, dict):
+                props = base_entity.get('properties', {})
+                if 'tenant_id' in props:
+                    base_has_tenant = True
     except:
         pass
     
@@ -136,7 +135,7 @@ def advanced_validation():
             try:
                 with open(paths_file, 'r', encoding='utf-8') as f:
                     content_str = f.read()
-                    content = yaml.safe_load(content_str)
+                    content = load_yaml_text(content_str)
                 
                 # Find all $ref patterns
                 ref_pattern = r'\$ref:\s*["\']?([#/\w\-\.]+)["\']?'
@@ -174,8 +173,7 @@ def advanced_validation():
         for paths_file in sorted(paths_dir.glob('*.yaml')):
             module_name = paths_file.stem
             try:
-                with open(paths_file, 'r', encoding='utf-8') as f:
-                    content = yaml.safe_load(f)
+                content = load_yaml(paths_file)
                 
                 if isinstance(content, dict) and 'paths' in content:
                     for path, path_item in content['paths'].items():
@@ -243,8 +241,7 @@ def advanced_validation():
             continue
         for paths_file in sorted(paths_dir.glob('*.yaml')):
             try:
-                with open(paths_file, 'r', encoding='utf-8') as f:
-                    content = yaml.safe_load(f)
+                content = load_yaml(paths_file)
                 
                 if isinstance(content, dict) and 'paths' in content:
                     for path, path_item in content['paths'].items():
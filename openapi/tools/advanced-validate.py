@@ -7,17 +7,61 @@ Validates:
 - Multi-tenant compliance
 - Security configuration
 - Cross-module relationships
+
+--format json|sarif emits every finding (no truncation) with its rule id,
+file, line and pointer, plus wall time per rule and per file. --profile
+times the load, resolve, rule and write stages (see profiling.py).
 """
 
-import os
-import yaml
-import re
+import argparse
+import time
 from pathlib import Path
-from collections import defaultdict
 
-def advanced_validation():
+from profiling import Profiler, add_profile_argument, profiler_from_args
+from ref_resolver import RefResolver
+from rule_engine import RuleEngine
+from spec_loader import add_jobs_argument, load_spec_tree
+from spec_reach import load_reachable_tree
+from validation_report import ValidationReport, add_output_arguments, write_report
+from validation_rules import default_rules
+
+def advanced_validation(jobs=1, reachable=False, output_format='text', output=None, profiler=None):
     """Run advanced OpenAPI validation"""
     
+    profiler = profiler or Profiler('advanced-validate', enabled=False)
+    start = time.perf_counter()
+    base_path = Path(__file__).parent.parent.resolve()
+    
+    # Parse everything once (in parallel with --jobs), then walk it once.
+    # --reachable validates only what openapi.yaml actually ships.
+    with profiler.span('load'):
+        if reachable:
+            spec = load_reachable_tree(root=base_path)
+        else:
+            spec = load_spec_tree(
+                ['schemas/content-management', 'schemas/common', 'paths/content-management', 'components'],
+                jobs=jobs, root=base_path
+            )
+    profiler.add_tree(spec)
+    engine = RuleEngine(default_rules(), timed=profiler.enabled or output_format != 'text')
+    with profiler.span('rules'), profiler.measure(RefResolver, ('locate', 'resolve_pointer', 'resolve', 'check')):
+        engine.run(spec)
+    profiler.add_engine(engine)
+    
+    with profiler.span('write'):
+        if output_format != 'text':
+            elapsed = (time.perf_counter() - start) * 1000
+            write_report(ValidationReport('advanced-validate', spec, engine, elapsed), output_format, output)
+        else:
+            print_report(spec, engine, base_path)
+
+def print_report(spec, engine, base_path):
+    """Print the text report of an advanced validation run"""
+    
+    schemas_dir = base_path / 'schemas' / 'content-management'
+    paths_dir = base_path / 'paths' / 'content-management'
+    components_dir = base_path / 'components'
+    
     print('╔' + '═' * 88 + '╗')
     print('║' + ' ' * 88 + '║')
     print('║' + '🔍 ADVANCED OPENAPI SCHEMA VALIDATION & ISSUES REPORT'.center(88) + '║')
@@ -25,10 +69,13 @@ def advanced_validation():
     print('╚' + '═' * 88 + '╝')
     print()
     
-    base_path = Path(__file__).parent.parent.resolve()
-    schemas_dir = base_path / 'schemas' / 'content-management'
-    paths_dir = base_path / 'paths' / 'content-management'
-    components_dir = base_path / 'components'
+    tenant_rule = engine.rule('tenant-id')
+    security_rule = engine.rule('explicit-security')
+    ref_rule = engine.rule('ref-format')
+    entity_rule = engine.rule('duplicate-entity')
+    description_rule = engine.rule('description-coverage')
+    example_rule = engine.rule('example-coverage')
+    stats_rule = engine.rule('endpoint-stats')
     
     issues_found = {
         'critical': [],
@@ -36,166 +83,61 @@ def advanced_validation():
         'info': []
     }
     
-    # Load all schemas to build reference map
-    all_schemas = {}
-    schema_entities = defaultdict(list)
-    
     print('📖 LOADING ALL SCHEMAS...')
     print('-' * 90)
     
-    for schema_file in sorted(schemas_dir.glob('*.yaml')):
+    total_entities = 0
+    for schema_file in spec.files(schemas_dir):
         module_name = schema_file.stem
         try:
-            with open(schema_file, 'r', encoding='utf-8') as f:
-                content = yaml.safe_load(f)
-            
-            all_schemas[module_name] = content
+            content = spec.get(schema_file)
             if isinstance(content, dict):
-                for entity_name in content.keys():
-                    schema_entities[entity_name].append(module_name)
-                    
+                total_entities += len(content)
             print(f'✅ Loaded: {module_name:20} ({len(content) if isinstance(content, dict) else "?":2} entities)')
         except Exception as e:
             issues_found['critical'].append(f'Failed to load {module_name}: {str(e)[:60]}')
             print(f'❌ Failed: {module_name:20} - {str(e)[:50]}')
     
+    for paths_file in spec.files(paths_dir):
+        if paths_file in spec.errors:
+            issues_found['warning'].append(f'Error loading {paths_file.stem}: {str(spec.errors[paths_file])[:50]}')
+    
     print()
     print('🔎 CHECKING TENANT_ID COMPLIANCE...')
     print('-' * 90)
     
-    # Check tenant_id in all schemas (with smart reference following)
-    tenant_id_missing = []
-    
-    # First check if BaseEntity has tenant_id
-    base_has_tenant = False
-    base_entity_path = base_path / 'schemas' / 'common' / 'base.yaml'
-    try:
-        with open(base_entity_path, 'r', encoding='utf-8') as f:
-            base_content = yaml.safe_load(f)
-            if isinstance(base_content, dict):
-                base_entity = base_content.get('BaseEntity', {})
-                if isinstance(base_entity, dict):
-                    props = base_entity.get('properties', {})
-                    if 'tenant_id' in props:
-                        base_has_tenant = True
-    except:
-        pass
-    
-    for module_name, schemas in all_schemas.items():
-        if isinstance(schemas, dict):
-            has_tenant_id = False
-            for entity_name, entity_def in schemas.items():
-                if isinstance(entity_def, dict):
-                    # Check direct properties
-                    props = entity_def.get('properties', {})
-                    if 'tenant_id' in props:
-                        has_tenant_id = True
-                        break
-                    
-                    # Check allOf references
-                    all_of = entity_def.get('allOf', [])
-                    if isinstance(all_of, list):
-                        for ref_item in all_of:
-                            if isinstance(ref_item, dict) and '$ref' in ref_item:
-                                ref_path = ref_item['$ref']
-                                
-                                # Check if it references BaseEntity or related entities
-                                if any(x in ref_path for x in ['base.yaml#/BaseEntity', 'base.yaml#/AuditableEntity', 'base.yaml#/PublishableEntity']) and base_has_tenant:
-                                    has_tenant_id = True
-                                    break
-                    
-                    if has_tenant_id:
-                        break
-            
-            if not has_tenant_id:
-                tenant_id_missing.append(module_name)
-                issues_found['critical'].append(
-                    f'TENANT_ID: Module "{module_name}" missing tenant_id field in all entities'
-                )
-                print(f'⚠️ {module_name:20} - NO tenant_id FOUND')
-            else:
-                print(f'✅ {module_name:20} - tenant_id present')
+    for module_name, compliant in tenant_rule.module_status.items():
+        if compliant:
+            print(f'✅ {module_name:20} - tenant_id present')
+        else:
+            print(f'⚠️ {module_name:20} - NO tenant_id FOUND')
     
     print()
     print('🔗 CHECKING SCHEMA REFERENCES & DEFINITIONS...')
     print('-' * 90)
     
-    # Check path files for $ref usage and validity
-    for paths_file in sorted(paths_dir.glob('*.yaml')):
-        module_name = paths_file.stem
-        try:
-            with open(paths_file, 'r', encoding='utf-8') as f:
-                content_str = f.read()
-                content = yaml.safe_load(content_str)
-            
-            # Find all $ref patterns
-            ref_pattern = r'\$ref:\s*["\']?([#/\w\-\.]+)["\']?'
-            refs_in_file = re.findall(ref_pattern, content_str)
-            
-            if refs_in_file:
-                print(f'\n📄 {module_name:20} - Found {len(set(refs_in_file))} unique references:')
-                
-                for ref in set(refs_in_file):
-                    if ref.startswith('#/'):
-                        # Internal reference - check if it resolves
-                        ref_path = ref.split('/')[1:]  # Skip '#'
-                        print(f'   ├─ {ref:60} (internal)', end='')
-                        
-                        # Simple check - just warn if suspicious
-                        if 'responses' in ref_path or 'schemas' in ref_path:
-                            print(' ✅')
-                        else:
-                            print(' ⚠️')
-                    else:
-                        print(f'   ├─ {ref:60} (external)')
-                        issues_found['warning'].append(f'Unsupported reference format in {module_name}: {ref}')
-        
-        except Exception as e:
-            issues_found['warning'].append(f'Error checking references in {module_name}: {str(e)[:50]}')
+    for module_name, refs in ref_rule.refs_by_module.items():
+        print(f'\n📄 {module_name:20} - Found {len(refs)} unique references:')
+        for ref in refs:
+            if ref.startswith('#/'):
+                # Internal reference - just warn if suspicious
+                ref_path = ref.split('/')[1:]
+                marker = ' ✅' if 'responses' in ref_path or 'schemas' in ref_path else ' ⚠️'
+                print(f'   ├─ {ref:60} (internal){marker}')
+            else:
+                print(f'   ├─ {ref:60} (external)')
     
     print()
     print('🔐 CHECKING SECURITY CONFIGURATION...')
     print('-' * 90)
     
-    security_issues = defaultdict(list)
-    for paths_file in sorted(paths_dir.glob('*.yaml')):
-        module_name = paths_file.stem
-        try:
-            with open(paths_file, 'r', encoding='utf-8') as f:
-                content = yaml.safe_load(f)
-            
-            if isinstance(content, dict) and 'paths' in content:
-                for path, path_item in content['paths'].items():
-                    if isinstance(path_item, dict):
-                        for method in ['get', 'post', 'put', 'delete', 'patch']:
-                            if method in path_item:
-                                operation = path_item[method]
-                                if isinstance(operation, dict):
-                                    # Check if security is defined
-                                    has_security = 'security' in operation
-                                    
-                                    # Flag operations without explicit security
-                                    if not has_security and not path.startswith('/public/'):
-                                        if path not in ['/health', '/status', '/version']:
-                                            security_issues[module_name].append({
-                                                'method': method.upper(),
-                                                'path': path,
-                                                'issue': 'Missing explicit security definition'
-                                            })
-        except Exception as e:
-            issues_found['warning'].append(f'Error checking security in {module_name}: {str(e)[:50]}')
-    
-    if security_issues:
-        for module, issues in security_issues.items():
-            print(f'⚠️ {module:20} - {len(issues)} endpoints missing explicit security:')
-            for issue in issues[:3]:  # Show first 3
-                print(f'   └─ {issue["method"]} {issue["path"]}')
-            if len(issues) > 3:
-                print(f'   └─ ... and {len(issues) - 3} more')
-            issues_found['warning'].extend([
-                f'SECURITY: {module} - {issue["method"]} {issue["path"]} missing security'
-                for issue in issues
-            ])
+    if security_rule.by_module:
+        for module, operations in security_rule.by_module.items():
+            print(f'⚠️ {module:20} - {len(operations)} endpoints missing explicit security:')
+            for operation in operations[:3]:  # Show first 3
+                print(f'   └─ {operation.method.upper()} {operation.path}')
+            if len(operations) > 3:
+                print(f'   └─ ... and {len(operations) - 3} more')
     else:
         print('✅ All endpoints have explicit security definitions')
     
@@ -203,62 +145,34 @@ def advanced_validation():
     print('📐 CHECKING ENTITY RELATIONSHIPS...')
     print('-' * 90)
     
-    # Check for potential broken references between modules
-    entity_conflicts = []
-    for entity_name, modules in schema_entities.items():
-        if len(modules) > 1:
-            print(f'📌 Entity "{entity_name}" defined in: {", ".join(modules)}')
-            entity_conflicts.append((entity_name, modules))
+    entity_conflicts = entity_rule.conflicts
+    for entity_name, modules in entity_conflicts:
+        print(f'📌 Entity "{entity_name}" defined in: {", ".join(modules)}')
     
     if not entity_conflicts:
         print('✅ No entity name conflicts found')
     else:
         print(f'\n⚠️ Found {len(entity_conflicts)} entities defined in multiple modules')
-        for entity, modules in entity_conflicts:
-            issues_found['info'].append(f'Entity "{entity}" found in modules: {", ".join(modules)}')
     
     print()
     print('📊 ENDPOINT VALIDATION...')
     print('-' * 90)
     
-    endpoints_by_method = defaultdict(int)
-    endpoints_with_examples = 0
-    endpoints_with_descriptions = 0
-    
-    for paths_file in sorted(paths_dir.glob('*.yaml')):
-        try:
-            with open(paths_file, 'r', encoding='utf-8') as f:
-                content = yaml.safe_load(f)
-            
-            if isinstance(content, dict) and 'paths' in content:
-                for path, path_item in content['paths'].items():
-                    if isinstance(path_item, dict):
-                        for method in ['get', 'post', 'put', 'delete', 'patch']:
-                            if method in path_item:
-                                operation = path_item[method]
-                                endpoints_by_method[method.upper()] += 1
-                                
-                                if isinstance(operation, dict):
-                                    if 'description' in operation or 'summary' in operation:
-                                        endpoints_with_descriptions += 1
-                                    
-                                    if 'examples' in operation or 'requestBody' in operation:
-                                        if 'examples' in operation.get('requestBody', {}):
-                                            endpoints_with_examples += 1
-        except Exception as e:
-            pass
-    
+    endpoints_by_method = stats_rule.by_method
     print('Endpoints by HTTP method:')
     for method in sorted(endpoints_by_method.keys()):
         print(f'  {method:6} : {endpoints_by_method[method]:3} endpoints')
     
     total_endpoints = sum(endpoints_by_method.values())
+    endpoints_with_descriptions = description_rule.described
+    endpoints_with_examples = example_rule.with_examples
     print(f'\nTotal endpoints: {total_endpoints}')
     print(f'With descriptions: {endpoints_with_descriptions}/{total_endpoints} ({100*endpoints_with_descriptions//total_endpoints if total_endpoints > 0 else 0}%)')
     print(f'With examples: {endpoints_with_examples}/{total_endpoints} ({100*endpoints_with_examples//total_endpoints if total_endpoints > 0 else 0}%)')
     
-    if endpoints_with_descriptions < total_endpoints * 0.8:
-        issues_found['warning'].append(f'Only {endpoints_with_descriptions}/{total_endpoints} endpoints have descriptions')
+    for finding in engine.findings:
+        issues_found[finding.severity].append(finding.message)
+    tenant_id_missing = tenant_rule.missing
     
     print()
     print('╔' + '═' * 88 + '╗')
@@ -314,16 +228,29 @@ def advanced_validation():
         print(f'🚨 VALIDATION FAILED - {len(issues_found["critical"])} critical, {len(issues_found["warning"])} warnings')
     
     print()
-    print(f'Total files: 33 (15 schemas + 15 paths + 3 components)')
-    print(f'Total entities: 278')
-    print(f'Total endpoints: {total_endpoints}')
-    print(f'Total operations: {sum(endpoints_by_method.values())}')
+    schema_count = len(spec.files(schemas_dir))
+    paths_count = len(spec.files(paths_dir))
+    component_count = len(spec.files(components_dir))
+    print(f'Total files: {schema_count + paths_count + component_count} ({schema_count} schemas + {paths_count} paths + {component_count} components)')
+    print(f'Total entities: {total_entities}')
+    print(f'Total endpoints: {sum(len(p) for p in stats_rule.paths_by_module.values())}')
+    print(f'Total operations: {total_endpoints}')
     print()
-    print(f'Modules without tenant_id: {len(tenant_id_missing)}/15')
+    print(f'Modules without tenant_id: {len(tenant_id_missing)}/{len(tenant_rule.module_status)}')
     if tenant_id_missing:
         print(f'  {", ".join(tenant_id_missing)}')
     print()
     print('=' * 90)
 
 if __name__ == '__main__':
-    advanced_validation()
+    parser = argparse.ArgumentParser(description='Advanced OpenAPI validation')
+    add_jobs_argument(parser)
+    parser.add_argument('--reachable', action='store_true',
+                        help='only validate files reachable from openapi.yaml through $ref')
+    add_output_arguments(parser)
+    add_profile_argument(parser)
+    args = parser.parse_args()
+    profiler = profiler_from_args('advanced-validate', args)
+    advanced_validation(jobs=args.jobs, reachable=args.reachable, output_format=args.format, output=args.output,
+                        profiler=profiler)
+    profiler.finish(args.profile)
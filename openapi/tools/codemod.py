@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Declarative multi-pattern codemods for the OpenAPI tree
+A codemod is a rule file in tools/codemods/ (one per former fix script):
+
+    description: What the rule set does
+    files: [paths/**/*.yaml]          # globs relative to openapi/, per rule overridable
+    rules:
+      - id: local-schemas
+        description: ...
+        pattern: "(?P<prefix>\\$ref:\\s+['\\"])#/components/schemas/(?P<name>[^'\\"]+)"
+        replace: "{prefix}{root}components/schemas.yaml#{name}"
+
+Patterns use named groups only. replace is a str.format template over the
+rule's groups plus {root} (relative path from the file to openapi/, './'
+for files in openapi/ itself) and {file} (the file's path relative to
+openapi/).
+
+All rules of the selected rule sets are compiled into one combined matcher
+(rewrite_engine.py), so each file is read and scanned once however many
+rules apply; files are spread across a worker pool with --jobs, and the
+changed files are written in one transaction (file_transaction.py). The
+run reports hits per rule, and flags rules whose output another selected
+rule would rewrite again (rule sets that undo each other, such as adding
+and stripping the '/' after '#').
+
+Usage:
+    python tools/codemod.py --list
+    python tools/codemod.py ref-paths --dry-run -v
+    python tools/codemod.py all-refs fragment-refs final-fix-paths -j 0
+"""
+
+import argparse
+import string
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import yaml
+
+from file_transaction import FileTransaction
+from rewrite_engine import RewriteRule, Rewriter
+from spec_loader import OPENAPI_ROOT, SafeLoader, add_jobs_argument, resolve_jobs
+
+CODEMOD_DIR = Path(__file__).resolve().parent / 'codemods'
+CONTEXT_FIELDS = ('root', 'file')
+
+class CodemodRule:
+    """One pattern of a rule set and the template of its replacement"""
+
+    def __init__(self, rule_set, data, default_files):
+        self.id = f"{rule_set}/{data['id']}"
+        self.description = data.get('description', '')
+        self.pattern = data['pattern']
+        self.template = data['replace']
+        files = data.get('files', default_files)
+        self.files = [files] if isinstance(files, str) else list(files or ())
+        if not self.files:
+            raise ValueError(f'{self.id}: no files to apply to')
+        self.rewrite_rule = RewriteRule(self.id, self.pattern, self.replace)
+        fields = {field for _, field, _, _ in string.Formatter().parse(self.template) if field is not None}
+        unknown = fields - set(self.rewrite_rule.groups) - set(CONTEXT_FIELDS)
+        if unknown:
+            raise ValueError(f'{self.id}: unknown replacement fields {", ".join(sorted(unknown))}')
+
+    def replace(self, groups, context):
+        values = dict(context)
+        values.update((name, value or '') for name, value in groups.items())
+        return self.template.format_map(values)
+
+def load_rule_set(name, directory=None):
+    """CodemodRules of tools/codemods/<name>.yaml; ValueError on malformed files"""
+    path = Path(directory or CODEMOD_DIR) / f'{name}.yaml'
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = yaml.load(f, Loader=SafeLoader)
+    except OSError as e:
+        raise ValueError(f'unknown rule set {name!r} ({e.strerror})') from e
+    except yaml.YAMLError as e:
+        raise ValueError(f'{path.name}: {e}') from e
+    if not isinstance(data, dict) or not isinstance(data.get('rules'), list):
+        raise ValueError(f'{path.name}: expected a mapping with a rules list')
+    try:
+        return [CodemodRule(name, rule, data.get('files')) for rule in data['rules']]
+    except KeyError as e:
+        raise ValueError(f'{path.name}: rule without {e.args[0]}') from e
+
+def available_rule_sets(directory=None):
+    """{name: description} of every rule file"""
+    sets = {}
+    for path in sorted(Path(directory or CODEMOD_DIR).glob('*.yaml')):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = yaml.load(f, Loader=SafeLoader) or {}
+        sets[path.stem] = data.get('description', '').strip()
+    return sets
+
+def relative_root(relpath):
+    """Relative path from the directory of relpath to openapi/"""
+    depth = len(Path(relpath).parts) - 1
+    return '../' * depth if depth else './'
+
+class Codemod:
+    """The rules of one or more rule sets, applied in one scan per file"""
+
+    def __init__(self, names, directory=None):
+        self.names = list(names)
+        self.rules = [rule for name in self.names for rule in load_rule_set(name, directory)]
+        self._rewriters = {}
+
+    def files(self, root=None):
+        """{relpath: indices of the rules applying to it}, in path order"""
+        root = Path(root) if root else OPENAPI_ROOT
+        matched = {}
+        globbed = {}
+        for index, rule in enumerate(self.rules):
+            for pattern in rule.files:
+                if pattern not in globbed:
+                    globbed[pattern] = [p.relative_to(root).as_posix() for p in root.glob(pattern) if p.is_file()]
+                for relpath in globbed[pattern]:
+                    matched.setdefault(relpath, set()).add(index)
+        return {relpath: tuple(sorted(matched[relpath])) for relpath in sorted(matched)}
+
+    def rewriter(self, indices):
+        """Combined matcher of the rules at indices, built once per distinct subset"""
+        if indices not in self._rewriters:
+            self._rewriters[indices] = Rewriter([self.rules[i].rewrite_rule for i in indices])
+        return self._rewriters[indices]
+
+    def rewrite(self, relpath, text, indices=None):
+        """RewriteResult of every applicable rule over the text of relpath"""
+        if indices is None:
+            indices = tuple(range(len(self.rules)))
+        return self.rewriter(indices).rewrite(text, {'root': relative_root(relpath), 'file': relpath})
+
+    def conflicts(self, relpath, indices, changes):
+        """{(rule, rule rewriting its output again): count} for the changes made in relpath"""
+        found = Counter()
+        for change in changes:
+            again = self.rewrite(relpath, change['new'], indices).changes
+            for other in again:
+                found[(change['rule'], other.rule)] += 1
+        return found
+
+class FileResult:
+    __slots__ = ('relpath', 'text', 'changes', 'error')
+
+    def __init__(self, relpath, text=None, changes=(), error=None):
+        self.relpath = relpath
+        self.text = text
+        self.changes = list(changes)
+        self.error = error
+
+class CodemodRun:
+    """Outcome of applying a Codemod to the tree"""
+
+    def __init__(self, codemod, results):
+        self.codemod = codemod
+        self.results = results
+        self.hits = Counter(change['rule'] for result in results for change in result.changes)
+        self.conflicts = Counter()
+        self.journal = None
+
+    @property
+    def changed(self):
+        return [result for result in self.results if result.changes]
+
+    @property
+    def errors(self):
+        return [result for result in self.results if result.error]
+
+_worker_codemod = None
+
+def _init_worker(names, directory):
+    global _worker_codemod
+    _worker_codemod = Codemod(names, directory)
+
+def _rewrite_file(task):
+    root, relpath, indices = task
+    try:
+        with open(Path(root) / relpath, 'r', encoding='utf-8', newline='') as f:
+            text = f.read()
+    except (OSError, UnicodeDecodeError) as e:
+        return FileResult(relpath, error=str(e))
+    result = _worker_codemod.rewrite(relpath, text, indices)
+    if not result.changed:
+        return FileResult(relpath)
+    return FileResult(relpath, result.text, [change.to_dict() for change in result.changes])
+
+def run_codemod(names, root=None, jobs=1, write=True, directory=None):
+    """Apply the rule sets names to every file they match and write the changed files
+
+    The files are written in one FileTransaction, so either all of them
+    change or none; run.journal is its rollback journal.
+    """
+    global _worker_codemod
+    root = Path(root).resolve() if root else OPENAPI_ROOT
+    codemod = Codemod(names, directory)
+    files = codemod.files(root)
+    tasks = [(str(root), relpath, indices) for relpath, indices in files.items()]
+    jobs = min(resolve_jobs(jobs), len(tasks) or 1)
+    if jobs == 1:
+        _worker_codemod = codemod
+        results = [_rewrite_file(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                 initargs=(codemod.names, directory)) as pool:
+            results = list(pool.map(_rewrite_file, tasks, chunksize=max(1, len(tasks) // (jobs * 4))))
+
+    run = CodemodRun(codemod, results)
+    transaction = FileTransaction('codemod', root=root)
+    for result in run.changed:
+        run.conflicts.update(codemod.conflicts(result.relpath, files[result.relpath], result.changes))
+        if write:
+            transaction.write(root / result.relpath, result.text)
+    run.journal = transaction.commit()
+    return run
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Apply declarative rewrite rules to the spec tree in one pass')
+    parser.add_argument('rule_sets', nargs='*', metavar='RULE_SET', help='rule files in tools/codemods/ (without .yaml)')
+    parser.add_argument('--list', action='store_true', help='list the available rule sets')
+    parser.add_argument('--dry-run', action='store_true', help='report the changes without writing them')
+    parser.add_argument('-v', '--verbose', action='store_true', help='show every change')
+    add_jobs_argument(parser)
+    args = parser.parse_args(argv)
+
+    if args.list or not args.rule_sets:
+        for name, description in available_rule_sets().items():
+            print(f'{name:20} {description}')
+        return 0 if args.list else 2
+
+    try:
+        run = run_codemod(args.rule_sets, jobs=args.jobs, write=not args.dry_run)
+    except ValueError as e:
+        print(f'❌ {e}', file=sys.stderr)
+        return 2
+
+    print('=' * 60)
+    print(f"CODEMOD: {', '.join(args.rule_sets)}{' [DRY RUN]' if args.dry_run else ''}")
+    print('=' * 60)
+    for result in run.errors:
+        print(f'❌ {result.relpath}: {result.error}')
+    for result in run.changed:
+        print(f"[{'DRY' if args.dry_run else 'FIXED'}] {result.relpath}: {len(result.changes)} changes")
+        if args.verbose:
+            for change in result.changes:
+                print(f"   Line {change['line']}: {change['old']}")
+                print(f"   {' ' * len(str(change['line']))}    -> {change['new']}")
+    print()
+    print(f'{"Rule":44} {"Hits":>6}')
+    for rule in run.codemod.rules:
+        print(f'{rule.id[:44]:44} {run.hits.get(rule.id, 0):6}')
+    for (rule, other), count in sorted(run.conflicts.items()):
+        print(f'⚠️  {count} changes of {rule} are rewritten again by {other}')
+    print()
+    print(f'Files scanned:  {len(run.results)}')
+    print(f'Files changed:  {len(run.changed)}')
+    print(f'Total changes:  {sum(run.hits.values())}')
+    if run.journal:
+        print(f'Journal:        {run.journal.stem} (undo: python tools/file_transaction.py rollback)')
+    if args.dry_run and run.changed:
+        print('\nTip: Run without --dry-run to apply changes')
+    return 1 if run.errors else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,27 +2,45 @@
 """
 Comprehensive OpenAPI Schema Validation Script
 Validates all schema and path files for completeness and compliance
+
+--format json|sarif emits every finding (no truncation) with its rule id,
+file, line and pointer, plus wall time per rule and per file. --profile
+times the load, resolve, rule and write stages (see profiling.py).
 """
 
+import argparse
 import os
+import time
 import yaml
 import json
 from pathlib import Path
 from collections import defaultdict
 
-def validate_all_schemas():
+from profiling import Profiler, add_profile_argument, profiler_from_args
+from ref_resolver import RefResolver
+from rule_engine import RuleEngine
+from spec_loader import add_jobs_argument, load_spec_tree
+from validation_report import ValidationReport, add_output_arguments, write_report
+from validation_rules import EndpointStatsRule, SecurityRule, TenantIdRule
+
+def validate_all_schemas(jobs=1, output_format='text', output=None, profiler=None):
     """Validate all OpenAPI schema files"""
     
-    print('=' * 90)
-    print('🚀 COMPREHENSIVE OPENAPI VALIDATION REPORT')
-    print('=' * 90)
-    print()
-    
+    profiler = profiler or Profiler('comprehensive-validate', enabled=False)
+    start = time.perf_counter()
     base_path = Path(__file__).parent.parent.resolve()
     schemas_dir = base_path / 'schemas' / 'content-management'
     paths_dir = base_path / 'paths' / 'content-management'
     components_dir = base_path / 'components'
     
+    # Parse all three directories up front (in parallel with --jobs)
+    with profiler.span('load'):
+        spec = load_spec_tree(
+            ['schemas/content-management', 'schemas/common', 'paths/content-management', 'components'],
+            jobs=jobs, root=base_path
+        )
+    profiler.add_tree(spec)
+    
     # Track results
     results = {
         'total_files': 0,
@@ -34,52 +52,41 @@ def validate_all_schemas():
         'security_issues': []
     }
     
-    # Validation functions
-    def check_tenant_id(content, module_name):
-        """Check if tenant_id is present in schema"""
-        if not isinstance(content, dict):
-            return False
-        
-        for entity_name, entity_def in content.items():
-            if isinstance(entity_def, dict) and 'properties' in entity_def:
-                if 'tenant_id' in entity_def['properties']:
-                    return True
-        return False
+    # One walk of the loaded tree feeds the tenant, security and endpoint checks
+    engine = RuleEngine([TenantIdRule(), SecurityRule(), EndpointStatsRule()],
+                        timed=profiler.enabled or output_format != 'text')
+    with profiler.span('rules'), profiler.measure(RefResolver, ('locate', 'resolve_pointer', 'resolve', 'check')):
+        engine.run(spec)
+    profiler.add_engine(engine)
     
-    def check_security(content, module_name):
-        """Check if security is properly configured"""
-        if not isinstance(content, dict):
-            return []
-        
-        issues = []
-        
-        # Check paths for security definitions
-        if 'paths' in content:
-            for path, path_item in content['paths'].items():
-                if isinstance(path_item, dict):
-                    for method in ['get', 'post', 'put', 'delete', 'patch']:
-                        if method in path_item:
-                            operation = path_item[method]
-                            if isinstance(operation, dict):
-                                # Public paths should have public operations
-                                if not path.startswith('/public/') and 'security' not in operation:
-                                    if path not in ['/health', '/status', '/version']:
-                                        issues.append(f'Missing security on {method.upper()} {path}')
-        
-        return issues
+    if output_format != 'text':
+        with profiler.span('write'):
+            elapsed = (time.perf_counter() - start) * 1000
+            report = ValidationReport('comprehensive-validate', spec, engine, elapsed)
+            write_report(report, output_format, output)
+        return report.to_dict()
+    
+    profiler.begin('write')
+    print('=' * 90)
+    print('🚀 COMPREHENSIVE OPENAPI VALIDATION REPORT')
+    print('=' * 90)
+    print()
+    
+    tenant_rule = engine.rule('tenant-id')
+    security_rule = engine.rule('explicit-security')
+    stats_rule = engine.rule('endpoint-stats')
     
     # Validate schema files
     print('📊 SCHEMA FILES VALIDATION')
     print('-' * 90)
     
-    schema_files = sorted(schemas_dir.glob('*.yaml'))
+    schema_files = spec.files(schemas_dir)
     for schema_file in schema_files:
         module_name = schema_file.stem.upper()
         results['total_files'] += 1
         
         try:
-            with open(schema_file, 'r', encoding='utf-8') as f:
-                content = yaml.safe_load(f)
+            content = spec.get(schema_file)
             
             file_size = schema_file.stat().st_size / 1024
             
@@ -102,7 +109,7 @@ def validate_all_schemas():
             }
             
             # Check for tenant_id
-            has_tenant_id = check_tenant_id(content, module_name)
+            has_tenant_id = tenant_rule.module_status.get(schema_file.stem, False)
             results['modules'][module_name]['has_tenant_id'] = has_tenant_id
             
             if not has_tenant_id:
@@ -131,29 +138,19 @@ def validate_all_schemas():
     print('📊 PATHS FILES VALIDATION')
     print('-' * 90)
     
-    paths_files = sorted(paths_dir.glob('*.yaml'))
+    paths_files = spec.files(paths_dir)
     for paths_file in paths_files:
         module_name = paths_file.stem.upper()
         results['total_files'] += 1
         
         try:
-            with open(paths_file, 'r', encoding='utf-8') as f:
-                content = yaml.safe_load(f)
+            content = spec.get(paths_file)
             
             file_size = paths_file.stat().st_size / 1024
             
             # Count endpoints and operations
-            num_endpoints = 0
-            num_operations = 0
-            if isinstance(content, dict) and 'paths' in content:
-                paths_def = content['paths']
-                if isinstance(paths_def, dict):
-                    num_endpoints = len(paths_def)
-                    for path_item in paths_def.values():
-                        if isinstance(path_item, dict):
-                            for method in ['get', 'post', 'put', 'delete', 'patch', 'head', 'options']:
-                                if method in path_item:
-                                    num_operations += 1
+            num_endpoints = len(stats_rule.paths_by_module.get(paths_file.stem, ()))
+            num_operations = stats_rule.operations_by_module.get(paths_file.stem, 0)
             
             results['valid_files'] += 1
             
@@ -164,10 +161,14 @@ def validate_all_schemas():
                 results['modules'][module_name]['paths_operations'] = num_operations
             
             # Check security
-            sec_issues = check_security(content, module_name)
+            sec_issues = [
+                f'Missing security on {operation.method.upper()} {operation.path}'
+                for operation in security_rule.by_module.get(paths_file.stem, [])
+            ]
             if sec_issues:
                 results['security_issues'].extend([(module_name, issue) for issue in sec_issues])
-                results['modules'][module_name]['issues'].extend(sec_issues)
+                if module_name in results['modules']:
+                    results['modules'][module_name]['issues'].extend(sec_issues)
             
             print(f'✅ {module_name:15} Paths: {num_endpoints:2} endpoints, {num_operations:2} ops, {file_size:6.1f} KB')
             
@@ -182,14 +183,13 @@ def validate_all_schemas():
     print('📊 COMPONENTS FILES VALIDATION')
     print('-' * 90)
     
-    component_files = sorted(components_dir.glob('*.yaml'))
+    component_files = spec.files(components_dir)
     for comp_file in component_files:
         comp_name = comp_file.stem.upper()
         results['total_files'] += 1
         
         try:
-            with open(comp_file, 'r', encoding='utf-8') as f:
-                content = yaml.safe_load(f)
+            content = spec.get(comp_file)
             
             file_size = comp_file.stat().st_size / 1024
             results['valid_files'] += 1
@@ -259,8 +259,16 @@ def validate_all_schemas():
     
     print()
     print('=' * 90)
+    profiler.end('write')
     
     return results
 
 if __name__ == '__main__':
-    validate_all_schemas()
+    parser = argparse.ArgumentParser(description='Comprehensive OpenAPI schema validation')
+    add_jobs_argument(parser)
+    add_output_arguments(parser)
+    add_profile_argument(parser)
+    args = parser.parse_args()
+    profiler = profiler_from_args('comprehensive-validate', args)
+    validate_all_schemas(jobs=args.jobs, output_format=args.format, output=args.output, profiler=profiler)
+    profiler.finish(args.profile)
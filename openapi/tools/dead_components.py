@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Dead component detector
+A component (top-level entry of components/*.yaml or schemas/**/*.yaml, or
+an entry under openapi.yaml#/components) is live when the $ref closure of
+openapi.yaml and every paths/ file reaches it or anything inside it.
+Everything else is dead and reported with the bytes its source text costs.
+
+--prune DIR writes a copy of the spec tree with the dead entries cut out of
+the text (comments and formatting of the remaining entries are untouched)
+and re-checks the copy for references the pruning broke.
+
+Usage:
+    python tools/dead_components.py
+    python tools/dead_components.py --json
+    python tools/dead_components.py --prune generated/pruned
+"""
+
+import argparse
+import io
+import json
+import sys
+from pathlib import Path
+
+import yaml
+
+from json_pointer import join_pointer
+from spec_loader import OPENAPI_ROOT, SafeLoader, iter_spec_files
+from spec_reach import Reachability
+from yaml_splice import entry_spans
+
+# Files whose top-level entries are components, and the section they form
+COMPONENT_FILES = {
+    'components/schemas.yaml': 'schemas',
+    'components/responses.yaml': 'responses',
+    'components/parameters.yaml': 'parameters',
+}
+COMPONENT_SECTIONS = ('schemas', 'responses', 'parameters', 'requestBodies', 'headers', 'examples')
+
+class Component:
+    """One component entry and the source lines it occupies"""
+
+    __slots__ = ('file', 'pointer', 'kind', 'name', 'start_line', 'end_line', 'bytes', 'section')
+
+    def __init__(self, file, pointer, kind, name, start_line, end_line, size, section=None):
+        self.file = file
+        self.pointer = pointer
+        self.kind = kind
+        self.name = name
+        self.start_line = start_line
+        self.end_line = end_line
+        self.bytes = size
+        # (start_line, end_line) of the enclosing section entry, for openapi.yaml#/components/*
+        self.section = section
+
+    def to_dict(self):
+        return {
+            'file': self.file, 'pointer': self.pointer, 'kind': self.kind, 'name': self.name,
+            'line': self.start_line + 1, 'lines': self.end_line - self.start_line, 'bytes': self.bytes,
+        }
+
+def find_components(root=None):
+    """Every component entry in the spec tree, in file order"""
+    root = Path(root).resolve() if root else OPENAPI_ROOT
+    components = []
+    for file_path in iter_spec_files(root):
+        relpath = file_path.relative_to(root).as_posix()
+        if relpath in COMPONENT_FILES:
+            sections = [((), COMPONENT_FILES[relpath])]
+        elif relpath.startswith('schemas/'):
+            sections = [((), 'schemas')]
+        elif relpath == 'openapi.yaml':
+            sections = [(('components', s), s) for s in COMPONENT_SECTIONS]
+        else:
+            continue
+        text = file_path.read_text(encoding='utf-8')
+        lines = text.splitlines(keepends=True)
+        stream = io.StringIO(text)
+        stream.name = str(file_path)
+        document = yaml.compose(stream, Loader=SafeLoader)
+        for prefix, kind in sections:
+            node, parent = document, None
+            for token in prefix:
+                if not isinstance(node, yaml.MappingNode):
+                    node = None
+                    break
+                parent = node
+                node = next((v for k, v in node.value if k.value == token), None)
+            if not isinstance(node, yaml.MappingNode):
+                continue
+            section = None
+            if parent is not None:
+                section = next((start, end) for name, start, end in entry_spans(lines, parent) if name == prefix[-1])
+            for name, start, end in entry_spans(lines, node):
+                size = sum(len(line.encode('utf-8')) for line in lines[start:end])
+                components.append(Component(relpath, join_pointer('', *prefix, name), kind, name,
+                                            start, end, size, section))
+    return components
+
+def reach_from_roots(root=None):
+    """Reachability of openapi.yaml (everything but its components) plus every paths/ file"""
+    reach = Reachability(root, lenient=True)
+    entry = reach.root / 'openapi.yaml'
+    document = reach._document(entry.resolve()) or {}
+    for key in document:
+        if key != 'components':
+            reach.walk('openapi.yaml', join_pointer('', key))
+    if 'securitySchemes' in (document.get('components') or {}):
+        # Used by name from security requirements, never through $ref
+        reach.walk('openapi.yaml', '/components/securitySchemes')
+    for file_path in sorted((reach.root / 'paths').rglob('*.yaml')):
+        reach.walk(file_path.relative_to(reach.root).as_posix())
+    return reach
+
+def is_live(component, reach):
+    fragments = reach.fragments.get((reach.root / component.file).resolve(), ())
+    pointer = component.pointer
+    return any(
+        not f or f == pointer or f.startswith(pointer + '/') or pointer.startswith(f + '/')
+        for f in fragments
+    )
+
+def find_dead(root=None):
+    """(dead components, all components, Reachability)"""
+    reach = reach_from_roots(root)
+    components = find_components(reach.root)
+    dead = [c for c in components if not is_live(c, reach)]
+    return dead, components, reach
+
+def prune_tree(dead, components, output, root=None):
+    """Write the spec tree to output without the dead entries; returns files changed
+
+    A components section of openapi.yaml whose entries are all dead is
+    removed with its key, so no empty (null) section is left behind.
+    """
+    root = Path(root).resolve() if root else OPENAPI_ROOT
+    output = Path(output)
+    by_file = {}
+    for component in dead:
+        by_file.setdefault(component.file, []).append(component)
+    sections = {}
+    for component in components:
+        if component.section is not None:
+            sections.setdefault(component.section, []).append(component)
+    dead_ids = {id(c) for c in dead}
+    for span, members in sections.items():
+        if all(id(c) in dead_ids for c in members):
+            first = members[0]
+            by_file[first.file].append(Component(first.file, '', '', '', span[0], span[1], 0))
+    changed = []
+    for file_path in iter_spec_files(root):
+        relpath = file_path.relative_to(root).as_posix()
+        target = output / relpath
+        target.parent.mkdir(parents=True, exist_ok=True)
+        text = file_path.read_text(encoding='utf-8')
+        if relpath in by_file:
+            lines = text.splitlines(keepends=True)
+            drop = set()
+            for component in by_file[relpath]:
+                end = component.end_line
+                # Take one separating blank line along so gaps do not pile up
+                if end < len(lines) and not lines[end].strip() and component.start_line > 0 \
+                        and not lines[component.start_line - 1].strip():
+                    end += 1
+                drop.update(range(component.start_line, end))
+            text = ''.join(line for i, line in enumerate(lines) if i not in drop)
+            changed.append(relpath)
+        target.write_text(text, encoding='utf-8')
+    return changed
+
+def main():
+    parser = argparse.ArgumentParser(description='List components nothing references')
+    parser.add_argument('--json', action='store_true', help='print dead components as JSON')
+    parser.add_argument('--prune', metavar='DIR', help='write a copy of the tree without the dead components')
+    args = parser.parse_args()
+
+    dead, components, reach = find_dead()
+    dead_bytes = sum(c.bytes for c in dead)
+    total_bytes = sum(c.bytes for c in components)
+
+    if args.json:
+        print(json.dumps({
+            'components': len(components),
+            'dead': [c.to_dict() for c in dead],
+            'dead_bytes': dead_bytes,
+            'total_bytes': total_bytes,
+        }, indent=2))
+    else:
+        print('=' * 60)
+        print('DEAD COMPONENTS')
+        print('=' * 60)
+        current = None
+        for component in dead:
+            if component.file != current:
+                current = component.file
+                print(f'\n{current}')
+            print(f'  {component.kind:11} {component.name:45} {component.bytes:8,} B  (line {component.start_line + 1})')
+        print()
+        print(f'Components:   {len(components)}')
+        print(f'Dead:         {len(dead)}')
+        for kind in COMPONENT_SECTIONS:
+            of_kind = [c for c in dead if c.kind == kind]
+            if of_kind:
+                print(f'  {kind:11} {len(of_kind):4}  {sum(c.bytes for c in of_kind):10,} B')
+        share = dead_bytes / total_bytes * 100 if total_bytes else 0.0
+        print(f'Dead bytes:   {dead_bytes:,} of {total_bytes:,} ({share:.1f}%)')
+
+    if args.prune:
+        changed = prune_tree(dead, components, args.prune, reach.root)
+        pruned = reach_from_roots(args.prune)
+        new_unresolved = len(pruned.unresolved) - len(reach.unresolved)
+        print(f'\nPruned tree written to {args.prune} ({len(changed)} files slimmed)', file=sys.stderr)
+        if new_unresolved > 0:
+            print(f'❌ Pruning broke {new_unresolved} references', file=sys.stderr)
+            return 1
+        print('✅ No references broken by pruning', file=sys.stderr)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Transactional multi-file writes for the fixers
+A FileTransaction stages every output of a run to a temp file next to its
+target (fsynced), and only on commit renames them over the targets with
+os.replace(), so a crash or error mid-run leaves the tree either untouched
+or fully written, never half-migrated. No .bak copies are left behind.
+
+Before the first rename, commit writes a journal to
+openapi/.cache/journal/<id>.json: per file its sha256 before and after the
+write and the zlib-compressed original text. The journal is what rollback
+works from, and it also recovers a commit that was interrupted between
+renames. Rollback only restores files that still hold the committed
+content (--force overrides), so later edits are not lost silently.
+
+    with FileTransaction('codemod') as transaction:
+        transaction.write(path, text)
+    # committed on leaving the block, aborted (temp files removed) on error
+
+Usage:
+    python tools/file_transaction.py list
+    python tools/file_transaction.py rollback            # the last committed run
+    python tools/file_transaction.py rollback 20261017-101500-042-codemod
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+import zlib
+from pathlib import Path
+
+from spec_loader import OPENAPI_ROOT
+
+JOURNAL_DIR = OPENAPI_ROOT / '.cache' / 'journal'
+JOURNAL_FORMAT = 1
+# Journals kept, oldest removed first
+JOURNAL_HISTORY = 20
+
+def _sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+def _read_bytes(path):
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+def _fsync_dir(directory):
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return  # not supported on this platform (Windows)
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def _umask_mode():
+    mask = os.umask(0)
+    os.umask(mask)
+    return 0o666 & ~mask
+
+def write_atomic(path, data, mode=None):
+    """Write bytes to path through an fsynced temp file and os.replace()"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, mode if mode is not None else _umask_mode())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    _fsync_dir(path.parent)
+
+class StagedFile:
+    __slots__ = ('path', 'tmp_path', 'before', 'after', 'original', 'mode')
+
+    def __init__(self, path, tmp_path, before, after, original, mode):
+        self.path = path
+        self.tmp_path = tmp_path
+        self.before = before
+        self.after = after
+        self.original = original
+        self.mode = mode
+
+class FileTransaction:
+    """Writes staged to temp files and committed together with a rollback journal"""
+
+    def __init__(self, tool, root=None, journal_dir=None):
+        self.tool = tool
+        self.root = Path(root).resolve() if root else OPENAPI_ROOT
+        self.journal_dir = Path(journal_dir) if journal_dir else JOURNAL_DIR
+        self.staged = {}
+        self.journal = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+        return False
+
+    def write(self, path, text, encoding='utf-8'):
+        """Stage text (or bytes) for path; replaces anything staged for it before"""
+        path = Path(path).resolve()
+        data = text if isinstance(text, bytes) else text.encode(encoding)
+        previous = self.staged.pop(path, None)
+        if previous is not None:
+            os.unlink(previous.tmp_path)
+            original = previous.original
+        else:
+            original = _read_bytes(path)
+        if original == data:
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        mode = os.stat(path).st_mode & 0o7777 if original is not None else _umask_mode()
+        self.staged[path] = StagedFile(path, tmp_path, _sha256(original) if original is not None else None,
+                                       _sha256(data), original, mode)
+
+    def _relpath(self, path):
+        try:
+            return path.relative_to(self.root).as_posix()
+        except ValueError:
+            return str(path)
+
+    def commit(self):
+        """Journal the originals, then rename every staged file into place; the journal path, or None"""
+        if not self.staged:
+            return None
+        now = time.time()
+        # Milliseconds keep ids of runs within the same second in order
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(now))
+        journal_id = f'{stamp}-{int(now * 1000) % 1000:03d}-{self.tool}'
+        self.journal = self.journal_dir / f'{journal_id}.json'
+        suffix = 1
+        while self.journal.exists():
+            suffix += 1
+            self.journal = self.journal_dir / f'{journal_id}-{suffix}.json'
+        entries = [{
+            'file': self._relpath(staged.path),
+            'before': staged.before,
+            'after': staged.after,
+            'mode': staged.mode,
+            'original': None if staged.original is None
+                        else base64.b64encode(zlib.compress(staged.original, 6)).decode('ascii'),
+        } for staged in sorted(self.staged.values(), key=lambda s: str(s.path))]
+        data = {'format': JOURNAL_FORMAT, 'id': self.journal.stem, 'tool': self.tool, 'root': str(self.root),
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()), 'state': 'pending',
+                'files': entries}
+        _write_journal(self.journal, data)
+
+        directories = set()
+        for staged in sorted(self.staged.values(), key=lambda s: str(s.path)):
+            os.chmod(staged.tmp_path, staged.mode)
+            os.replace(staged.tmp_path, staged.path)
+            directories.add(staged.path.parent)
+        for directory in directories:
+            _fsync_dir(directory)
+        self.staged = {}
+        data['state'] = 'committed'
+        _write_journal(self.journal, data)
+        prune_journals(self.journal_dir)
+        return self.journal
+
+    def abort(self):
+        """Remove every staged temp file; the targets stay untouched"""
+        for staged in self.staged.values():
+            try:
+                os.unlink(staged.tmp_path)
+            except FileNotFoundError:
+                pass
+        self.staged = {}
+
+    @property
+    def files(self):
+        return [self._relpath(path) for path in sorted(self.staged, key=str)]
+
+def _write_journal(path, data):
+    write_atomic(path, (json.dumps(data, separators=(',', ':')) + '\n').encode('utf-8'), mode=0o644)
+
+def list_journals(journal_dir=None):
+    """Journal files, newest first"""
+    directory = Path(journal_dir) if journal_dir else JOURNAL_DIR
+    return sorted(directory.glob('*.json'), key=lambda p: p.stem, reverse=True)
+
+def prune_journals(journal_dir=None, keep=JOURNAL_HISTORY):
+    for path in list_journals(journal_dir)[keep:]:
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+def load_journal(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if data.get('format') != JOURNAL_FORMAT:
+        raise ValueError(f'{path}: unsupported journal format {data.get("format")!r}')
+    return data
+
+def rollback(journal_path, force=False):
+    """Restore the files of a journal; returns (restored, skipped) relpaths
+
+    A file is skipped when it no longer holds the content the journal wrote
+    (edited since), unless force is set.
+    """
+    data = load_journal(journal_path)
+    if data['state'] == 'rolled-back':
+        raise ValueError(f'{data["id"]} was already rolled back')
+    root = Path(data['root'])
+    restored, skipped = [], []
+    for entry in data['files']:
+        path = root / entry['file']
+        current = _read_bytes(path)
+        current_hash = _sha256(current) if current is not None else None
+        if current_hash == entry['before']:
+            continue  # never written (interrupted commit) or already restored
+        if current_hash != entry['after'] and not force:
+            skipped.append(entry['file'])
+            continue
+        if entry['original'] is None:
+            if current is not None:
+                path.unlink()
+        else:
+            write_atomic(path, zlib.decompress(base64.b64decode(entry['original'])), mode=entry['mode'])
+        restored.append(entry['file'])
+    if not skipped:
+        data['state'] = 'rolled-back'
+        _write_journal(Path(journal_path), data)
+    return restored, skipped
+
+def main():
+    parser = argparse.ArgumentParser(description='List or roll back the file transactions of the fixers')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list', help='list the journaled runs, newest first')
+    undo = commands.add_parser('rollback', help='restore the files a run changed')
+    undo.add_argument('id', nargs='?', help='journal id (default: the last committed run)')
+    undo.add_argument('--force', action='store_true', help='also restore files edited since the run')
+    args = parser.parse_args()
+
+    journals = list_journals()
+    if args.command == 'list':
+        if not journals:
+            print('ℹ️ No journaled runs')
+        for path in journals:
+            try:
+                data = load_journal(path)
+            except (OSError, ValueError) as e:
+                print(f'❌ {path.name}: {e}')
+                continue
+            print(f"{data['id']:40} {data['state']:12} {len(data['files']):4} files")
+        return 0
+
+    if args.id:
+        path = JOURNAL_DIR / f'{args.id}.json'
+    else:
+        path = next((p for p in journals if load_journal(p)['state'] in ('committed', 'pending')), None)
+    if path is None or not path.exists():
+        print(f'❌ No journal to roll back{f" named {args.id}" if args.id else ""}', file=sys.stderr)
+        return 2
+    try:
+        restored, skipped = rollback(path, force=args.force)
+    except (OSError, ValueError) as e:
+        print(f'❌ {e}', file=sys.stderr)
+        return 2
+    for relpath in restored:
+        print(f'✅ Restored {relpath}')
+    for relpath in skipped:
+        print(f'⚠️  Skipped {relpath}: changed since the run (use --force to restore anyway)')
+    print(f'Rolled back {path.stem}: {len(restored)} restored, {len(skipped)} skipped')
+    return 1 if skipped else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Change notification for the spec tree
+InotifyWatcher talks to the Linux inotify API through ctypes (no extra
+dependency) and watches openapi.yaml plus every directory under paths/,
+schemas/ and components/, adding watches for directories created later.
+PollingWatcher compares (mtime, size) snapshots and works everywhere.
+open_watcher() picks inotify when the platform has it and falls back to
+polling otherwise.
+
+Both report sets of changed spec files (created, modified, moved or
+deleted). Events arriving within `settle` seconds of each other are
+merged, so an editor's write-to-temp-then-rename lands as one change.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+from pathlib import Path
+
+from spec_loader import OPENAPI_ROOT, iter_spec_files
+
+WATCHED_SECTIONS = ('paths', 'schemas', 'components')
+
+# <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct('iIII')
+
+def is_watched(file_path, root):
+    """True for openapi.yaml and *.yaml below the watched sections"""
+    try:
+        relpath = Path(file_path).relative_to(root).as_posix()
+    except ValueError:
+        return False
+    return relpath.endswith('.yaml') and (relpath == 'openapi.yaml' or relpath.split('/')[0] in WATCHED_SECTIONS)
+
+class PollingWatcher:
+    """Detects changes by comparing (mtime_ns, size) of every spec file"""
+
+    kind = 'polling'
+
+    def __init__(self, root=None, interval=0.5):
+        self.root = Path(root).resolve() if root else OPENAPI_ROOT
+        self.interval = interval
+        self._snapshot = self._take_snapshot()
+
+    def _take_snapshot(self):
+        snapshot = {}
+        for file_path in iter_spec_files(self.root):
+            try:
+                st = file_path.stat()
+            except OSError:
+                continue
+            snapshot[file_path.resolve()] = (st.st_mtime_ns, st.st_size)
+        return snapshot
+
+    def poll(self, timeout=None):
+        """Changed files, waiting up to timeout seconds (forever when None) for any"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            current = self._take_snapshot()
+            changed = {path for path in set(current) | set(self._snapshot)
+                       if current.get(path) != self._snapshot.get(path)}
+            self._snapshot = current
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            time.sleep(self.interval if deadline is None else max(0.0, min(self.interval, deadline - time.monotonic())))
+
+    def close(self):
+        pass
+
+class InotifyWatcher:
+    """Kernel change notification through inotify(7), via ctypes"""
+
+    kind = 'inotify'
+
+    def __init__(self, root=None, settle=0.03):
+        self.root = Path(root).resolve() if root else OPENAPI_ROOT
+        self.settle = settle
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self._dirs = {}
+        self._add_watch(self.root)
+        for section in WATCHED_SECTIONS:
+            if (self.root / section).is_dir():
+                self._add_tree(self.root / section)
+
+    def _add_watch(self, directory):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f'inotify_add_watch failed for {directory}')
+        self._dirs[wd] = Path(directory)
+
+    def _add_tree(self, directory):
+        """Watch directory and everything below it; returns the spec files already inside"""
+        found = []
+        self._add_watch(directory)
+        for entry in sorted(Path(directory).rglob('*')):
+            if entry.is_dir():
+                self._add_watch(entry)
+            elif is_watched(entry, self.root):
+                found.append(entry.resolve())
+        return found
+
+    def _read(self, timeout):
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self._fd, 65536)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            events.append((wd, mask, os.fsdecode(name)))
+        return events
+
+    def _collect(self, events, changed):
+        for wd, mask, name in events:
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped: report every file so the caller re-checks them all
+                changed.update(p.resolve() for p in iter_spec_files(self.root))
+                continue
+            directory = self._dirs.get(wd)
+            if mask & IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+            if directory is None or not name:
+                continue
+            path = directory / name
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and (directory != self.root or name in WATCHED_SECTIONS):
+                    changed.update(self._add_tree(path))
+                continue
+            if is_watched(path, self.root):
+                changed.add(path.resolve())
+
+    def poll(self, timeout=None):
+        """Changed files, waiting up to timeout seconds (forever when None) for any"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        changed = set()
+        while not changed:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            self._collect(self._read(remaining), changed)
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+        while changed:
+            events = self._read(self.settle)
+            if not events:
+                break
+            self._collect(events, changed)
+        return changed
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+def open_watcher(root=None, polling=False, interval=0.5):
+    """inotify watcher when available, polling watcher otherwise (or when polling is set)"""
+    if not polling:
+        try:
+            return InotifyWatcher(root)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(root, interval)
@@ -2,14 +2,19 @@
 """
 Fix all OpenAPI $ref paths to use relative paths instead of internal fragments.
 Converts: #/components/... -> ../../components/...
+
+The patterns are the ref-paths codemod (tools/codemods/ref-paths.yaml);
+each file is scanned once for all of them, and reported line numbers
+refer to the file before the fix. Files are written in one transaction
+(tools/file_transaction.py) instead of leaving .bak copies.
 """
 
-import os
-import re
 import sys
 from pathlib import Path
-from datetime import datetime
-import shutil
+
+from codemod import load_rule_set
+from file_transaction import FileTransaction
+from rewrite_engine import Rewriter
 
 def get_relative_path_to_components(file_path):
     """Calculate relative path from file to components directory."""
@@ -25,61 +30,33 @@ def get_relative_path_to_components(file_path):
     
     return '../' * (depth + 1)
 
-def fix_ref_in_file(file_path, dry_run=False):
-    """Fix all internal component references in a YAML file."""
+# The three component sections, matched in a single scan per file
+REWRITER = Rewriter([rule.rewrite_rule for rule in load_rule_set('ref-paths')])
+
+def fix_ref_in_file(file_path, dry_run=False, transaction=None):
+    """Fix all internal component references in a YAML file.
+
+    The fixed text is staged in transaction (committed by the caller), or
+    written on its own transaction when none is given.
+    """
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
             content = f.read()
     except Exception as e:
-        return None, str(e)
-
-    original_content = content
-    changes = []
+        return str(e), "Error"
 
-    # Pattern: $ref: '#/components/...
-    # Replace with relative path: $ref: '../../components/...
-    
-    patterns = [
-        # Parameters
-        (r"(\$ref:\s+['\"])#/components/parameters/([^'\"]+)(['\"])", 
-         lambda m, rel: f"{m.group(1)}{rel}components/parameters.yaml#{m.group(2)}{m.group(3)}"),
-        
-        # Responses
-        (r"(\$ref:\s+['\"])#/components/responses/([^'\"]+)(['\"])", 
-         lambda m, rel: f"{m.group(1)}{rel}components/responses.yaml#{m.group(2)}{m.group(3)}"),
-        
-        # Schemas
-        (r"(\$ref:\s+['\"])#/components/schemas/([^'\"]+)(['\"])", 
-         lambda m, rel: f"{m.group(1)}{rel}components/schemas.yaml#{m.group(2)}{m.group(3)}"),
-    ]
-
-    rel_path = get_relative_path_to_components(file_path)
-
-    for pattern, replacement in patterns:
-        matches = re.finditer(pattern, content)
-        for match in matches:
-            old_ref = match.group(0)
-            new_ref = replacement(match, rel_path)
-            content = content.replace(old_ref, new_ref, 1)
-            changes.append({
-                'old': old_ref,
-                'new': new_ref,
-                'line': content[:match.start()].count('\n') + 1
-            })
-
-    if content == original_content:
+    result = REWRITER.rewrite(content, {'root': get_relative_path_to_components(file_path), 'file': str(file_path)})
+    if not result.changed:
         return None, "No changes needed"
 
     if not dry_run:
-        # Backup original
-        backup_path = str(file_path) + '.bak'
-        shutil.copy2(file_path, backup_path)
-        
-        # Write fixed content
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(content)
+        if transaction is None:
+            with FileTransaction('fix-ref-paths') as single:
+                single.write(file_path, result.text)
+        else:
+            transaction.write(file_path, result.text)
     
-    return changes, "Success"
+    return [change.to_dict() for change in result.changes], "Success"
 
 def main():
     dry_run = '--dry-run' in sys.argv
@@ -107,28 +84,32 @@ def main():
     files_modified = 0
     files_error = 0
     
-    for yaml_file in sorted(yaml_files):
-        rel_path = yaml_file.relative_to(openapi_root)
-        changes, status = fix_ref_in_file(yaml_file, dry_run=dry_run)
+    # All files are written together once every file has been fixed
+    with FileTransaction('fix-ref-paths') as transaction:
+        for yaml_file in sorted(yaml_files):
+            rel_path = yaml_file.relative_to(openapi_root)
+            changes, status = fix_ref_in_file(yaml_file, dry_run=dry_run, transaction=transaction)
         
-        if changes is None:
-            if verbose:
-                print(f"[OK] {rel_path}: {status}")
-        elif isinstance(changes, str):
-            print(f"[ERROR] {rel_path}: {changes}")
-            files_error += 1
-        else:
-            print(f"[{'DRY' if dry_run else 'FIXED'}] {rel_path}")
-            print(f"   Changes: {len(changes)}")
+            if changes is None:
+                if verbose:
+                    print(f"[OK] {rel_path}: {status}")
+            elif isinstance(changes, str):
+                print(f"[ERROR] {rel_path}: {changes}")
+                files_error += 1
+            else:
+                print(f"[{'DRY' if dry_run else 'FIXED'}] {rel_path}")
+                print(f"   Changes: {len(changes)}")
             
-            if verbose and changes:
-                for change in changes[:3]:  # Show first 3
-                    print(f"   Line {change['line']}: {change['old'][:50]}...")
-                if len(changes) > 3:
-                    print(f"   ... and {len(changes) - 3} more")
+                if verbose and changes:
+                    for change in changes[:3]:  # Show first 3
+                        print(f"   Line {change['line']}: {change['old'][:50]}...")
+                    if len(changes) > 3:
+                        print(f"   ... and {len(changes) - 3} more")
             
-            total_changes += len(changes)
-            files_modified += 1
+                total_changes += len(changes)
+                files_modified += 1
+
+    journal = transaction.journal
 
     print(f"\n{'='*60}")
     print(f"Summary:")
@@ -136,6 +117,8 @@ def main():
     print(f"   Files modified: {files_modified}")
     print(f"   Total ref fixes: {total_changes}")
     print(f"   Errors: {files_error}")
+    if journal:
+        print(f"   Journal: {journal.stem} (undo: python tools/file_transaction.py rollback)")
     print(f"{'='*60}")
     
     if dry_run:
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Incremental validation scoped to what changed
+Runs the rule engine over the changed spec files plus every file whose
+$refs reach them (reverse dependents from the ref graph, see ref_graph.py)
+and merges the result with the cached findings of every other file, so the
+report always covers the whole tree while only the affected part is walked.
+
+The per-file findings are cached in openapi/.cache/validation/report.json
+keyed by content hash. Files whose content differs from the cached entry
+are re-validated even when not named, so the merged report never goes
+stale. Rules whose verdict needs the whole tree (scope = 'tree': route
+conflicts, duplicate operationIds, ...) re-run on every run over all
+documents - the unchanged ones come from the parse cache - and their
+findings are kept apart from the per-file ones, whatever file they name.
+
+A run fails on YAML syntax errors and on critical findings that were not
+there at the last full run (--strict: on any critical finding). Files are
+read from the working tree, not from the index. --verify also runs a full
+validation and fails when the merged report differs from it.
+
+Usage:
+    python tools/incremental_validate.py --staged        # pre-commit
+    python tools/incremental_validate.py paths/content-management/faq.yaml
+    python tools/incremental_validate.py                 # whatever changed since the last run
+    python tools/incremental_validate.py --all           # full run, resets the baseline
+    python tools/incremental_validate.py --all --profile # time each stage, see profiling.py
+    python tools/incremental_validate.py --verify        # incremental run, cross-checked against a full one
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+import rule_engine
+import schema_validator
+import validation_rules
+from profiling import Profiler, add_profile_argument, profiler_from_args
+from ref_graph import load_graph
+from ref_resolver import RefResolver
+from rule_engine import RuleEngine, finding_key, syntax_finding
+from spec_loader import OPENAPI_ROOT, add_jobs_argument, load_spec_tree
+from validation_rules import RefTargetRule, default_rules
+
+CACHE_FORMAT = 2
+REPORT_CACHE = OPENAPI_ROOT / '.cache' / 'validation' / 'report.json'
+SPEC_SECTIONS = ('paths', 'schemas', 'components')
+SEVERITY_MARKS = {'critical': '❌', 'warning': '⚠️ ', 'info': 'ℹ️ '}
+
+def incremental_rules():
+    """The default rule set plus reference target checks"""
+    return default_rules() + [RefTargetRule()]
+
+def rules_salt(rules):
+    """Cache salt: rule ids and the source of the rule modules and the schema validator"""
+    digest = hashlib.sha256(','.join(rule.id for rule in rules).encode('utf-8'))
+    for module in (rule_engine, schema_validator, validation_rules):
+        digest.update(Path(module.__file__).read_bytes())
+    return digest.hexdigest()[:16]
+
+def is_spec_file(relpath):
+    parts = relpath.split('/')
+    return relpath.endswith('.yaml') and (relpath == 'openapi.yaml' or parts[0] in SPEC_SECTIONS)
+
+def staged_files(root=None):
+    """Spec files in the git index that differ from HEAD, relative to root (deletions included)"""
+    root = Path(root) if root else OPENAPI_ROOT
+    result = subprocess.run(['git', 'diff', '--cached', '--name-only', '--relative', '--', '.'],
+                            cwd=root, capture_output=True, text=True, check=True)
+    return [line for line in result.stdout.splitlines() if is_spec_file(line)]
+
+class ReportCache:
+    """Per-file findings of the last runs, keyed by content hash"""
+
+    def __init__(self, path=None, salt=''):
+        self.path = Path(path) if path else REPORT_CACHE
+        self.salt = salt
+        self.files = {}
+        self.tree = []
+        self.tree_baseline = []
+
+    def load(self):
+        """Read the cached report; returns False when there is none usable"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if data.get('format') != CACHE_FORMAT or data.get('salt') != self.salt:
+            return False
+        self.files = data.get('files', {})
+        self.tree = data.get('tree', [])
+        self.tree_baseline = data.get('treeBaseline', [])
+        return True
+
+    def save(self):
+        """Write the report atomically (ignored on a read-only checkout)"""
+        data = {'format': CACHE_FORMAT, 'salt': self.salt, 'files': self.files, 'tree': self.tree,
+                'treeBaseline': self.tree_baseline}
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, separators=(',', ':'))
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
+
+class ValidationRun:
+    """Outcome of one (incremental or full) validation"""
+
+    def __init__(self, full, changed, affected, dependents, reused):
+        self.full = full
+        self.changed = changed
+        self.affected = affected
+        self.dependents = dependents
+        self.reused = reused
+        self.findings = {}
+        self.tree_findings = []
+        self.new_critical = []
+        self.syntax_errors = []
+        self.mismatch = None
+        self.elapsed_ms = 0.0
+
+    @property
+    def merged(self):
+        """Every finding of the tree: fresh ones for affected files, cached ones for the rest"""
+        return [f for relpath in sorted(self.findings) for f in self.findings[relpath]] + self.tree_findings
+
+    def counts(self):
+        counts = {'critical': 0, 'warning': 0, 'info': 0}
+        for finding in self.merged:
+            counts[finding['severity']] = counts.get(finding['severity'], 0) + 1
+        return counts
+
+    def to_dict(self):
+        data = {
+            'full': self.full,
+            'changed': self.changed,
+            'affected': self.affected,
+            'reused': len(self.reused),
+            'elapsedMs': round(self.elapsed_ms, 1),
+            'counts': self.counts(),
+            'newCritical': self.new_critical,
+            'findings': self.merged,
+        }
+        if self.mismatch is not None:
+            data['verify'] = self.mismatch
+        return data
+
+def validate(changed=(), full=False, root=None, jobs=1, cache_path=None, profiler=None):
+    """Validate the files affected by changed and merge the rest from the cached report
+
+    Runs everything when full is set or when no usable cache exists.
+    """
+    start = time.perf_counter()
+    profiler = profiler or Profiler('incremental-validate', enabled=False)
+    root = Path(root).resolve() if root else OPENAPI_ROOT
+    rules = incremental_rules()
+    cache = ReportCache(cache_path or root / REPORT_CACHE.relative_to(OPENAPI_ROOT), rules_salt(rules))
+    with profiler.span('cache'):
+        full = not cache.load() or full
+
+    with profiler.span('graph'):
+        graph = load_graph(root)
+    spec_files = set(graph.files)
+    changed = sorted(set(changed))
+    if full:
+        affected = spec_files
+        dependents = []
+    else:
+        stale = {relpath for relpath in spec_files
+                 if cache.files.get(relpath, {}).get('sha256') != graph.files[relpath]['sha256']}
+        seeds = set(changed) | stale | (set(cache.files) - spec_files)
+        dependents = [relpath for relpath in graph.dependent_files(seeds) if relpath not in seeds]
+        affected = (seeds | set(dependents)) & spec_files
+    affected = sorted(affected)
+    reused = sorted(spec_files - set(affected))
+
+    run = ValidationRun(full, changed, affected, dependents, reused)
+    with profiler.span('load'):
+        # Everything, for the tree-scoped rules; unchanged files come from the parse cache
+        tree = load_spec_tree(files=[root / relpath for relpath in sorted(spec_files)], jobs=jobs, root=root)
+    profiler.add_tree(tree)
+    # Per-file rules walk the affected files only, tree-scoped ones every document
+    file_engine = RuleEngine([rule for rule in rules if rule.scope != 'tree'], timed=profiler.enabled)
+    tree_engine = RuleEngine([rule for rule in rules if rule.scope == 'tree'], timed=profiler.enabled)
+    with profiler.span('rules'), profiler.measure(RefResolver, ('locate', 'resolve_pointer', 'resolve', 'check')):
+        findings = file_engine.run(tree, files=[root / relpath for relpath in affected])
+        tree_findings = [finding.to_dict() for finding in tree_engine.run(tree)]
+    profiler.add_engine(file_engine)
+    profiler.add_engine(tree_engine)
+    fresh = {relpath: [] for relpath in affected}
+    for finding in findings:
+        fresh[finding.file].append(finding.to_dict())
+    for file_path, error in tree.errors.items():
+        finding = syntax_finding(tree.relpath(file_path), error)
+        if finding['file'] in fresh:  # the others keep their cached syntax finding
+            fresh[finding['file']].insert(0, finding)
+            run.syntax_errors.append(finding)
+
+    for relpath in affected:
+        findings = fresh[relpath]
+        previous = cache.files.get(relpath)
+        if full:
+            baseline = sorted({finding_key(f) for f in findings if f['severity'] == 'critical'})
+        else:
+            baseline = previous['baseline'] if previous else []
+        cache.files[relpath] = {'sha256': graph.files[relpath]['sha256'], 'findings': findings,
+                                'baseline': baseline}
+    for relpath in [r for r in cache.files if r not in spec_files]:
+        del cache.files[relpath]
+    # Checked over the merged report, so a second attempt cannot slip past on the cache
+    for relpath, entry in sorted(cache.files.items()):
+        accepted = set(entry['baseline'])
+        run.new_critical.extend(f for f in entry['findings'] if f['severity'] == 'critical'
+                                and f['rule'] != 'yaml-syntax' and finding_key(f) not in accepted)
+    cache.tree = tree_findings
+    if full:
+        cache.tree_baseline = sorted({finding_key(f) for f in tree_findings if f['severity'] == 'critical'})
+    accepted = set(cache.tree_baseline)
+    run.new_critical.extend(f for f in tree_findings if f['severity'] == 'critical' and finding_key(f) not in accepted)
+    run.findings = {relpath: entry['findings'] for relpath, entry in cache.files.items()}
+    run.tree_findings = cache.tree
+    with profiler.span('write'):
+        cache.save()
+    run.elapsed_ms = (time.perf_counter() - start) * 1000
+    return run
+
+def verify(run, root=None, jobs=1):
+    """Compare the merged report of run with a full validation; sets and returns run.mismatch
+
+    The full run writes to a throwaway cache, so the baseline stays as it is.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        reference = validate(full=True, root=root, jobs=jobs, cache_path=Path(directory) / 'report.json')
+    expected = Counter(f"{f['file']}|{finding_key(f)}" for f in reference.merged)
+    actual = Counter(f"{f['file']}|{finding_key(f)}" for f in run.merged)
+    run.mismatch = {'missing': sorted((expected - actual).elements()), 'extra': sorted((actual - expected).elements())}
+    return run.mismatch
+
+def _relative(file_arg, root):
+    path = Path(file_arg)
+    path = path.resolve() if path.is_absolute() or path.exists() else (root / path).resolve()
+    try:
+        return path.relative_to(root).as_posix()
+    except ValueError:
+        return file_arg
+
+def main():
+    parser = argparse.ArgumentParser(description='Validate changed spec files and their $ref dependents')
+    parser.add_argument('files', nargs='*', help='changed spec files (default: whatever differs from the cache)')
+    parser.add_argument('--staged', action='store_true', help='take the changed files from git diff --cached')
+    parser.add_argument('--all', action='store_true', help='validate the whole tree and reset the baseline')
+    parser.add_argument('--strict', action='store_true', help='fail on any critical finding, not only new ones')
+    parser.add_argument('--json', action='store_true', help='print the merged report as JSON')
+    parser.add_argument('--verify', action='store_true', help='also run a full validation and fail when they differ')
+    add_jobs_argument(parser)
+    add_profile_argument(parser)
+    args = parser.parse_args()
+    profiler = profiler_from_args('incremental-validate', args)
+
+    changed = [_relative(f, OPENAPI_ROOT) for f in args.files]
+    if args.staged:
+        try:
+            changed.extend(staged_files())
+        except (OSError, subprocess.CalledProcessError) as e:
+            print(f'❌ Could not read staged files: {e}', file=sys.stderr)
+            return 2
+        if not changed and not args.all:
+            print('ℹ️ No spec files staged, nothing to validate')
+            return 0
+
+    run = validate(changed, full=args.all, jobs=args.jobs, profiler=profiler)
+    profiler.finish(args.profile)
+    if args.verify:
+        verify(run, jobs=args.jobs)
+    counts = run.counts()
+    failed = bool(run.syntax_errors or run.new_critical or (args.strict and counts['critical'])
+                  or (run.mismatch and (run.mismatch['missing'] or run.mismatch['extra'])))
+
+    if args.json:
+        print(json.dumps(run.to_dict(), indent=2))
+        return 1 if failed else 0
+
+    print('=' * 60)
+    print('FULL VALIDATION' if run.full else 'INCREMENTAL VALIDATION')
+    print('=' * 60)
+    if not run.full:
+        print(f'Changed:   {len(run.changed)} files')
+    print(f'Affected:  {len(run.affected)} files ({len(run.dependents)} $ref dependents)')
+    print(f'Reused:    {len(run.reused)} files from the cached report')
+    print(f'Time:      {run.elapsed_ms:.1f} ms')
+    print()
+
+    for relpath in run.affected:
+        findings = run.findings.get(relpath, [])
+        if not findings:
+            continue
+        print(relpath)
+        for finding in findings:
+            where = f':{finding["line"]}' if finding['line'] else (f'  #{finding["pointer"]}' if finding['pointer'] else '')
+            print(f'  {SEVERITY_MARKS.get(finding["severity"], "  ")} [{finding["rule"]}] {finding["message"]}{where}')
+    if run.full:
+        for finding in run.tree_findings:
+            print(f'{SEVERITY_MARKS.get(finding["severity"], "  ")} [{finding["rule"]}] {finding["message"]}')
+    print()
+    print(f'Merged report: {counts["critical"]} critical, {counts["warning"]} warnings, {counts["info"]} info '
+          f'across {len(run.affected) + len(run.reused)} files')
+
+    if run.syntax_errors:
+        print(f'❌ {len(run.syntax_errors)} file(s) with YAML syntax errors')
+    if run.new_critical:
+        print(f'❌ {len(run.new_critical)} new critical finding(s) since the last full run')
+        for finding in run.new_critical:
+            print(f'    {finding["file"]}: [{finding["rule"]}] {finding["message"]}')
+    elif args.strict and counts['critical']:
+        print(f'❌ {counts["critical"]} critical finding(s) (--strict)')
+    if run.mismatch is not None:
+        if run.mismatch['missing'] or run.mismatch['extra']:
+            print(f"❌ Merged report differs from a full run: {len(run.mismatch['missing'])} findings missing, "
+                  f"{len(run.mismatch['extra'])} extra")
+            for key in run.mismatch['missing']:
+                print(f'    - {key}')
+            for key in run.mismatch['extra']:
+                print(f'    + {key}')
+        else:
+            print('✅ Merged report matches a full run')
+    if not failed:
+        print('✅ No new critical findings')
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+JSON Pointer (RFC 6901) helpers shared by the ref tools
+"""
+
+import os
+from functools import lru_cache
+from pathlib import Path
+
+def escape_token(token):
+    """Escape one reference token: '~' -> '~0', '/' -> '~1'"""
+    return str(token).replace('~', '~0').replace('/', '~1')
+
+def unescape_token(token):
+    """Decode one reference token: '~1' -> '/', '~0' -> '~' (in that order)"""
+    return token.replace('~1', '/').replace('~0', '~')
+
+def join_pointer(pointer, *tokens):
+    """Append escaped tokens to a pointer"""
+    return pointer + ''.join('/' + escape_token(t) for t in tokens)
+
+def split_pointer(pointer):
+    """Decoded tokens of a pointer ('' is the whole document)"""
+    if not pointer:
+        return []
+    if not pointer.startswith('/'):
+        raise ValueError(f'JSON pointer must start with "/": {pointer!r}')
+    return [unescape_token(t) for t in pointer[1:].split('/')]
+
+def parent_pointers(pointer):
+    """Every proper ancestor of pointer, nearest first, ending with ''"""
+    while pointer:
+        pointer = pointer[:pointer.rfind('/')]
+        yield pointer
+
+def resolve_pointer(document, pointer):
+    """Value at pointer inside document; raises KeyError when it does not exist"""
+    node = document
+    for token in split_pointer(pointer):
+        if isinstance(node, dict):
+            if token not in node:
+                raise KeyError(f'"{token}" not found')
+            node = node[token]
+        elif isinstance(node, list):
+            if not token.isdigit() or int(token) >= len(node):
+                raise KeyError(f'index "{token}" out of range')
+            node = node[int(token)]
+        else:
+            raise KeyError(f'cannot descend into scalar at "{token}"')
+    return node
+
+@lru_cache(maxsize=16384)
+def _resolve_absolute(path):
+    return Path(path).resolve()
+
+def resolve_path(path):
+    """Path(path).resolve(), memoized for absolute paths
+
+    Resolving hits the filesystem for every path component; the ref tools
+    resolve the same few dozen files thousands of times per run.
+    """
+    path = os.fspath(path)
+    if os.path.isabs(path):
+        return _resolve_absolute(path)
+    return Path(path).resolve()
+
+def parse_ref(ref, base_file):
+    """Split a $ref into (absolute target file, fragment) relative to base_file
+
+    The fragment is returned as written (without '#'); callers decide how to
+    treat legacy fragments that do not start with '/'. Remote URLs return
+    (None, fragment).
+    """
+    if '#' in ref:
+        target, fragment = ref.split('#', 1)
+    else:
+        target, fragment = ref, ''
+    if '://' in target:
+        return None, fragment
+    if not target:
+        return resolve_path(base_file), fragment
+    return resolve_path(os.path.join(os.path.dirname(os.fspath(base_file)), target)), fragment
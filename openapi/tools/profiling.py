@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Shared --profile mode for the OpenAPI tools
+A Profiler records stage spans (load, resolve, rules, write, ...) and
+per-file timings of one run. At the end it prints a summary table to
+stderr (stdout stays clean for --format json), writes a Chrome trace-event
+file that chrome://tracing or https://ui.perfetto.dev opens, and appends
+the run to generated/performance-report.json under
+details.pythonProfiles, next to the metrics of performance-test.cjs.
+
+Trace lanes:
+    stages    spans opened with Profiler.span() or begin()/end()
+    rules     time per rule inside each file walk (RuleEngine(timed=True))
+    files     parse time per file (SpecTree.load_ms)
+    resolve   outermost calls of methods wrapped with Profiler.measure()
+
+Per-file rule and parse spans are laid out back to back inside their
+parent span; they carry "aggregated": true because their real calls are
+interleaved (or, with --jobs, run in other processes).
+
+A disabled Profiler (the default when --profile is not given) turns every
+method into a no-op, so the scripts call it unconditionally.
+
+Usage:
+    python tools/advanced-validate.py --profile
+    python tools/spec_bundler.py --profile /tmp/bundle.trace.json
+"""
+
+import functools
+import json
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from spec_loader import OPENAPI_ROOT
+
+PROFILE_DIR = OPENAPI_ROOT / '.cache' / 'profile'
+PERFORMANCE_REPORT = OPENAPI_ROOT / 'generated' / 'performance-report.json'
+# Entries kept in details.pythonProfiles, oldest dropped first
+REPORT_HISTORY = 50
+LANES = {'stages': 1, 'rules': 2, 'files': 3, 'resolve': 4}
+SLOWEST_FILES = 10
+
+class Profiler:
+    """Stage spans and file timings of one tool run"""
+
+    def __init__(self, tool, enabled=True):
+        self.tool = tool
+        self.enabled = enabled
+        self.origin = time.perf_counter()
+        self.started_at = time.time()
+        self.events = []
+        # Milliseconds per stage name, summed over every span of that name
+        self.stages = {}
+        # {relpath: {'parse': ms, 'walk': ms}}
+        self.files = {}
+        self._open = {}
+
+    def _event(self, name, cat, start, end, lane, args=None):
+        event = {
+            'name': name, 'cat': cat, 'ph': 'X', 'pid': os.getpid(), 'tid': LANES[lane],
+            'ts': round((start - self.origin) * 1e6, 1), 'dur': round((end - start) * 1e6, 1),
+        }
+        if args:
+            event['args'] = args
+        self.events.append(event)
+
+    def _add_stage(self, name, ms):
+        self.stages[name] = self.stages.get(name, 0.0) + ms
+
+    def begin(self, name):
+        """Open stage name; for stages that do not fit a with-block"""
+        if self.enabled:
+            self._open[name] = time.perf_counter()
+
+    def end(self, name, **args):
+        """Close stage name opened with begin()"""
+        if not self.enabled or name not in self._open:
+            return
+        start = self._open.pop(name)
+        end = time.perf_counter()
+        self._event(name, 'stage', start, end, 'stages', args)
+        self._add_stage(name, (end - start) * 1000)
+
+    @contextmanager
+    def span(self, name, **args):
+        """Time the enclosed block as stage name"""
+        self.begin(name)
+        try:
+            yield
+        finally:
+            self.end(name, **args)
+
+    @contextmanager
+    def measure(self, cls, methods, stage='resolve'):
+        """Time the outermost calls of cls.methods (patched on the class) as stage
+
+        Nested and recursive calls count once, so the stage total is the wall
+        time spent inside any of the methods.
+        """
+        if not self.enabled:
+            yield
+            return
+        originals = {name: cls.__dict__[name] for name in methods}
+        depth = [0]
+        total = [0.0]
+
+        def wrap(name, method):
+            @functools.wraps(method)
+            def timed(*args, **kwargs):
+                if depth[0]:
+                    return method(*args, **kwargs)
+                depth[0] += 1
+                start = time.perf_counter()
+                try:
+                    return method(*args, **kwargs)
+                finally:
+                    end = time.perf_counter()
+                    depth[0] -= 1
+                    total[0] += end - start
+                    self._event(name, stage, start, end, 'resolve')
+            return timed
+
+        for name, method in originals.items():
+            setattr(cls, name, wrap(name, method))
+        try:
+            yield
+        finally:
+            for name, method in originals.items():
+                setattr(cls, name, method)
+            self._add_stage(stage, total[0] * 1000)
+
+    def add_tree(self, spec):
+        """Per-file parse times of a loaded SpecTree, laid out inside the last 'load' span"""
+        if not self.enabled:
+            return
+        start = self._last_span_start('load')
+        for file_path in spec.files():
+            ms = spec.load_ms.get(file_path)
+            if ms is None:
+                continue
+            relpath = spec.relpath(file_path)
+            self.files.setdefault(relpath, {})['parse'] = ms
+            self._event(relpath, 'parse', start, start + ms / 1000, 'files', {'aggregated': True})
+            start += ms / 1000
+
+    def add_engine(self, engine):
+        """Rule and walk timings of a RuleEngine created with timed=True"""
+        if not self.enabled:
+            return
+        for rule_id, ms in engine.timings['rules'].items():
+            self._add_stage(f'rule:{rule_id}', ms)
+        for relpath, start, end in engine.timings['walks']:
+            self.files.setdefault(relpath, {})['walk'] = (end - start) * 1000
+            offset = start
+            for rule_id, ms in engine.timings['file_rules'].get(relpath, {}).items():
+                self._event(rule_id, 'rule', offset, offset + ms / 1000, 'rules',
+                            {'file': relpath, 'aggregated': True})
+                offset += ms / 1000
+
+    def _last_span_start(self, name):
+        for event in reversed(self.events):
+            if event['name'] == name and event['cat'] == 'stage':
+                return self.origin + event['ts'] / 1e6
+        return self.origin
+
+    @property
+    def total_ms(self):
+        return (time.perf_counter() - self.origin) * 1000
+
+    def slowest_files(self, limit=SLOWEST_FILES):
+        rows = [{'file': relpath, 'parseMs': round(t.get('parse', 0.0), 3), 'walkMs': round(t.get('walk', 0.0), 3)}
+                for relpath, t in self.files.items()]
+        rows.sort(key=lambda row: -(row['parseMs'] + row['walkMs']))
+        return rows[:limit]
+
+    def to_dict(self, trace=None):
+        return {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(self.started_at)),
+            'tool': self.tool,
+            'argv': sys.argv[1:],
+            'totalMs': round(self.total_ms, 3),
+            'stages': {name: round(ms, 3) for name, ms in self.stages.items()},
+            'files': len(self.files),
+            'slowestFiles': self.slowest_files(),
+            'trace': _display_path(trace) if trace else None,
+        }
+
+    def print_summary(self, stream=None):
+        stream = stream or sys.stderr
+        total = self.total_ms
+        print('=' * 60, file=stream)
+        print(f'PROFILE: {self.tool} ({total:.1f} ms)', file=stream)
+        print('=' * 60, file=stream)
+        print(f'{"Stage":36} {"ms":>10} {"%":>6}', file=stream)
+        for name, ms in self.stages.items():
+            print(f'{name[:36]:36} {ms:10.1f} {ms / total * 100 if total else 0.0:6.1f}', file=stream)
+        if 'resolve' in self.stages and any(name.startswith('rule:') for name in self.stages):
+            print('(resolve time is also part of the rules that resolve $refs)', file=stream)
+        rows = self.slowest_files()
+        if rows:
+            print(file=stream)
+            print(f'{"Slowest files":44} {"parse ms":>8} {"walk ms":>8}', file=stream)
+            for row in rows:
+                print(f'{row["file"][-44:]:44} {row["parseMs"]:8.1f} {row["walkMs"]:8.1f}', file=stream)
+
+    def write_trace(self, path):
+        """Write the Chrome trace-event JSON"""
+        pid = os.getpid()
+        metadata = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'args': {'name': self.tool}}]
+        metadata.extend({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': lane}}
+                        for lane, tid in LANES.items())
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': metadata + self.events, 'displayTimeUnit': 'ms'}, f)
+
+    def append_report(self, trace=None, path=None):
+        """Append this run to details.pythonProfiles of performance-report.json (atomically)"""
+        path = Path(path) if path else PERFORMANCE_REPORT
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                report = json.load(f)
+        except (OSError, ValueError):
+            report = {}
+        if not isinstance(report, dict):
+            report = {}
+        report.setdefault('timestamp', time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()))
+        report.setdefault('summary', {})
+        details = report.setdefault('details', {})
+        profiles = details.get('pythonProfiles')
+        profiles = profiles if isinstance(profiles, list) else []
+        profiles.append(self.to_dict(trace))
+        details['pythonProfiles'] = profiles[-REPORT_HISTORY:]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def finish(self, trace=None):
+        """Print the summary, write the trace and append to the performance report"""
+        if not self.enabled:
+            return
+        trace = Path(trace) if trace else PROFILE_DIR / f'{self.tool}.trace.json'
+        self.write_trace(trace)
+        self.append_report(trace)
+        self.print_summary()
+        print(f'Trace:  {_display_path(trace)}', file=sys.stderr)
+        print(f'Report: {_display_path(PERFORMANCE_REPORT)}', file=sys.stderr)
+
+def _display_path(path):
+    """path relative to the openapi/ directory when it lies inside it"""
+    path = Path(path).resolve()
+    try:
+        return path.relative_to(OPENAPI_ROOT).as_posix()
+    except ValueError:
+        return str(path)
+
+def add_profile_argument(parser):
+    """Register the shared --profile [TRACE] option on an argparse parser"""
+    parser.add_argument('--profile', nargs='?', const='', default=None, metavar='TRACE',
+                        help='time every stage, print a summary, write a Chrome trace '
+                             '(default: .cache/profile/<tool>.trace.json) and append to '
+                             'generated/performance-report.json')
+
+def profiler_from_args(tool, args):
+    """Profiler for tool, enabled when --profile was given"""
+    return Profiler(tool, enabled=args.profile is not None)
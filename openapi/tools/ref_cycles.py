@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Circular $ref detection over the reference graph
+Nodes are referenced fragments (file#pointer); a fragment has an edge to
+every target referenced from inside it, whether through allOf, nested
+properties, items or another file. One iterative Tarjan pass finds all
+strongly connected components in O(V+E); every component with more than
+one member, or a fragment that references itself, is a cycle.
+
+Recursive schemas that are meant to be recursive (trees, threaded
+comments) go in ALLOWED_RECURSION or are passed with --allow.
+
+Usage:
+    python tools/ref_cycles.py
+    python tools/ref_cycles.py --allow 'components/schemas.yaml#/MenuItem'
+    python tools/ref_cycles.py --json
+"""
+
+import argparse
+import json
+import sys
+from collections import defaultdict
+
+from json_pointer import parent_pointers
+from ref_graph import load_graph
+
+# Fragments (file#pointer or bare component name) that may recurse on purpose
+ALLOWED_RECURSION = (
+    'schemas/content-management/language.yaml#/TranslationCategory',  # parent/children tree
+    'schemas/content-management/products.yaml#/ProductCategory',      # parent/children tree
+    'schemas/content-management/products.yaml#/CategoryFilter',       # nested filter facets
+)
+
+def fragment_edges(graph):
+    """Adjacency {(file, pointer): {(file, pointer): [RefEdge]}} between referenced fragments"""
+    adjacency = defaultdict(lambda: defaultdict(list))
+    for source_file, edges in graph.forward.items():
+        nodes = graph.reverse.get(source_file)
+        if not nodes:
+            continue
+        for edge in edges:
+            for container in (edge.source_pointer, *parent_pointers(edge.source_pointer)):
+                if container in nodes:
+                    target = (edge.target_file, edge.target_pointer)
+                    adjacency[(source_file, container)][target].append(edge)
+    return adjacency
+
+def strongly_connected(adjacency):
+    """Tarjan's algorithm without recursion; yields each SCC as a list of nodes"""
+    index = {}
+    lowlink = {}
+    on_stack = set()
+    stack = []
+    counter = 0
+    for root in sorted(adjacency):
+        if root in index:
+            continue
+        work = [(root, iter(sorted(adjacency.get(root, ()))))]
+        index[root] = lowlink[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        while work:
+            node, children = work[-1]
+            for child in children:
+                if child not in index:
+                    index[child] = lowlink[child] = counter
+                    counter += 1
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(sorted(adjacency.get(child, ())))))
+                    break
+                if child in on_stack:
+                    lowlink[node] = min(lowlink[node], index[child])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    yield sorted(component)
+
+class RefCycle:
+    """One strongly connected set of fragments and the refs that tie it together"""
+
+    def __init__(self, members, edges, allowed=False):
+        self.members = members
+        self.edges = edges
+        self.allowed = allowed
+
+    @property
+    def targets(self):
+        return [f'{file}#{pointer}' for file, pointer in self.members]
+
+    def to_dict(self):
+        return {
+            'members': self.targets,
+            'allowed': self.allowed,
+            'refs': [{'site': e.location(), 'pointer': e.source_pointer, 'ref': e.ref} for e in self.edges],
+        }
+
+def _is_allowed(members, allowlist):
+    for file, pointer in members:
+        name = pointer.rsplit('/', 1)[-1]
+        if f'{file}#{pointer}' in allowlist or name in allowlist:
+            return True
+    return False
+
+def find_cycles(graph, allow=()):
+    """Every $ref cycle in graph, each marked allowed when a member is allowlisted"""
+    allowlist = set(ALLOWED_RECURSION) | set(allow)
+    adjacency = fragment_edges(graph)
+    cycles = []
+    for component in strongly_connected(adjacency):
+        members = set(component)
+        if len(component) == 1 and component[0] not in adjacency[component[0]]:
+            continue
+        edges = [edge for node in component for target, refs in sorted(adjacency[node].items())
+                 if target in members for edge in refs]
+        cycles.append(RefCycle(component, edges, _is_allowed(component, allowlist)))
+    return cycles
+
+def main():
+    parser = argparse.ArgumentParser(description='Report circular $ref chains')
+    parser.add_argument('--allow', action='append', default=[], metavar='TARGET',
+                        help="intentionally recursive fragment ('file#/pointer' or component name)")
+    parser.add_argument('--json', action='store_true', help='print cycles as JSON')
+    args = parser.parse_args()
+
+    graph = load_graph()
+    cycles = find_cycles(graph, args.allow)
+    blocking = [c for c in cycles if not c.allowed]
+
+    if args.json:
+        print(json.dumps([c.to_dict() for c in cycles], indent=2))
+        return 1 if blocking else 0
+
+    print('=' * 60)
+    print('$REF CYCLE CHECK')
+    print('=' * 60)
+    nodes = len({(e.target_file, e.target_pointer) for e in graph.edges})
+    print(f'Fragments: {nodes}   References: {sum(len(e) for e in graph.forward.values())}')
+    print()
+    if not cycles:
+        print('✅ No circular references')
+        return 0
+    for cycle in cycles:
+        mark = '⚪ ALLOWED' if cycle.allowed else '❌ CYCLE'
+        print(f'{mark} ({len(cycle.members)} fragments)')
+        for target in cycle.targets:
+            print(f'    {target}')
+        for edge in cycle.edges:
+            print(f'      {edge.location()}  {edge.ref}')
+        print()
+    print(f'Cycles: {len(cycles)}   Allowed: {len(cycles) - len(blocking)}   Blocking: {len(blocking)}')
+    return 1 if blocking else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+Persistent $ref graph of the OpenAPI tree
+Every $ref found by the event scanner (see ref_scanner.py) becomes an edge
+from its site (file, pointer, line) to its target (file, pointer). The graph
+keeps forward adjacency per source file and reverse adjacency per target
+file and fragment, so "who references X" and "what breaks if I delete X"
+are dictionary lookups instead of a grep over the tree.
+
+The edges are persisted in openapi/.cache/ref-graph.json together with the
+size, mtime and content hash of each file. update() rescans only files whose
+content changed and drops files that were deleted.
+
+Usage:
+    python tools/ref_graph.py                                      # refresh + summary
+    python tools/ref_graph.py --who 'components/schemas.yaml#/BaseResponse'
+    python tools/ref_graph.py --impact FAQPageData                 # transitive
+    python tools/ref_graph.py --uses paths/content-management/faq.yaml
+    python tools/ref_graph.py --rebuild --json ...
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from json_pointer import parent_pointers, parse_ref, resolve_path, split_pointer
+from ref_scanner import scan_file
+from spec_loader import OPENAPI_ROOT, iter_spec_files
+
+GRAPH_FORMAT = 1
+GRAPH_FILE = OPENAPI_ROOT / '.cache' / 'ref-graph.json'
+
+class RefEdge:
+    """One $ref: site (source_file, source_pointer, line, column) -> target"""
+
+    __slots__ = ('source_file', 'source_pointer', 'line', 'column', 'ref', 'target_file', 'target_pointer')
+
+    def __init__(self, source_file, source_pointer, line, column, ref, target_file, target_pointer):
+        self.source_file = source_file
+        self.source_pointer = source_pointer
+        self.line = line
+        self.column = column
+        self.ref = ref
+        self.target_file = target_file
+        self.target_pointer = target_pointer
+
+    @property
+    def target(self):
+        return f'{self.target_file}#{self.target_pointer}'
+
+    def location(self):
+        return f'{self.source_file}:{self.line}:{self.column}'
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return f'RefEdge({self.location()} {self.source_pointer} -> {self.target})'
+
+def normalize_fragment(fragment):
+    """Pointer form of a fragment; legacy '#Name' fragments map to '/Name'"""
+    if fragment and not fragment.startswith('/'):
+        return '/' + fragment
+    return fragment
+
+def _file_digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+class RefGraph:
+    """Forward and reverse $ref adjacency over the spec tree"""
+
+    def __init__(self, root=None, index_path=None):
+        self.root = Path(root).resolve() if root else OPENAPI_ROOT
+        self.index_path = Path(index_path) if index_path else (
+            GRAPH_FILE if self.root == OPENAPI_ROOT else self.root / '.cache' / 'ref-graph.json')
+        self.files = {}
+        self.forward = {}
+        self.reverse = defaultdict(lambda: defaultdict(list))
+        self.rescanned = []
+        self.removed = []
+
+    def relpath(self, file_path):
+        try:
+            return resolve_path(file_path).relative_to(self.root).as_posix()
+        except ValueError:
+            return str(file_path)
+
+    # -- persistence ---------------------------------------------------
+
+    def load(self):
+        """Read the persisted index; returns False when there is none usable"""
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if data.get('format') != GRAPH_FORMAT:
+            return False
+        self.files = data.get('files', {})
+        self.forward = {
+            source: [RefEdge(source, *edge) for edge in edges]
+            for source, edges in data.get('edges', {}).items()
+        }
+        self._rebuild_reverse()
+        return True
+
+    def save(self):
+        """Write the index atomically (ignored on a read-only checkout)"""
+        data = {
+            'format': GRAPH_FORMAT,
+            'files': self.files,
+            'edges': {
+                source: [[e.source_pointer, e.line, e.column, e.ref, e.target_file, e.target_pointer] for e in edges]
+                for source, edges in sorted(self.forward.items())
+            },
+        }
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.index_path.parent, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, separators=(',', ':'))
+            os.replace(tmp_path, self.index_path)
+        except OSError:
+            pass
+
+    # -- building ------------------------------------------------------
+
+    def _scan(self, file_path):
+        source = self.relpath(file_path)
+        edges = []
+        for site in scan_file(file_path, self.root):
+            target, fragment = parse_ref(site.ref, file_path)
+            if target is None:
+                continue  # remote reference, out of scope
+            edges.append(RefEdge(source, site.pointer, site.line, site.column, site.ref,
+                                 self.relpath(target), normalize_fragment(fragment)))
+        return edges
+
+    def update(self, files=None):
+        """Rescan changed files; returns the relative paths that were rescanned
+
+        files defaults to every spec file; when given, only those files are
+        checked and nothing is considered deleted unless it no longer exists.
+        """
+        full = files is None
+        paths = list(iter_spec_files(self.root)) if full else [Path(f).resolve() for f in files]
+        seen = set()
+        self.rescanned = []
+        self.removed = []
+        for file_path in paths:
+            source = self.relpath(file_path)
+            seen.add(source)
+            try:
+                st = file_path.stat()
+            except OSError:
+                self._drop(source)
+                continue
+            meta = self.files.get(source)
+            if meta and meta['mtime_ns'] == st.st_mtime_ns and meta['size'] == st.st_size:
+                continue
+            with open(file_path, 'rb') as f:
+                digest = _file_digest(f.read())
+            if meta and meta['sha256'] == digest:
+                meta['mtime_ns'] = st.st_mtime_ns
+                continue
+            try:
+                edges = self._scan(file_path)
+            except Exception:
+                edges = []  # unparsable file: keep it out of the graph until fixed
+            self.files[source] = {'mtime_ns': st.st_mtime_ns, 'size': st.st_size, 'sha256': digest}
+            self._unindex(source)
+            self.forward[source] = edges
+            self._index(edges)
+            self.rescanned.append(source)
+        if full:
+            for source in [s for s in self.files if s not in seen]:
+                self._drop(source)
+        return self.rescanned
+
+    def _drop(self, source):
+        if source in self.files:
+            del self.files[source]
+            self._unindex(source)
+            self.forward.pop(source, None)
+            self.removed.append(source)
+
+    def _index(self, edges):
+        for edge in edges:
+            self.reverse[edge.target_file][edge.target_pointer].append(edge)
+
+    def _unindex(self, source):
+        """Remove the edges of one source file from the reverse adjacency"""
+        for target_file, target_pointer in {(e.target_file, e.target_pointer) for e in self.forward.get(source, ())}:
+            targets = self.reverse.get(target_file)
+            if targets is None or target_pointer not in targets:
+                continue
+            remaining = [e for e in targets[target_pointer] if e.source_file != source]
+            if remaining:
+                targets[target_pointer] = remaining
+            else:
+                del targets[target_pointer]
+                if not targets:
+                    del self.reverse[target_file]
+
+    def _rebuild_reverse(self):
+        self.reverse = defaultdict(lambda: defaultdict(list))
+        for edges in self.forward.values():
+            self._index(edges)
+
+    # -- queries -------------------------------------------------------
+
+    @property
+    def edges(self):
+        for source in sorted(self.forward):
+            yield from self.forward[source]
+
+    def references(self, file, pointer=''):
+        """Edges leaving file (optionally only those inside pointer)"""
+        edges = self.forward.get(file, [])
+        if not pointer:
+            return list(edges)
+        return [e for e in edges if e.source_pointer == pointer or e.source_pointer.startswith(pointer + '/')]
+
+    def referrers(self, file, pointer='', descendants=True):
+        """Edges pointing at file#pointer (and, by default, at anything inside it)"""
+        targets = self.reverse.get(file, {})
+        if not descendants:
+            return list(targets.get(pointer, []))
+        result = []
+        for target_pointer, edges in targets.items():
+            if not pointer or target_pointer == pointer or target_pointer.startswith(pointer + '/'):
+                result.extend(edges)
+        return result
+
+    def impact(self, file, pointer=''):
+        """Every edge that directly or transitively depends on file#pointer
+
+        An edge at F#P depends on X when it references X, or when a fragment
+        of F that contains P is itself referenced by an edge depending on X.
+        Returns (edge, depth) pairs in breadth-first order.
+        """
+        result = []
+        seen = set()
+        frontier = self.referrers(file, pointer)
+        depth = 1
+        while frontier:
+            next_frontier = []
+            for edge in frontier:
+                key = (edge.source_file, edge.source_pointer, edge.line, edge.column)
+                if key in seen:
+                    continue
+                seen.add(key)
+                result.append((edge, depth))
+                targets = self.reverse.get(edge.source_file, {})
+                for container in (edge.source_pointer, *parent_pointers(edge.source_pointer)):
+                    next_frontier.extend(targets.get(container, []))
+            frontier = next_frontier
+            depth += 1
+        return result
+
+    def dependent_files(self, files, transitive=True):
+        """Files whose refs reach any of files (not including files themselves)"""
+        pending = [self.relpath(f) if Path(f).is_absolute() else f for f in files]
+        start = set(pending)
+        found = set()
+        while pending:
+            target = pending.pop()
+            for edges in self.reverse.get(target, {}).values():
+                for edge in edges:
+                    if edge.source_file not in found and edge.source_file not in start:
+                        found.add(edge.source_file)
+                        if transitive:
+                            pending.append(edge.source_file)
+        return sorted(found)
+
+    def find_targets(self, name):
+        """(file, pointer) of every referenced fragment whose last token is name"""
+        matches = []
+        for file, targets in self.reverse.items():
+            for pointer in targets:
+                tokens = split_pointer(pointer) if pointer.startswith('/') else []
+                if tokens and tokens[-1] == name:
+                    matches.append((file, pointer))
+        return sorted(matches)
+
+    def resolve_query(self, query):
+        """Turn 'file#pointer', 'file' or a bare component name into (file, pointer) targets"""
+        if '#' in query:
+            file, fragment = query.split('#', 1)
+            return [(file, normalize_fragment(fragment))]
+        if query.endswith(('.yaml', '.yml')):
+            return [(query, '')]
+        return self.find_targets(query)
+
+def load_graph(root=None, update=True, rebuild=False):
+    """RefGraph from the persisted index, refreshed against the working tree"""
+    graph = RefGraph(root)
+    if not rebuild:
+        graph.load()
+    if update:
+        graph.update()
+        if graph.rescanned or graph.removed:
+            graph.save()
+    return graph
+
+def _print_edges(title, edges_with_depth):
+    print(title)
+    if not edges_with_depth:
+        print('  (none)')
+    for edge, depth in edges_with_depth:
+        indent = '  ' * depth
+        print(f'{indent}{edge.location():60} {edge.source_pointer}  ->  {edge.target}')
+
+def main():
+    parser = argparse.ArgumentParser(description='Query the persisted $ref graph')
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--who', metavar='TARGET', help="direct referrers of 'file#/pointer', a file or a component name")
+    group.add_argument('--impact', metavar='TARGET', help='everything that transitively depends on TARGET')
+    group.add_argument('--uses', metavar='FILE', help='references made by FILE')
+    parser.add_argument('--rebuild', action='store_true', help='ignore the persisted index and rescan everything')
+    parser.add_argument('--json', action='store_true', help='print the result as JSON')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    graph = load_graph(rebuild=args.rebuild)
+    load_ms = (time.perf_counter() - start) * 1000
+
+    if args.uses:
+        result = [(edge, 1) for edge in graph.references(args.uses)]
+        title = f'References made by {args.uses}:'
+    elif args.who or args.impact:
+        query = args.who or args.impact
+        targets = graph.resolve_query(query)
+        result = []
+        for file, pointer in targets:
+            if args.who:
+                result.extend((edge, 1) for edge in graph.referrers(file, pointer))
+            else:
+                result.extend(graph.impact(file, pointer))
+        title = f"{'Referrers of' if args.who else 'Impact of changing'} {query} ({len(targets)} target(s)):"
+    else:
+        result = None
+
+    if args.json:
+        if result is None:
+            print(json.dumps({'files': len(graph.files), 'edges': sum(len(e) for e in graph.forward.values()),
+                              'rescanned': graph.rescanned, 'removed': graph.removed}, indent=2))
+        else:
+            print(json.dumps([dict(edge.to_dict(), depth=depth) for edge, depth in result], indent=2))
+        return 0
+
+    if result is not None:
+        _print_edges(title, result)
+        print()
+        print(f'{len(result)} edges in {len({e.source_file for e, _ in result})} files '
+              f'(graph ready in {load_ms:.1f} ms)')
+        return 0
+
+    print('=' * 60)
+    print('REFERENCE GRAPH')
+    print('=' * 60)
+    print(f'Index:            {graph.relpath(graph.index_path)}')
+    print(f'Files:            {len(graph.files)}')
+    print(f'Edges:            {sum(len(e) for e in graph.forward.values())}')
+    print(f'Targets:          {sum(len(t) for t in graph.reverse.values())} fragments in {len(graph.reverse)} files')
+    print(f'Rescanned:        {len(graph.rescanned)} files')
+    print(f'Removed:          {len(graph.removed)} files')
+    print(f'Ready in:         {load_ms:.1f} ms')
+
+    most = sorted(((len(edges), f'{file}#{pointer}') for file, targets in graph.reverse.items()
+                   for pointer, edges in targets.items()), reverse=True)[:10]
+    if most:
+        print('\nMOST REFERENCED:')
+        for count, target in most:
+            print(f'  {count:5}  {target}')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+JSON-Pointer $ref resolver for the multi-file OpenAPI tree
+Resolves 'file.yaml#/a/b~1c' style references relative to the referring
+file, decoding ~1/~0 and descending through nested mappings and sequences.
+Each target file is parsed once and every (file, fragment) lookup is
+memoized, so checking thousands of refs costs about one parse per file.
+"""
+
+from pathlib import Path
+
+from json_pointer import parse_ref, resolve_path, resolve_pointer
+from spec_loader import OPENAPI_ROOT, load_yaml
+
+class ResolveError(Exception):
+    """A $ref that does not point at an existing node"""
+
+class RefResolver:
+    """Memoizing resolver shared by the validators"""
+
+    def __init__(self, root=None):
+        self.root = Path(root).resolve() if root else OPENAPI_ROOT
+        self._documents = {}
+        self._fragments = {}
+        self._relpaths = {}
+        self.parses = 0
+
+    def relpath(self, file_path):
+        relpath = self._relpaths.get(file_path)
+        if relpath is None:
+            try:
+                relpath = Path(file_path).relative_to(self.root).as_posix()
+            except ValueError:
+                relpath = str(file_path)
+            self._relpaths[file_path] = relpath
+        return relpath
+
+    def add_document(self, file_path, document):
+        """Seed the resolver with a document that is already loaded"""
+        self._documents[resolve_path(file_path)] = (document, None)
+
+    def forget(self, file_path):
+        """Drop the document and memoized fragments of file_path after it changed"""
+        file_path = resolve_path(file_path)
+        self._documents.pop(file_path, None)
+        self._fragments = {key: value for key, value in self._fragments.items() if key[0] != file_path}
+
+    def document(self, file_path):
+        """Parsed document for file_path (parsed once; load errors are re-raised)"""
+        file_path = resolve_path(file_path)
+        if file_path not in self._documents:
+            try:
+                self._documents[file_path] = (load_yaml(file_path), None)
+            except Exception as e:
+                self._documents[file_path] = (None, e)
+            self.parses += 1
+        document, error = self._documents[file_path]
+        if error is not None:
+            raise error
+        return document
+
+    def locate(self, ref, base_file):
+        """(target file, JSON pointer) for ref, without resolving it"""
+        target, fragment = parse_ref(ref, base_file)
+        if target is None:
+            raise ResolveError(f'Remote reference not supported: {ref}')
+        if fragment and not fragment.startswith('/'):
+            raise ResolveError(f"Fragment '#{fragment}' is not a JSON pointer (expected '#/{fragment}')")
+        return target, fragment
+
+    def resolve_pointer(self, file_path, pointer):
+        """Node at file_path#pointer (memoized)"""
+        key = (resolve_path(file_path), pointer)
+        if key not in self._fragments:
+            file_path = key[0]
+            if not file_path.exists():
+                result = ResolveError(f'File not found: {self.relpath(file_path)}')
+            else:
+                try:
+                    document = self.document(file_path)
+                    result = resolve_pointer(document, pointer)
+                except (KeyError, ValueError) as e:
+                    result = ResolveError(f"Fragment '{pointer}' not found in {self.relpath(file_path)} ({e.args[0]})")
+                except Exception as e:
+                    result = ResolveError(f'Cannot load {self.relpath(file_path)}: {str(e)[:80]}')
+            self._fragments[key] = result
+        result = self._fragments[key]
+        if isinstance(result, ResolveError):
+            raise result
+        return result
+
+    def resolve(self, ref, base_file, follow=False):
+        """Resolve ref from base_file to (target file, pointer, node)
+
+        With follow=True, a target that is itself a {$ref: ...} mapping is
+        followed until a concrete node is reached.
+        """
+        target, pointer = self.locate(ref, base_file)
+        node = self.resolve_pointer(target, pointer)
+        seen = {(target, pointer)}
+        while follow and isinstance(node, dict) and isinstance(node.get('$ref'), str):
+            target, pointer = self.locate(node['$ref'], target)
+            if (target, pointer) in seen:
+                raise ResolveError(f'Circular $ref chain at {self.relpath(target)}#{pointer}')
+            seen.add((target, pointer))
+            node = self.resolve_pointer(target, pointer)
+        return target, pointer, node
+
+    def check(self, ref, base_file):
+        """(is_valid, message) for ref; is_valid is None for refs that cannot be checked locally"""
+        try:
+            target, pointer = self.locate(ref, base_file)
+        except ResolveError as e:
+            if '://' in ref:
+                return None, str(e)
+            return False, str(e)
+        try:
+            self.resolve_pointer(target, pointer)
+        except ResolveError as e:
+            return False, str(e)
+        return True, f'Valid: {self.relpath(target)}#{pointer}'
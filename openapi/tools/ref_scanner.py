@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Streaming $ref extractor built on the YAML event API
+Walks parser events (libyaml when available) without composing a document
+tree and yields every $ref with its file, 1-based line/column and the JSON
+pointer of the mapping that holds it. Unlike the per-line regexes this also
+sees flow-style ({$ref: ...}), multi-line and oddly quoted references.
+
+Scan results are cached per file content hash next to the parse cache, so
+a warm scan of the whole tree only re-reads the bytes.
+
+Usage:
+    python tools/ref_scanner.py                 # every spec file
+    python tools/ref_scanner.py paths/x.yaml    # selected files
+    python tools/ref_scanner.py --json
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import yaml
+
+from json_pointer import escape_token
+from spec_cache import ParseCache
+from spec_loader import CACHE_DIR, OPENAPI_ROOT, SafeLoader, iter_spec_files, loader_name
+
+SCAN_FORMAT = 1
+
+_scan_cache = None
+
+class RefSite:
+    """One $ref occurrence"""
+
+    __slots__ = ('file', 'line', 'column', 'pointer', 'ref')
+
+    def __init__(self, file, line, column, pointer, ref):
+        self.file = file
+        self.line = line
+        self.column = column
+        self.pointer = pointer
+        self.ref = ref
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return f'RefSite({self.file}:{self.line}:{self.column} {self.pointer} -> {self.ref})'
+
+def scan_events(events):
+    """Yield (line, column, pointer, ref) from a YAML event stream
+
+    The stack holds one frame per open collection:
+    [is_mapping, pointer, expecting_key, current_key_or_index]
+    """
+    stack = []
+
+    def child_pointer(frame):
+        return frame[1] + '/' + escape_token(frame[3])
+
+    def advance(frame):
+        if frame[0]:
+            frame[2] = not frame[2]
+        else:
+            frame[3] += 1
+
+    for event in events:
+        cls = event.__class__
+        if cls is yaml.ScalarEvent:
+            if not stack:
+                continue
+            frame = stack[-1]
+            if frame[0] and frame[2]:
+                frame[3] = event.value
+            elif frame[0] and frame[3] == '$ref':
+                mark = event.start_mark
+                yield mark.line + 1, mark.column + 1, frame[1], event.value
+            advance(frame)
+        elif cls is yaml.MappingStartEvent or cls is yaml.SequenceStartEvent:
+            if stack:
+                frame = stack[-1]
+                if frame[0] and frame[2]:
+                    # Complex (collection) key - never a $ref location
+                    frame[3] = None
+                    pointer = frame[1] + '/?'
+                else:
+                    pointer = child_pointer(frame)
+            else:
+                pointer = ''
+            if cls is yaml.MappingStartEvent:
+                stack.append([True, pointer, True, None])
+            else:
+                stack.append([False, pointer, False, 0])
+        elif cls is yaml.MappingEndEvent or cls is yaml.SequenceEndEvent:
+            stack.pop()
+            if stack:
+                advance(stack[-1])
+        elif cls is yaml.AliasEvent:
+            if stack:
+                advance(stack[-1])
+
+def scan_text(text, name=None):
+    """List of (line, column, pointer, ref) tuples for a YAML string"""
+    stream = io.StringIO(text)
+    if name is not None:
+        stream.name = name
+    return list(scan_events(yaml.parse(stream, Loader=SafeLoader)))
+
+def get_scan_cache():
+    global _scan_cache
+    if os.environ.get('OPENAPI_PARSE_CACHE', '1') == '0':
+        return None
+    if _scan_cache is None:
+        salt = f'refscan{SCAN_FORMAT}:{yaml.__version__}:{loader_name()}'
+        _scan_cache = ParseCache(os.environ.get('OPENAPI_CACHE_DIR', CACHE_DIR), salt=salt)
+    return _scan_cache
+
+def scan_file(file_path, root=None):
+    """Every $ref in file_path as RefSite objects (file relative to root)"""
+    file_path = Path(file_path).resolve()
+    root = Path(root).resolve() if root else OPENAPI_ROOT
+    try:
+        relpath = file_path.relative_to(root).as_posix()
+    except ValueError:
+        relpath = str(file_path)
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    cache = get_scan_cache()
+    if cache is None:
+        sites = scan_text(data.decode('utf-8'), name=str(file_path))
+    else:
+        sites = cache.load(data, lambda text: scan_text(text, name=str(file_path)))
+    return [RefSite(relpath, line, column, pointer, ref) for line, column, pointer, ref in sites]
+
+def scan_tree(files=None, root=None):
+    """Yield RefSite for every $ref in files (default: the whole spec tree)"""
+    for file_path in files if files is not None else iter_spec_files(root):
+        yield from scan_file(file_path, root)
+
+def main():
+    parser = argparse.ArgumentParser(description='List every $ref with its exact location')
+    parser.add_argument('files', nargs='*', help='YAML files to scan (default: whole spec tree)')
+    parser.add_argument('--json', action='store_true', help='print sites as JSON')
+    args = parser.parse_args()
+
+    files = [Path(f) for f in args.files] if args.files else None
+    start = time.perf_counter()
+    sites = list(scan_tree(files))
+    elapsed = (time.perf_counter() - start) * 1000
+
+    if args.json:
+        print(json.dumps([site.to_dict() for site in sites], indent=2))
+        return 0
+
+    for site in sites:
+        print(f'{site.file}:{site.line}:{site.column}  {site.pointer}  ->  {site.ref}')
+    print()
+    print(f'Found {len(sites)} references in {len({s.file for s in sites})} files in {elapsed:.1f} ms')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Single-pass regex rewriting of spec files
+All rules of a Rewriter are compiled into one alternation, so a file is
+scanned once however many rules there are, and the output is assembled
+from slices of the original text instead of repeated str.replace() calls
+(which rescan the text per change and may hit an earlier, identical
+occurrence rather than the matched one). Line and column numbers of every
+change come from a line-offset table of the original text, so they point
+at the input even after earlier changes shifted it.
+
+Rules use named groups only; the names are private to the rule. When two
+rules could match at the same offset, the one listed first wins.
+
+    rules = [RewriteRule('local-schema', r"#/components/schemas/(?P<name>\\w+)",
+                         lambda m, ctx: f"{ctx['rel']}components/schemas.yaml#/{m['name']}")]
+    result = Rewriter(rules).rewrite(text, {'rel': '../../'})
+    result.text, result.changes
+"""
+
+import re
+from bisect import bisect_right
+
+_GROUP_NAME = re.compile(r'\(\?P<(\w+)>')
+_GROUP_REF = re.compile(r'\(\?P=(\w+)\)')
+_UNNAMED_GROUP = re.compile(r'(?<!\\)\((?!\?)')
+
+class LineIndex:
+    """Offsets of line starts; offset -> 1-based (line, column) by binary search"""
+
+    def __init__(self, text):
+        self.starts = [0]
+        self.starts.extend(m.end() for m in re.finditer('\n', text))
+
+    def position(self, offset):
+        line = bisect_right(self.starts, offset)
+        return line, offset - self.starts[line - 1] + 1
+
+class RewriteRule:
+    """A named pattern and the function that builds its replacement
+
+    replace(groups, context) gets the rule's named groups as a dict and
+    returns the new text, or None to leave the match as it is.
+    """
+
+    def __init__(self, name, pattern, replace, flags=0):
+        if _UNNAMED_GROUP.search(pattern.replace('\\\\', '')):
+            raise ValueError(f'rule {name}: use named or (?:...) groups only')
+        self.name = name
+        self.pattern = pattern
+        self.replace = replace
+        self.flags = flags
+        self.groups = _GROUP_NAME.findall(pattern)
+
+class Change:
+    __slots__ = ('rule', 'line', 'column', 'old', 'new')
+
+    def __init__(self, rule, line, column, old, new):
+        self.rule = rule
+        self.line = line
+        self.column = column
+        self.old = old
+        self.new = new
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+class RewriteResult:
+    __slots__ = ('text', 'changes')
+
+    def __init__(self, text, changes):
+        self.text = text
+        self.changes = changes
+
+    @property
+    def changed(self):
+        return bool(self.changes)
+
+class Rewriter:
+    """Applies every rule in one scan of the text"""
+
+    def __init__(self, rules, flags=0):
+        self.rules = list(rules)
+        parts = []
+        for index, rule in enumerate(self.rules):
+            prefix = f'r{index}_'
+            pattern = _GROUP_NAME.sub(lambda m: f'(?P<{prefix}{m.group(1)}>', rule.pattern)
+            pattern = _GROUP_REF.sub(lambda m: f'(?P={prefix}{m.group(1)})', pattern)
+            if rule.flags:
+                pattern = f'(?{_inline_flags(rule.flags)}:{pattern})'
+            parts.append(f'(?P<r{index}>{pattern})')
+        self.regex = re.compile('|'.join(parts) or r'(?!)', flags)
+
+    def rewrite(self, text, context=None):
+        """RewriteResult of one pass of all rules over text"""
+        pieces = []
+        changes = []
+        lines = None
+        position = 0
+        for match in self.regex.finditer(text):
+            index = int(match.lastgroup[1:])
+            rule = self.rules[index]
+            prefix = f'r{index}_'
+            groups = {name: match.group(prefix + name) for name in rule.groups}
+            new = rule.replace(groups, context)
+            old = match.group(0)
+            if new is None or new == old:
+                continue
+            if lines is None:
+                lines = LineIndex(text)
+            line, column = lines.position(match.start())
+            changes.append(Change(rule.name, line, column, old, new))
+            pieces.append(text[position:match.start()])
+            pieces.append(new)
+            position = match.end()
+        if not changes:
+            return RewriteResult(text, changes)
+        pieces.append(text[position:])
+        return RewriteResult(''.join(pieces), changes)
+
+def _inline_flags(flags):
+    letters = ''
+    for flag, letter in ((re.IGNORECASE, 'i'), (re.MULTILINE, 'm'), (re.DOTALL, 's'), (re.VERBOSE, 'x')):
+        if flags & flag:
+            letters += letter
+    return letters
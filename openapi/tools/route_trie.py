@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Path template conflicts through a segment trie
+Every path template of the path files (and of openapi.yaml#/paths) goes
+into a trie with one level per path segment. Literal segments are keyed by
+their text; a whole-segment template such as {id} goes to the node's single
+parameter child whatever its name. One depth-first walk then carries, for
+each node, the more generic nodes that match every request it matches (a
+parameter child standing in for one of its literals at some level), so the
+conflicts fall out in one pass over the trie instead of comparing every
+pair of templates:
+
+- duplicate: the same method on the same template defined more than once
+- ambiguous: templates that differ only in parameter names
+             (/faq/{id} and /faq/{faqId}); OpenAPI treats them as identical
+- shadowed:  a route that a more generic template with the same method also
+             matches (/tenant/faq/search and /tenant/faq/{id}); a router that
+             tries the generic one first sends the request to the wrong handler
+
+Segments that mix text and a template ({id}.json) are compared by shape,
+with every template reduced to {}.
+
+Usage:
+    python tools/route_trie.py
+    python tools/route_trie.py --json
+"""
+
+import argparse
+import json
+import re
+import sys
+
+_TEMPLATE = re.compile(r'\{[^{}/]*\}')
+
+def is_parameter(segment):
+    """True for a segment that is one whole template expression ({id})"""
+    return segment.startswith('{') and segment.endswith('}') and _TEMPLATE.fullmatch(segment) is not None
+
+def segments(template):
+    """Path segments of a template; '/' is the single empty segment"""
+    return template[1:].split('/') if template.startswith('/') else template.split('/')
+
+class Route:
+    """One path item: its template, where it is defined and its methods"""
+
+    __slots__ = ('template', 'file', 'pointer', 'methods')
+
+    def __init__(self, template, file, pointer):
+        self.template = template
+        self.file = file
+        self.pointer = pointer
+        self.methods = []
+
+    def location(self):
+        return f'{self.file}#{self.pointer}'
+
+class TrieNode:
+    __slots__ = ('literal', 'param', 'routes')
+
+    def __init__(self):
+        self.literal = {}
+        self.param = None
+        self.routes = []
+
+class RouteConflict:
+    """Two routes that a router cannot tell apart for the given methods"""
+
+    __slots__ = ('kind', 'route', 'other', 'methods')
+
+    def __init__(self, kind, route, other, methods):
+        self.kind = kind
+        self.route = route
+        self.other = other
+        self.methods = methods
+
+    def message(self):
+        methods = ', '.join(m.upper() for m in self.methods)
+        where = self.other.location()
+        if self.kind == 'duplicate':
+            return f'{methods} {self.route.template} is also defined at {where}'
+        if self.kind == 'ambiguous':
+            return (f'{self.route.template} and {self.other.template} differ only in parameter names '
+                    f'and match the same requests (other at {where})')
+        return (f'{methods} {self.route.template} is shadowed by {self.other.template} '
+                f'(defined at {where}), which also matches it')
+
+    def to_dict(self):
+        return {
+            'kind': self.kind,
+            'methods': [m.upper() for m in self.methods],
+            'template': self.route.template,
+            'location': self.route.location(),
+            'other': self.other.template,
+            'otherLocation': self.other.location(),
+        }
+
+class RouteTrie:
+    """Segment trie of path templates"""
+
+    def __init__(self):
+        self.root = TrieNode()
+        self._routes = {}
+
+    def add(self, template, method, file, pointer):
+        """Record method on the path item template defined at file#pointer"""
+        key = (template, file, pointer)
+        route = self._routes.get(key)
+        if route is None:
+            route = self._routes[key] = Route(template, file, pointer)
+            node = self.root
+            for segment in segments(template):
+                if is_parameter(segment):
+                    if node.param is None:
+                        node.param = TrieNode()
+                    node = node.param
+                else:
+                    segment = _TEMPLATE.sub('{}', segment)
+                    child = node.literal.get(segment)
+                    if child is None:
+                        child = node.literal[segment] = TrieNode()
+                    node = child
+            node.routes.append(route)
+        if method not in route.methods:
+            route.methods.append(method)
+        return route
+
+    def __len__(self):
+        return len(self._routes)
+
+    def conflicts(self):
+        """Every duplicate, ambiguous and shadowed route, in template order"""
+        found = []
+        # (node, more generic nodes matching every request that node matches)
+        stack = [(self.root, ())]
+        while stack:
+            node, generic = stack.pop()
+            if node.routes:
+                self._check(node, generic, found)
+            if node.param is not None:
+                stack.append((node.param, tuple(g.param for g in generic if g.param is not None)))
+            for segment in sorted(node.literal, reverse=True):
+                wider = [g.literal[segment] for g in generic if segment in g.literal]
+                wider.extend(g.param for g in (*generic, node) if g.param is not None)
+                stack.append((node.literal[segment], tuple(wider)))
+        return found
+
+    @staticmethod
+    def _check(node, generic, found):
+        routes = sorted(node.routes, key=lambda r: (r.template, r.file, r.pointer))
+        first = {}
+        for route in routes:
+            for method in route.methods:
+                if method in first.setdefault(route.template, {}):
+                    found.append(RouteConflict('duplicate', route, first[route.template][method], [method]))
+                else:
+                    first[route.template][method] = route
+        templates = list(first)
+        for template in templates[1:]:
+            route = next(r for r in routes if r.template == template)
+            other = next(r for r in routes if r.template == templates[0])
+            found.append(RouteConflict('ambiguous', route, other, sorted(set(first[template]) | set(first[templates[0]]))))
+        for wider in generic:
+            for other in wider.routes:
+                for route in routes:
+                    shared = [m for m in route.methods if m in other.methods]
+                    if shared:
+                        found.append(RouteConflict('shadowed', route, other, shared))
+
+def main():
+    from rule_engine import RuleEngine
+    from spec_loader import OPENAPI_ROOT, iter_spec_files, load_spec_tree
+    from validation_rules import RouteConflictRule
+
+    parser = argparse.ArgumentParser(description='Report duplicate, ambiguous and shadowed path templates')
+    parser.add_argument('--json', action='store_true', help='print conflicts as JSON')
+    args = parser.parse_args()
+
+    files = [f for f in iter_spec_files(OPENAPI_ROOT)
+             if f.name == 'openapi.yaml' or f.relative_to(OPENAPI_ROOT).parts[0] == 'paths']
+    spec = load_spec_tree(files=files)
+    rule = RouteConflictRule()
+    RuleEngine([rule]).run(spec)
+    conflicts = rule.conflicts
+
+    if args.json:
+        print(json.dumps([c.to_dict() for c in conflicts], indent=2))
+        return 1 if any(c.kind == 'duplicate' for c in conflicts) else 0
+
+    print('=' * 60)
+    print('PATH TEMPLATE CONFLICTS')
+    print('=' * 60)
+    print(f'Templates: {len(rule.trie)} path items in {len(spec.documents)} files')
+    print()
+    marks = {'duplicate': '❌', 'ambiguous': '⚠️ ', 'shadowed': '⚠️ '}
+    for kind in ('duplicate', 'ambiguous', 'shadowed'):
+        selected = [c for c in conflicts if c.kind == kind]
+        if not selected:
+            continue
+        print(f'{kind.upper()} ({len(selected)})')
+        for conflict in selected:
+            print(f'  {marks[kind]} {conflict.message()}')
+            print(f'      {conflict.route.location()}')
+        print()
+    counts = {kind: sum(1 for c in conflicts if c.kind == kind) for kind in ('duplicate', 'ambiguous', 'shadowed')}
+    if not conflicts:
+        print('✅ No conflicting path templates')
+    print(f'Duplicate: {counts["duplicate"]}   Ambiguous: {counts["ambiguous"]}   Shadowed: {counts["shadowed"]}')
+    return 1 if counts['duplicate'] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Single-pass validation engine for the OpenAPI tree
+The engine walks every loaded document exactly once and hands each node it
+recognises to the rules registered for that node kind:
+
+- operation:  one HTTP method of a path item (paths/*, openapi.yaml#/paths)
+- schema:     a named schema (schemas/*, components/schemas.yaml,
+              openapi.yaml#/components/schemas)
+- parameter:  a component parameter or an operation/path-level parameter
+- ref:        every mapping that carries a $ref
+
+Adding a check therefore costs one more callback per node rather than
+another full read of the tree.
+
+With timed=True the engine also records the wall time spent in each rule
+(its hooks plus start/finish), in walking each file, and in each rule while
+walking each file.
+"""
+
+import time
+from pathlib import Path
+
+import yaml
+
+from json_pointer import join_pointer
+from ref_resolver import RefResolver
+from schema_flatten import SchemaFlattener
+
+HTTP_METHODS = ('get', 'put', 'post', 'delete', 'options', 'head', 'patch', 'trace')
+
+SEVERITIES = ('critical', 'warning', 'info')
+
+def _link_pointer(parent, token):
+    """Pointer of a _walk_refs entry: follow the parent links back to the base pointer"""
+    tokens = []
+    while parent is not None:
+        tokens.append(token)
+        parent, token = parent
+    return join_pointer(token, *reversed(tokens))
+
+class Finding:
+    """One issue reported by a rule"""
+
+    __slots__ = ('rule', 'severity', 'message', 'file', 'pointer', 'line', 'column')
+
+    def __init__(self, rule, severity, message, file=None, pointer='', line=None, column=None):
+        self.rule = rule
+        self.severity = severity
+        self.message = message
+        self.file = file
+        self.pointer = pointer
+        self.line = line
+        self.column = column
+
+    def location(self):
+        if not self.file:
+            return ''
+        return f'{self.file}#{self.pointer}' if self.pointer else self.file
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return f'Finding({self.rule}, {self.severity}, {self.message!r}, {self.location()})'
+
+def finding_key(finding):
+    """Identity of a finding across runs (line numbers move, pointers and messages do not)"""
+    return f"{finding['rule']}|{finding['severity']}|{finding['pointer']}|{finding['message']}"
+
+def syntax_finding(relpath, error):
+    """Finding dict for a file that failed to load (YAML errors carry their position)"""
+    mark = getattr(error, 'problem_mark', None)
+    message = str(error).splitlines()[0] if isinstance(error, yaml.YAMLError) else f'{type(error).__name__}: {error}'
+    return Finding('yaml-syntax', 'critical', message, file=relpath,
+                   line=mark.line + 1 if mark else None, column=mark.column + 1 if mark else None).to_dict()
+
+class Node:
+    """A node handed to rules: where it lives and what it contains"""
+
+    __slots__ = ('kind', 'file', 'module', 'pointer', 'value', 'name', 'path', 'method', 'parent')
+
+    def __init__(self, kind, file, module, pointer, value, name=None, path=None, method=None, parent=None):
+        self.kind = kind
+        self.file = file
+        self.module = module
+        self.pointer = pointer
+        self.value = value
+        self.name = name
+        self.path = path
+        self.method = method
+        self.parent = parent
+
+class Rule:
+    """Base class for validation rules; override the visit_* hooks you need"""
+
+    id = 'rule'
+    description = ''
+    # 'file': findings depend only on the visited file itself.
+    # 'refs': findings also depend on what the file's $refs reach, so they can
+    #         change when a referenced file changes.
+    # 'tree': verdicts need the whole tree (coverage ratios, cross-module names).
+    # A partial walk over some files gives the same 'file' and 'refs' findings
+    # for those files as a full walk.
+    scope = 'file'
+
+    def __init__(self):
+        self.findings = []
+
+    def start(self, engine):
+        """Called once before the walk"""
+
+    def finish(self, engine):
+        """Called once after the walk; module-level verdicts go here"""
+
+    def report(self, severity, message, node=None, file=None, pointer=''):
+        if node is not None:
+            file = node.file
+            pointer = node.pointer
+        self.findings.append(Finding(self.id, severity, message, file=file, pointer=pointer))
+
+class RuleEngine:
+    """Walk a SpecTree once and dispatch nodes to the registered rules"""
+
+    def __init__(self, rules=None, resolver=None, timed=False):
+        self.rules = []
+        self._visitors = {}
+        self.spec = None
+        # A long-lived RefResolver kept current by the caller; by default each
+        # run gets a fresh one seeded with the documents of the spec
+        self.resolver = resolver
+        self._flattener = None
+        self.stats = {'documents': 0, 'operations': 0, 'schemas': 0, 'parameters': 0, 'refs': 0}
+        self.timed = timed
+        # Filled when timed: milliseconds per rule id, per walked file (relpath)
+        # and per rule within each file, plus (relpath, start, end) perf_counter
+        # seconds of every file walk
+        self.timings = {'rules': {}, 'files': {}, 'file_rules': {}, 'walks': []}
+        self._file_rules = {}
+        for rule in rules or []:
+            self.register(rule)
+
+    def register(self, rule):
+        self.rules.append(rule)
+        self._visitors = {}
+        return rule
+
+    def rule(self, rule_id):
+        for rule in self.rules:
+            if rule.id == rule_id:
+                return rule
+        raise KeyError(rule_id)
+
+    def _build_visitors(self):
+        # Only call rules that actually override a hook
+        for kind in ('document', 'operation', 'schema', 'parameter', 'ref'):
+            hook = f'visit_{kind}'
+            self._visitors[kind] = [
+                self._timed(rule.id, getattr(rule, hook)) if self.timed else getattr(rule, hook)
+                for rule in self.rules
+                if getattr(type(rule), hook, None) is not None
+            ]
+
+    def _timed(self, rule_id, hook):
+        """hook wrapped to add its wall time to the rule's total"""
+        totals = self.timings['rules']
+        totals.setdefault(rule_id, 0.0)
+
+        def timed_hook(arg):
+            start = time.perf_counter()
+            hook(arg)
+            elapsed = (time.perf_counter() - start) * 1000
+            totals[rule_id] += elapsed
+            per_file = self._file_rules
+            per_file[rule_id] = per_file.get(rule_id, 0.0) + elapsed
+        return timed_hook
+
+    def _dispatch(self, kind, node):
+        for visit in self._visitors[kind]:
+            visit(node)
+
+    @property
+    def flattener(self):
+        """SchemaFlattener shared by the rules, seeded with the loaded documents"""
+        if self._flattener is None:
+            if self.resolver is not None:
+                self._flattener = SchemaFlattener(self.resolver)
+                return self._flattener
+            resolver = RefResolver(self.spec.root if self.spec is not None else None)
+            if self.spec is not None:
+                for file_path, document in self.spec.documents.items():
+                    resolver.add_document(file_path, document)
+            self._flattener = SchemaFlattener(resolver)
+        return self._flattener
+
+    @property
+    def findings(self):
+        return [finding for rule in self.rules for finding in rule.findings]
+
+    def run(self, spec, files=None):
+        """Walk every document of spec (or only files) and return all findings
+
+        Documents outside files are not walked but still back the shared
+        flattener, so references into them resolve without reloading.
+        """
+        self.spec = spec
+        self._flattener = None
+        self._build_visitors()
+        for rule in self.rules:
+            (self._timed(rule.id, rule.start) if self.timed else rule.start)(self)
+        selected = spec.files() if files is None else sorted({Path(f).resolve() for f in files})
+        for file_path in selected:
+            if file_path in spec.errors or file_path not in spec.documents:
+                continue
+            relpath = spec.relpath(file_path)
+            if self.timed:
+                self._file_rules = self.timings['file_rules'].setdefault(relpath, {})
+            start = time.perf_counter()
+            self.walk_document(relpath, spec.documents[file_path])
+            if self.timed:
+                end = time.perf_counter()
+                self.timings['files'][relpath] = (end - start) * 1000
+                self.timings['walks'].append((relpath, start, end))
+        self._file_rules = {}
+        for rule in self.rules:
+            (self._timed(rule.id, rule.finish) if self.timed else rule.finish)(self)
+        return self.findings
+
+    def walk_document(self, relpath, document):
+        self.stats['documents'] += 1
+        module = Path(relpath).stem
+        parts = relpath.split('/')
+        doc_node = Node('document', relpath, module, '', document)
+        self._dispatch('document', doc_node)
+        if not isinstance(document, dict):
+            return
+
+        if parts[0] == 'paths':
+            path_items = document.get('paths', document)
+            base = '/paths' if 'paths' in document else ''
+            self._walk_path_items(relpath, module, base, path_items)
+        elif parts[0] == 'schemas' or relpath == 'components/schemas.yaml':
+            self._walk_named(relpath, module, '', document, 'schema')
+        elif relpath == 'components/parameters.yaml':
+            self._walk_named(relpath, module, '', document, 'parameter')
+        elif relpath == 'openapi.yaml':
+            if isinstance(document.get('paths'), dict):
+                self._walk_path_items(relpath, module, '/paths', document['paths'])
+            components = document.get('components')
+            if isinstance(components, dict):
+                for key, kind in (('schemas', 'schema'), ('parameters', 'parameter')):
+                    if isinstance(components.get(key), dict):
+                        self._walk_named(relpath, module, f'/components/{key}', components[key], kind)
+                self._walk_refs(relpath, module, '/components', components, skip=('schemas', 'parameters'))
+            for key, value in document.items():
+                if key not in ('paths', 'components'):
+                    self._walk_refs(relpath, module, join_pointer('', key), value)
+        else:
+            self._walk_refs(relpath, module, '', document)
+
+    def _walk_named(self, relpath, module, base, definitions, kind):
+        for name, value in definitions.items():
+            pointer = join_pointer(base, name)
+            if isinstance(value, dict):
+                self.stats[f'{kind}s'] += 1
+                self._dispatch(kind, Node(kind, relpath, module, pointer, value, name=name))
+            self._walk_refs(relpath, module, pointer, value)
+
+    def _walk_path_items(self, relpath, module, base, path_items):
+        if not isinstance(path_items, dict):
+            return
+        for path, path_item in path_items.items():
+            path_pointer = join_pointer(base, path)
+            if not isinstance(path_item, dict):
+                continue
+            if isinstance(path_item.get('$ref'), str) and self._visitors['ref']:
+                self.stats['refs'] += 1
+                self._dispatch('ref', Node('ref', relpath, module, path_pointer, path_item,
+                                           name=path_item['$ref'], path=path))
+            path_params = path_item.get('parameters')
+            for key, value in path_item.items():
+                pointer = join_pointer(path_pointer, key)
+                if key in HTTP_METHODS and isinstance(value, dict):
+                    self.stats['operations'] += 1
+                    operation = Node('operation', relpath, module, pointer, value,
+                                     path=path, method=key, parent=path_item)
+                    self._dispatch('operation', operation)
+                    params = value.get('parameters')
+                    if isinstance(params, list):
+                        self._walk_parameter_list(relpath, module, join_pointer(pointer, 'parameters'), params, operation)
+                    self._walk_refs(relpath, module, pointer, value)
+                elif key == 'parameters' and isinstance(path_params, list):
+                    self._walk_parameter_list(relpath, module, pointer, path_params, None)
+                    self._walk_refs(relpath, module, pointer, value)
+                else:
+                    self._walk_refs(relpath, module, pointer, value)
+
+    def _walk_parameter_list(self, relpath, module, base, params, operation):
+        for index, param in enumerate(params):
+            if isinstance(param, dict):
+                self.stats['parameters'] += 1
+                self._dispatch('parameter', Node('parameter', relpath, module, join_pointer(base, index),
+                                                 param, parent=operation))
+
+    def _walk_refs(self, relpath, module, pointer, value, skip=()):
+        """Dispatch every $ref below value in document order (skip: top-level keys to leave out)"""
+        if not self._visitors['ref']:
+            return
+        if skip and isinstance(value, dict):
+            value = {k: v for k, v in value.items() if k not in skip}
+        # Entries carry (parent link, token) instead of a pointer string; the
+        # pointer is only spelled out for the few nodes that hold a $ref
+        stack = [(None, pointer, value)]
+        while stack:
+            parent, token, value = stack.pop()
+            if isinstance(value, dict):
+                ref = value.get('$ref')
+                if isinstance(ref, str):
+                    self.stats['refs'] += 1
+                    self._dispatch('ref', Node('ref', relpath, module, _link_pointer(parent, token), value, name=ref))
+                link = (parent, token)
+                children = [(link, k, v) for k, v in value.items() if isinstance(v, (dict, list))]
+            elif isinstance(value, list):
+                link = (parent, token)
+                children = [(link, i, v) for i, v in enumerate(value) if isinstance(v, (dict, list))]
+            else:
+                continue
+            stack.extend(reversed(children))
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Effective schemas through allOf chains
+Flattens a schema through every level of allOf (and plain $ref aliases),
+across files, into its effective properties, required fields and readOnly
+properties. Each referenced schema is flattened once and memoized per
+(file, pointer), so a rule asking about thousands of entities that share
+BaseEntity / AuditableEntity pays for those bases a single time.
+
+Usage:
+    python tools/schema_flatten.py schemas/content-management/faq.yaml#/FAQPageData
+    python tools/schema_flatten.py schemas/content-management/faq.yaml --json
+"""
+
+import argparse
+import json
+import sys
+
+from json_pointer import join_pointer, resolve_path
+from ref_resolver import RefResolver, ResolveError
+
+class EffectiveSchema:
+    """Properties, required and readOnly fields of a schema after allOf merging"""
+
+    __slots__ = ('file', 'pointer', 'properties', 'required', 'read_only', 'bases', 'unresolved', 'recursive')
+
+    def __init__(self, file, pointer):
+        self.file = file
+        self.pointer = pointer
+        self.properties = {}
+        self.required = []
+        self.read_only = set()
+        self.bases = []
+        self.unresolved = []
+        self.recursive = False
+
+    def has(self, name):
+        return name in self.properties
+
+    def merge(self, other):
+        """Fold another effective schema in (later definitions of a property win)"""
+        for name, prop in other.properties.items():
+            self.properties[name] = prop
+            if name in other.read_only:
+                self.read_only.add(name)
+            else:
+                self.read_only.discard(name)
+        for name in other.required:
+            if name not in self.required:
+                self.required.append(name)
+        for base in other.bases:
+            if base not in self.bases:
+                self.bases.append(base)
+        self.unresolved.extend(other.unresolved)
+        self.recursive = self.recursive or other.recursive
+
+    def to_dict(self):
+        return {
+            'file': self.file,
+            'pointer': self.pointer,
+            'properties': sorted(self.properties),
+            'required': self.required,
+            'readOnly': sorted(self.read_only),
+            'bases': self.bases,
+            'unresolved': self.unresolved,
+        }
+
+def is_read_only(prop):
+    """readOnly set on a property directly or on one of its allOf parts"""
+    if not isinstance(prop, dict):
+        return False
+    if prop.get('readOnly') is True:
+        return True
+    all_of = prop.get('allOf')
+    return isinstance(all_of, list) and any(isinstance(p, dict) and p.get('readOnly') is True for p in all_of)
+
+class SchemaFlattener:
+    """Memoizing allOf flattener on top of a RefResolver"""
+
+    def __init__(self, resolver=None, root=None):
+        self.resolver = resolver or RefResolver(root)
+        self._memo = {}
+        self._active = set()
+
+    def flatten(self, file_path, pointer):
+        """EffectiveSchema of the schema at file_path#pointer (memoized)"""
+        key = (resolve_path(file_path), pointer)
+        if key in self._memo:
+            return self._memo[key]
+        if key in self._active:
+            # allOf recursion: the outer call will merge everything else
+            partial = EffectiveSchema(self.resolver.relpath(key[0]), pointer)
+            partial.recursive = True
+            return partial
+        self._active.add(key)
+        try:
+            node = self.resolver.resolve_pointer(key[0], pointer)
+            result = self.flatten_node(node, key[0], pointer)
+        except ResolveError as e:
+            result = EffectiveSchema(self.resolver.relpath(key[0]), pointer)
+            result.unresolved.append(str(e))
+        finally:
+            self._active.discard(key)
+        if not result.recursive:
+            self._memo[key] = result
+        return result
+
+    def flatten_ref(self, ref, base_file):
+        """EffectiveSchema of the target of ref, resolved relative to base_file"""
+        try:
+            target, pointer = self.resolver.locate(ref, base_file)
+        except ResolveError as e:
+            result = EffectiveSchema(self.resolver.relpath(base_file), '')
+            result.unresolved.append(str(e))
+            return result
+        return self.flatten(target, pointer)
+
+    def flatten_node(self, node, file_path, pointer):
+        """EffectiveSchema of an already-resolved schema node found at file_path#pointer"""
+        result = EffectiveSchema(self.resolver.relpath(file_path), pointer)
+        if not isinstance(node, dict):
+            return result
+        ref = node.get('$ref')
+        if isinstance(ref, str):
+            self._merge_base(result, ref, file_path)
+        all_of = node.get('allOf')
+        if isinstance(all_of, list):
+            for index, part in enumerate(all_of):
+                if isinstance(part, dict) and isinstance(part.get('$ref'), str):
+                    self._merge_base(result, part['$ref'], file_path)
+                else:
+                    result.merge(self.flatten_node(part, file_path, join_pointer(pointer, 'allOf', index)))
+        properties = node.get('properties')
+        if isinstance(properties, dict):
+            for name, prop in properties.items():
+                result.properties[name] = prop
+                if is_read_only(prop):
+                    result.read_only.add(name)
+                else:
+                    result.read_only.discard(name)
+        required = node.get('required')
+        if isinstance(required, list):
+            for name in required:
+                if isinstance(name, str) and name not in result.required:
+                    result.required.append(name)
+        return result
+
+    def _merge_base(self, result, ref, file_path):
+        base = self.flatten_ref(ref, file_path)
+        label = f'{base.file}#{base.pointer}'
+        if label not in result.bases and not base.unresolved:
+            result.bases.append(label)
+        result.merge(base)
+
+def main():
+    parser = argparse.ArgumentParser(description='Show the effective fields of schemas through their allOf chains')
+    parser.add_argument('targets', nargs='+', help="'file#/Name' or a schema file (every top-level schema)")
+    parser.add_argument('--json', action='store_true', help='print effective schemas as JSON')
+    args = parser.parse_args()
+
+    flattener = SchemaFlattener()
+    results = []
+    for target in args.targets:
+        file_part, _, pointer = target.partition('#')
+        file_path = (flattener.resolver.root / file_part).resolve()
+        if pointer:
+            results.append(flattener.flatten(file_path, pointer))
+            continue
+        document = flattener.resolver.document(file_path)
+        for name in document if isinstance(document, dict) else ():
+            results.append(flattener.flatten(file_path, join_pointer('', name)))
+
+    if args.json:
+        print(json.dumps([r.to_dict() for r in results], indent=2))
+        return 0
+
+    for result in results:
+        print(f'{result.file}#{result.pointer}')
+        if result.bases:
+            print(f'  bases:     {", ".join(result.bases)}')
+        print(f'  properties ({len(result.properties)}): {", ".join(result.properties)}')
+        print(f'  required:  {", ".join(result.required) or "-"}')
+        print(f'  readOnly:  {", ".join(sorted(result.read_only)) or "-"}')
+        for issue in result.unresolved:
+            print(f'  ⚠️  {issue}')
+        print()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Compiled validators for OpenAPI 3.1 schema objects
+Turns a schema into a tree of small Python closures once, so checking an
+instance is a walk over the instance rather than a re-interpretation of the
+schema. Component schemas (file#pointer) are compiled once per
+SchemaCompiler and shared by every schema that $refs them; recursive
+schemas compile to a forward reference that is filled in when the
+outer compile finishes.
+
+Covers the subset the spec uses: type (a name or a list of names, e.g.
+[string, "null"]), enum, const, properties / required /
+additionalProperties, items, string, number and array bounds, pattern, a
+few common formats, allOf / anyOf / oneOf / not. Keywords next to a $ref
+apply together with the referenced schema, as in OpenAPI 3.1. Files still
+written in 3.0 style keep working: nullable: true admits null, and a
+boolean exclusiveMinimum / exclusiveMaximum makes minimum / maximum
+exclusive (a number is the 3.1 bound itself). Unknown keywords and
+formats are ignored; a $ref that does not resolve accepts anything (the
+ref-target rule reports it).
+
+YAML turns unquoted timestamps into date/datetime objects; they count as
+strings, since that is what they are in the JSON the API sends.
+
+Usage:
+    python tools/schema_validator.py 'components/schemas.yaml#/FAQPageData' example.yaml
+"""
+
+import argparse
+import datetime
+import re
+import sys
+from pathlib import Path
+
+from json_pointer import escape_token, resolve_path
+from ref_resolver import RefResolver, ResolveError
+from spec_loader import load_yaml
+
+FORMATS = {
+    'date-time': re.compile(r'^\d{4}-\d{2}-\d{2}[Tt ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?([Zz]|[+-]\d{2}:?\d{2})?$'),
+    'date': re.compile(r'^\d{4}-\d{2}-\d{2}$'),
+    'email': re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$'),
+    'uuid': re.compile(r'^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$'),
+    'uri': re.compile(r'^[A-Za-z][A-Za-z0-9+.-]*:\S*$'),
+}
+
+def type_name(instance):
+    """JSON type of a loaded YAML value"""
+    if instance is None:
+        return 'null'
+    if isinstance(instance, bool):
+        return 'boolean'
+    if isinstance(instance, int):
+        return 'integer'
+    if isinstance(instance, float):
+        return 'number'
+    if isinstance(instance, (str, datetime.date)):
+        return 'string'
+    if isinstance(instance, list):
+        return 'array'
+    if isinstance(instance, dict):
+        return 'object'
+    return type(instance).__name__
+
+def _is_type(instance, expected):
+    actual = type_name(instance)
+    return actual == expected or (expected == 'number' and actual == 'integer') \
+        or (expected == 'integer' and actual == 'number' and float(instance).is_integer())
+
+def _same(a, b):
+    # 1 == True in Python, not in JSON
+    return a == b and type_name(a) == type_name(b)
+
+def _string_value(instance):
+    return instance.isoformat() if isinstance(instance, datetime.date) else instance
+
+def instance_pointer(path):
+    """JSON pointer into the instance for a tuple of keys / indexes"""
+    return ''.join('/' + escape_token(token) for token in path)
+
+class SchemaCompiler:
+    """Compiles schemas to validators, memoizing component schemas per (file, pointer)"""
+
+    def __init__(self, resolver=None, root=None):
+        self.resolver = resolver or RefResolver(root)
+        self._compiled = {}
+        self.compiled = 0
+
+    def compile(self, file_path, pointer):
+        """Validator for the schema at file_path#pointer (compiled once)"""
+        key = (resolve_path(file_path), pointer)
+        if key in self._compiled:
+            return self._compiled[key]
+        # Placeholder first, so a schema that reaches itself binds to its own validator
+        cell = []
+        self._compiled[key] = lambda instance, path, errors: cell[0](instance, path, errors)
+        try:
+            node = self.resolver.resolve_pointer(key[0], pointer)
+            validator = self.compile_node(node, key[0])
+        except ResolveError:
+            validator = _accept
+        cell.append(validator)
+        self._compiled[key] = validator
+        return validator
+
+    def compile_ref(self, ref, base_file):
+        try:
+            target, pointer = self.resolver.locate(ref, base_file)
+        except ResolveError:
+            return _accept
+        return self.compile(target, pointer)
+
+    def compile_node(self, schema, base_file):
+        """Validator for an inline schema found in base_file"""
+        if not isinstance(schema, dict):
+            return _accept
+        self.compiled += 1
+        checks = []
+        if isinstance(schema.get('$ref'), str):
+            # Siblings of $ref apply as well (OpenAPI 3.1)
+            checks.append(self.compile_ref(schema['$ref'], base_file))
+        nullable = schema.get('nullable') is True
+        expected = schema.get('type')
+        if isinstance(expected, str):
+            checks.append(_type_check((expected,)))
+        elif isinstance(expected, list) and expected and all(isinstance(name, str) for name in expected):
+            checks.append(_type_check(tuple(expected)))
+        if isinstance(schema.get('enum'), list):
+            checks.append(_enum_check(schema['enum']))
+        if 'const' in schema:
+            checks.append(_enum_check([schema['const']], 'const'))
+        checks.extend(_string_checks(schema))
+        checks.extend(_number_checks(schema))
+        checks.extend(self._array_checks(schema, base_file))
+        checks.extend(self._object_checks(schema, base_file))
+        checks.extend(self._combinator_checks(schema, base_file))
+        if not checks:
+            return _accept
+        if len(checks) == 1 and not nullable:
+            return checks[0]
+
+        def validate(instance, path, errors):
+            if instance is None and nullable:
+                return
+            for check in checks:
+                check(instance, path, errors)
+        return validate
+
+    def _array_checks(self, schema, base_file):
+        checks = []
+        if isinstance(schema.get('items'), dict):
+            item = self.compile_node(schema['items'], base_file)
+
+            def check_items(instance, path, errors):
+                if isinstance(instance, list):
+                    for index, value in enumerate(instance):
+                        item(value, path + (index,), errors)
+            checks.append(check_items)
+        low, high = schema.get('minItems'), schema.get('maxItems')
+        if isinstance(low, int) or isinstance(high, int):
+            def check_count(instance, path, errors):
+                if isinstance(instance, list):
+                    if isinstance(low, int) and len(instance) < low:
+                        errors.append((path, f'expected at least {low} items, got {len(instance)}'))
+                    if isinstance(high, int) and len(instance) > high:
+                        errors.append((path, f'expected at most {high} items, got {len(instance)}'))
+            checks.append(check_count)
+        if schema.get('uniqueItems') is True:
+            def check_unique(instance, path, errors):
+                if isinstance(instance, list):
+                    seen = []
+                    for value in instance:
+                        if any(_same(value, other) for other in seen):
+                            errors.append((path, 'items are not unique'))
+                            return
+                        seen.append(value)
+            checks.append(check_unique)
+        return checks
+
+    def _object_checks(self, schema, base_file):
+        checks = []
+        properties = schema.get('properties') if isinstance(schema.get('properties'), dict) else {}
+        compiled = {name: self.compile_node(prop, base_file) for name, prop in properties.items()}
+        if compiled:
+            def check_properties(instance, path, errors):
+                if isinstance(instance, dict):
+                    for name, validate in compiled.items():
+                        if name in instance:
+                            validate(instance[name], path + (name,), errors)
+            checks.append(check_properties)
+        required = [name for name in schema.get('required') or () if isinstance(name, str)] \
+            if isinstance(schema.get('required'), list) else []
+        if required:
+            def check_required(instance, path, errors):
+                if isinstance(instance, dict):
+                    for name in required:
+                        if name not in instance:
+                            errors.append((path, f'missing required property "{name}"'))
+            checks.append(check_required)
+        additional = schema.get('additionalProperties', True)
+        if additional is False:
+            def check_closed(instance, path, errors):
+                if isinstance(instance, dict):
+                    for name in instance:
+                        if name not in properties:
+                            errors.append((path + (name,), 'additional property not allowed'))
+            checks.append(check_closed)
+        elif isinstance(additional, dict):
+            extra = self.compile_node(additional, base_file)
+
+            def check_additional(instance, path, errors):
+                if isinstance(instance, dict):
+                    for name, value in instance.items():
+                        if name not in properties:
+                            extra(value, path + (name,), errors)
+            checks.append(check_additional)
+        return checks
+
+    def _combinator_checks(self, schema, base_file):
+        checks = []
+        if isinstance(schema.get('allOf'), list):
+            parts = [self.compile_node(part, base_file) for part in schema['allOf']]
+
+            def check_all(instance, path, errors):
+                for part in parts:
+                    part(instance, path, errors)
+            checks.append(check_all)
+        for keyword in ('anyOf', 'oneOf'):
+            if isinstance(schema.get(keyword), list):
+                checks.append(_alternatives_check(keyword, [self.compile_node(p, base_file) for p in schema[keyword]]))
+        if isinstance(schema.get('not'), dict):
+            negated = self.compile_node(schema['not'], base_file)
+
+            def check_not(instance, path, errors):
+                attempt = []
+                negated(instance, path, attempt)
+                if not attempt:
+                    errors.append((path, 'matches a schema it must not match ("not")'))
+            checks.append(check_not)
+        return checks
+
+    def validate(self, instance, file_path, pointer):
+        """(instance pointer, message) for every mismatch of instance against file_path#pointer"""
+        errors = []
+        self.compile(file_path, pointer)(instance, (), errors)
+        return [(instance_pointer(path), message) for path, message in errors]
+
+def _accept(instance, path, errors):
+    pass
+
+def _type_check(expected):
+    """Check of a type name, or any of several (3.1 list form)"""
+    shown = ' or '.join(expected)
+
+    def check_type(instance, path, errors):
+        if instance is None:
+            # nullable is handled by the caller; here null only passes for type 'null'
+            if 'null' not in expected:
+                errors.append((path, f'expected {shown}, got null'))
+            return
+        if not any(_is_type(instance, name) for name in expected):
+            errors.append((path, f'expected {shown}, got {type_name(instance)}'))
+    return check_type
+
+def _enum_check(values, keyword='enum'):
+    def check_enum(instance, path, errors):
+        if not any(_same(_string_value(instance), value) or _same(instance, value) for value in values):
+            if keyword == 'const':
+                errors.append((path, f'{instance!r} is not the const value {values[0]!r}'))
+                return
+            shown = ', '.join(repr(v) for v in values[:8]) + (', ...' if len(values) > 8 else '')
+            errors.append((path, f'{instance!r} is not one of [{shown}]'))
+    return check_enum
+
+def _string_checks(schema):
+    checks = []
+    low, high = schema.get('minLength'), schema.get('maxLength')
+    if isinstance(low, int) or isinstance(high, int):
+        def check_length(instance, path, errors):
+            if isinstance(instance, str):
+                if isinstance(low, int) and len(instance) < low:
+                    errors.append((path, f'string shorter than minLength {low}'))
+                if isinstance(high, int) and len(instance) > high:
+                    errors.append((path, f'string longer than maxLength {high}'))
+        checks.append(check_length)
+    if isinstance(schema.get('pattern'), str):
+        try:
+            pattern = re.compile(schema['pattern'])
+        except re.error:
+            pattern = None
+        if pattern is not None:
+            def check_pattern(instance, path, errors):
+                if isinstance(instance, str) and not pattern.search(instance):
+                    errors.append((path, f'{instance!r} does not match pattern {pattern.pattern!r}'))
+            checks.append(check_pattern)
+    fmt = FORMATS.get(schema.get('format'))
+    if fmt is not None:
+        name = schema['format']
+
+        def check_format(instance, path, errors):
+            if isinstance(instance, str) and not fmt.match(instance):
+                errors.append((path, f'{instance!r} is not a valid {name}'))
+        checks.append(check_format)
+    return checks
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def _number_checks(schema):
+    bounds = []
+    for keyword, exclusive_keyword, below in (('minimum', 'exclusiveMinimum', True), ('maximum', 'exclusiveMaximum', False)):
+        limit = schema.get(keyword)
+        exclusive = schema.get(exclusive_keyword)
+        if _is_number(limit):
+            # OpenAPI 3.0: a boolean exclusive* makes the bound exclusive
+            bounds.append((keyword, limit, exclusive is True, below))
+        if _is_number(exclusive):
+            # OpenAPI 3.1: exclusive* is a bound of its own
+            bounds.append((exclusive_keyword, exclusive, True, below))
+    if not bounds:
+        return []
+
+    def check_bounds(instance, path, errors):
+        if type_name(instance) not in ('integer', 'number'):
+            return
+        for keyword, limit, exclusive, below in bounds:
+            if below and (instance < limit or (exclusive and instance == limit)):
+                errors.append((path, f'{instance} is below {keyword} {limit}'))
+            elif not below and (instance > limit or (exclusive and instance == limit)):
+                errors.append((path, f'{instance} is above {keyword} {limit}'))
+    return [check_bounds]
+
+def _alternatives_check(keyword, alternatives):
+    def check_alternatives(instance, path, errors):
+        matched = 0
+        for alternative in alternatives:
+            attempt = []
+            alternative(instance, path, attempt)
+            if not attempt:
+                matched += 1
+                if keyword == 'anyOf':
+                    return
+        if matched == 0:
+            errors.append((path, f'does not match any {keyword} alternative ({len(alternatives)})'))
+        elif keyword == 'oneOf' and matched > 1:
+            errors.append((path, f'matches {matched} oneOf alternatives, expected exactly one'))
+    return check_alternatives
+
+def main():
+    parser = argparse.ArgumentParser(description='Validate a YAML/JSON instance against a spec schema')
+    parser.add_argument('schema', help="schema as 'file#/pointer' relative to openapi/")
+    parser.add_argument('instance', help='YAML or JSON file holding the instance')
+    args = parser.parse_args()
+
+    compiler = SchemaCompiler()
+    file_part, _, pointer = args.schema.partition('#')
+    instance = load_yaml(Path(args.instance), cache=False)
+    errors = compiler.validate(instance, compiler.resolver.root / file_part, pointer)
+    for where, message in errors:
+        print(f'❌ {where or "/"}: {message}')
+    if not errors:
+        print(f'✅ {args.instance} matches {args.schema}')
+    return 1 if errors else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,13 +1,12 @@
 #!/usr/bin/env python3
 """
-Smart Tenant ID Checker - Follows allOf references to BaseEntity
+Smart Tenant ID Checker - Follows allOf chains (to any depth, across files)
 """
 
-import os
-import yaml
-import re
 from pathlib import Path
-from collections import defaultdict
+
+from json_pointer import join_pointer
+from schema_flatten import SchemaFlattener
 
 def check_tenant_compliance():
     """Check tenant_id compliance with smart reference following"""
@@ -21,29 +20,21 @@ def check_tenant_compliance():
     schemas_dir = base_path / 'schemas' / 'content-management'
     common_dir = base_path / 'schemas' / 'common'
     
+    flattener = SchemaFlattener(root=base_path)
+    
     # Load base schemas first
-    base_schemas = {}
     print('Loading base schemas...')
     for base_file in sorted(common_dir.glob('*.yaml')):
         try:
-            with open(base_file, 'r', encoding='utf-8') as f:
-                content = yaml.safe_load(f)
-                if isinstance(content, dict):
-                    base_schemas.update(content)
-                    print(f'  Loaded: {base_file.stem} ({len(content)} schemas)')
+            content = flattener.resolver.document(base_file)
+            if isinstance(content, dict):
+                print(f'  Loaded: {base_file.stem} ({len(content)} schemas)')
         except Exception as e:
             print(f'  ERROR: {base_file.stem} - {str(e)}')
     
-    # Check if BaseEntity has tenant_id
-    base_entity = base_schemas.get('BaseEntity', {})
-    base_has_tenant = False
-    if isinstance(base_entity, dict):
-        props = base_entity.get('properties', {})
-        if 'tenant_id' in props:
-            base_has_tenant = True
-            print(f'\nBaseEntity HAS tenant_id: YES')
-        else:
-            print(f'\nBaseEntity HAS tenant_id: NO')
+    # Check if BaseEntity has tenant_id (through its own allOf chain)
+    base_entity = flattener.flatten(common_dir / 'base.yaml', '/BaseEntity')
+    print(f'\nBaseEntity HAS tenant_id: {"YES" if base_entity.has("tenant_id") else "NO"}')
     
     print()
     print('CHECKING MODULES FOR TENANT_ID COMPLIANCE...')
@@ -55,8 +46,7 @@ def check_tenant_compliance():
     for schema_file in sorted(schemas_dir.glob('*.yaml')):
         module_name = schema_file.stem
         try:
-            with open(schema_file, 'r', encoding='utf-8') as f:
-                content = yaml.safe_load(f)
+            content = flattener.resolver.document(schema_file)
             
             if not isinstance(content, dict):
                 continue
@@ -70,37 +60,11 @@ def check_tenant_compliance():
                     
                 entities_checked += 1
                 
-                # Check direct properties
-                props = entity_def.get('properties', {})
-                if 'tenant_id' in props:
+                # Effective properties through the full allOf chain (memoized per base)
+                effective = flattener.flatten(schema_file, join_pointer('', entity_name))
+                if effective.has('tenant_id'):
                     has_tenant_compliance = True
                     break
-                
-                # Check allOf references
-                all_of = entity_def.get('allOf', [])
-                if isinstance(all_of, list):
-                    for ref_item in all_of:
-                        if isinstance(ref_item, dict) and '$ref' in ref_item:
-                            ref_path = ref_item['$ref']
-                            
-                            # Check if it references BaseEntity
-                            if 'base.yaml#/BaseEntity' in ref_path and base_has_tenant:
-                                has_tenant_compliance = True
-                                break
-                            
-                            # Check if it references AuditableEntity (which extends BaseEntity)
-                            if 'base.yaml#/AuditableEntity' in ref_path and base_has_tenant:
-                                has_tenant_compliance = True
-                                break
-                                
-                            # Check other common entities that might have tenant_id
-                            if any(x in ref_path.lower() for x in ['baseentity', 'auditable', 'publishable']):
-                                if base_has_tenant:
-                                    has_tenant_compliance = True
-                                    break
-                
-                if has_tenant_compliance:
-                    break
             
             if has_tenant_compliance:
                 compliant_modules.append(module_name)
@@ -0,0 +1,585 @@
+#!/usr/bin/env python3
+"""
+Bundle the multi-file OpenAPI tree into one JSON document
+Starts at openapi.yaml and follows every $ref. Targets in other files
+(components/*.yaml, schemas/**) are hoisted into the bundle's components
+section under their own name and the reference is rewritten to
+'#/components/<section>/<Name>'. Path items referenced from paths: are
+inlined. Structurally identical inline object schemas that occur more than
+once are then replaced by a single shared component.
+
+Two output modes:
+    bundled       every $ref is local (#/components/...), default
+    dereferenced  every $ref is inlined except where that would recurse
+
+With --incremental the walked subtrees (one per path, entry component and
+hoisted target) are kept in .cache/bundle/ together with the files they
+were read from and the $refs they resolved. The next run reuses a subtree
+when its files are unchanged and replaying its $refs yields the same
+component names, so the output is byte-identical to a clean build.
+
+Usage:
+    python tools/spec_bundler.py                  # generated/openapi.bundle.json
+    python tools/spec_bundler.py --incremental
+    python tools/spec_bundler.py --dereference    # generated/openapi.bundle.deref.json
+    python tools/spec_bundler.py --no-dedup -o /tmp/bundle.json
+    python tools/spec_bundler.py --profile        # time each stage, see profiling.py
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from json_pointer import split_pointer
+from profiling import Profiler, add_profile_argument, profiler_from_args
+from ref_resolver import RefResolver, ResolveError
+from spec_loader import OPENAPI_ROOT
+
+BUNDLE_FILE = OPENAPI_ROOT / 'generated' / 'openapi.bundle.json'
+DEREF_BUNDLE_FILE = OPENAPI_ROOT / 'generated' / 'openapi.bundle.deref.json'
+MANIFEST_DIR = OPENAPI_ROOT / '.cache' / 'bundle'
+MANIFEST_FORMAT = 1
+
+# Component files whose top-level entries belong to a fixed components section
+COMPONENT_FILES = {
+    'components/responses.yaml': 'responses',
+    'components/parameters.yaml': 'parameters',
+}
+
+# Keys whose value is a schema, and keys whose children / items are schemas
+SCHEMA_KEYS = ('schema', 'items', 'additionalProperties', 'not')
+SCHEMA_LIST_KEYS = ('allOf', 'anyOf', 'oneOf')
+COMPOSITION_KEYS = ('properties',) + SCHEMA_LIST_KEYS
+
+_NAME_INVALID = re.compile(r'[^A-Za-z0-9._-]')
+
+def component_name(text):
+    """A valid components key (^[a-zA-Z0-9._-]+$) derived from text"""
+    return _NAME_INVALID.sub('_', str(text)) or 'Component'
+
+def ref_context(parent_key, grandparent_key):
+    """Components section for a $ref found at parent_key inside grandparent_key"""
+    if grandparent_key == 'paths':
+        return 'pathItems'
+    if grandparent_key == 'properties':
+        return 'schemas'
+    if parent_key == 'parameters' or grandparent_key == 'parameters':
+        return 'parameters'
+    if grandparent_key == 'responses':
+        return 'responses'
+    if parent_key == 'requestBody':
+        return 'requestBodies'
+    if grandparent_key == 'headers':
+        return 'headers'
+    if grandparent_key == 'examples':
+        return 'examples'
+    return 'schemas'
+
+def canonical(node):
+    """Stable text form used to compare schemas structurally"""
+    return json.dumps(node, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+
+class Bundler:
+    """Resolves and rewrites every $ref reachable from one entry document"""
+
+    def __init__(self, root=None, resolver=None, previous=None):
+        self.root = Path(root).resolve() if root else OPENAPI_ROOT
+        self.resolver = resolver or RefResolver(self.root)
+        self.components = {}
+        self.errors = []
+        self.hoisted = 0
+        self.inlined = 0
+        self.deduplicated = 0
+        self._names = {}
+        self._taken = {}
+        # Incremental state: units of the previous build and of this one
+        previous = previous or {}
+        self.previous_files = previous.get('files', {})
+        self.previous_units = previous.get('units', {})
+        self.units = {}
+        self.reused = []
+        self._frames = []
+        self._digests = {}
+
+    # -- bundling ------------------------------------------------------
+
+    def bundle(self, entry='openapi.yaml'):
+        """Bundled document with every $ref local to it"""
+        self.entry = (self.root / entry).resolve()
+        document = self.resolver.document(self.entry)
+        aliases = {}
+        for section, entries in (document.get('components') or {}).items():
+            self.components[section] = {}
+            self._taken[section] = set()
+            for name, value in (entries or {}).items():
+                self._names[(self.entry, f'/components/{section}/{name}')] = (section, name)
+                self._taken[section].add(name)
+                self.components[section][name] = None
+                # 'Name: {$ref: ./components/x.yaml#/Name}' - the target takes the entry's name
+                if isinstance(value, dict) and list(value) == ['$ref'] and isinstance(value['$ref'], str):
+                    try:
+                        target = self.resolver.locate(value['$ref'], self.entry)
+                        target_value = self.resolver.resolve_pointer(*target)
+                    except ResolveError:
+                        continue
+                    if target[0] != self.entry and target not in self._names:
+                        self._names[target] = (section, name)
+                        aliases[(section, name)] = (target[0], target_value)
+        for section, entries in (document.get('components') or {}).items():
+            for name, value in (entries or {}).items():
+                unit = f'component:{section}/{name}'
+                if (section, name) in aliases:
+                    target, target_value = aliases[(section, name)]
+                    self.components[section][name] = self._unit(
+                        unit, target, lambda: self._walk(target_value, target, section, name))
+                    self.hoisted += 1
+                else:
+                    self.components[section][name] = self._unit(
+                        unit, self.entry, lambda: self._walk(value, self.entry, section, name))
+
+        result = {}
+        for key, value in document.items():
+            if key == 'components':
+                result[key] = self.components
+            elif key == 'paths' and isinstance(value, dict):
+                result[key] = {
+                    path: self._unit(f'path:{path}', self.entry, lambda: self._walk(item, self.entry, key, path))
+                    for path, item in value.items()
+                }
+            else:
+                result[key] = self._unit(f'document:{key}', self.entry, lambda: self._walk(value, self.entry, None, key))
+        if 'components' not in result and self.components:
+            result['components'] = self.components
+        return result
+
+    def _walk(self, node, base_file, grandparent_key, parent_key):
+        if isinstance(node, dict):
+            ref = node.get('$ref')
+            if isinstance(ref, str):
+                return self._rewrite(node, ref, base_file, grandparent_key, parent_key)
+            return {k: self._walk(v, base_file, parent_key, k) for k, v in node.items()}
+        if isinstance(node, list):
+            return [self._walk(v, base_file, grandparent_key, parent_key) for v in node]
+        return node
+
+    def _rewrite(self, node, ref, base_file, grandparent_key, parent_key):
+        siblings = {k: self._walk(v, base_file, parent_key, k) for k, v in node.items() if k != '$ref'}
+        section = ref_context(parent_key, grandparent_key)
+        outcome, inline = self._resolve_ref(ref, base_file, section)
+        if self._frames:
+            frame = self._frames[-1]
+            frame['events'].append((self.resolver.relpath(base_file), ref, section, outcome))
+            if outcome[0] == 'inline':
+                frame['deps'].add(outcome[1])
+        if outcome[0] == 'error':
+            self.errors.append((self.resolver.relpath(base_file), ref, outcome[1]))
+            return dict(node)
+        if outcome[0] == 'keep':
+            return dict(node)  # local pointer outside components, still valid in the bundle
+        if outcome[0] == 'inline':
+            self.inlined += 1
+            inlined = self._walk(inline[1], inline[0], grandparent_key, parent_key)
+            return {**inlined, **siblings} if isinstance(inlined, dict) else inlined
+        return {'$ref': f'#/components/{outcome[1]}/{outcome[2]}', **siblings}
+
+    def _resolve_ref(self, ref, base_file, section):
+        """(outcome, inline target) for a $ref, hoisting its target when needed
+
+        outcome is ('error', message), ('keep',), ('inline', file) or
+        ('ref', section, name); it is what the incremental build replays.
+        """
+        try:
+            target, pointer = self.resolver.locate(ref, base_file)
+            value = self.resolver.resolve_pointer(target, pointer)
+        except ResolveError as e:
+            return ('error', str(e)), None
+        if (target, pointer) not in self._names:
+            if target == self.entry:
+                return ('keep',), None
+            if section == 'pathItems':
+                return ('inline', self.resolver.relpath(target)), (target, value)
+            self._hoist(target, pointer, value, section)
+        return ('ref',) + self._names[(target, pointer)], None
+
+    def _hoist(self, target, pointer, value, section):
+        relpath = self.resolver.relpath(target)
+        tokens = split_pointer(pointer)
+        if len(tokens) == 3 and tokens[0] == 'components':
+            section, base_name = tokens[1], tokens[2]
+        else:
+            section = COMPONENT_FILES.get(relpath, section)
+            base_name = tokens[-1] if tokens else target.stem
+        name = self._allocate(section, component_name(base_name), component_name(target.stem))
+        self._names[(target, pointer)] = (section, name)
+        entries = self.components.setdefault(section, {})
+        entries[name] = None  # placeholder keeps insertion order for recursive schemas
+        entries[name] = self._unit(f'hoist:{relpath}#{pointer}', target,
+                                   lambda: self._walk(value, target, section, name))
+        self.hoisted += 1
+
+    # -- incremental units --------------------------------------------
+
+    def _digest(self, relpath):
+        if relpath not in self._digests:
+            try:
+                with open(self.root / relpath, 'rb') as f:
+                    self._digests[relpath] = hashlib.sha256(f.read()).hexdigest()
+            except OSError:
+                self._digests[relpath] = None
+        return self._digests[relpath]
+
+    def _unit(self, key, base_file, walk):
+        """walk() for one top-level subtree, reused from the previous build when valid
+
+        A previous result is reused when the files it was read from are
+        unchanged and replaying its $refs in order yields the same outcomes
+        (same component names, same errors). Otherwise it is walked again.
+        """
+        previous = self.previous_units.get(key)
+        if previous is not None and all(self._digest(f) == self.previous_files.get(f) for f in previous['deps']):
+            errors = []
+            for base, ref, section, outcome in previous['events']:
+                replayed = self._resolve_ref(ref, self.root / base, section)[0]
+                if replayed != outcome:
+                    break
+                if outcome[0] == 'error':
+                    errors.append((base, ref, outcome[1]))
+                elif outcome[0] == 'inline':
+                    self.inlined += 1
+            else:
+                self.errors.extend(errors)
+                self.units[key] = previous
+                self.reused.append(key)
+                return previous['value']
+        frame = {'deps': {self.resolver.relpath(base_file)}, 'events': []}
+        self._frames.append(frame)
+        try:
+            value = walk()
+        finally:
+            self._frames.pop()
+        self.units[key] = {
+            'deps': sorted(frame['deps']),
+            'events': frame['events'],
+            'value': value,
+            'size': len(json.dumps(value, ensure_ascii=False)),
+        }
+        return value
+
+    def manifest(self):
+        """State the next incremental build starts from"""
+        files = sorted({f for unit in self.units.values() for f in unit['deps']})
+        return {
+            'format': MANIFEST_FORMAT,
+            'entry': self.resolver.relpath(self.entry),
+            'files': {f: self._digest(f) for f in files},
+            'units': self.units,
+        }
+
+    def reuse_stats(self):
+        """(reused units, total units, reused bytes, total bytes)"""
+        reused = set(self.reused)
+        total_bytes = sum(u['size'] for u in self.units.values())
+        reused_bytes = sum(u['size'] for k, u in self.units.items() if k in reused)
+        return len(reused), len(self.units), reused_bytes, total_bytes
+
+    def _allocate(self, section, base_name, qualifier):
+        taken = self._taken.setdefault(section, set())
+        name = base_name
+        if name in taken:
+            name = f'{base_name}_{qualifier}'
+        counter = 2
+        while name in taken:
+            name = f'{base_name}_{qualifier}_{counter}'
+            counter += 1
+        taken.add(name)
+        return name
+
+    # -- inline schema de-duplication ----------------------------------
+
+    def deduplicate(self, document):
+        """Replace repeated inline object schemas by one shared component"""
+        schemas = self.components.setdefault('schemas', {})
+        self._canon = {}
+        self._counts = {}
+        self._shared = {}
+        for name, schema in schemas.items():
+            if isinstance(schema, dict):
+                self._shared.setdefault(self._canonical(schema), name)
+        # Same traversal order for counting and rewriting: first copies are
+        # descended into, later copies are not (they become a $ref)
+        seen = set(self._shared)
+        for key, node, is_schema in self._dedup_roots(document):
+            self._count(node, key, is_schema, seen)
+        for key, node, is_schema in self._dedup_roots(document):
+            rewritten = self._dedup(node, key, is_schema)
+            if is_schema == 'named':
+                schemas[key] = rewritten
+            elif key in document and key != 'components':
+                document[key] = rewritten
+            else:
+                section, name = key
+                self.components[section][name] = rewritten
+        return document
+
+    def _dedup_roots(self, document):
+        """(key, node, is_schema) entry points in a fixed order"""
+        for name, schema in list(self.components.get('schemas', {}).items()):
+            yield name, schema, 'named'
+        for key, value in document.items():
+            if key != 'components':
+                yield key, value, False
+        for section, entries in self.components.items():
+            if section != 'schemas':
+                for name, value in list(entries.items()):
+                    yield (section, name), value, False
+
+    def _canonical(self, node):
+        key = id(node)
+        if key not in self._canon:
+            self._canon[key] = (canonical(node), node)
+        return self._canon[key][0]
+
+    @staticmethod
+    def _is_candidate(node):
+        return isinstance(node, dict) and '$ref' not in node and any(k in node for k in COMPOSITION_KEYS)
+
+    @staticmethod
+    def _iter_children(node, is_schema):
+        """Yield (key, child, child_is_schema) for the children of node
+
+        child_is_schema is True for a schema, 'map' / 'list' for a mapping or
+        list of schemas (properties, allOf...) and False otherwise.
+        """
+        if isinstance(node, dict):
+            for key, value in node.items():
+                if key in SCHEMA_KEYS:
+                    yield key, value, True
+                elif is_schema and key == 'properties' and isinstance(value, dict):
+                    yield key, value, 'map'
+                elif is_schema and key in SCHEMA_LIST_KEYS and isinstance(value, list):
+                    yield key, value, 'list'
+                else:
+                    yield key, value, False
+        elif isinstance(node, list):
+            for index, value in enumerate(node):
+                yield index, value, False
+
+    def _count(self, node, key, is_schema, seen):
+        if not isinstance(node, (dict, list)):
+            return
+        if is_schema == 'map' or is_schema == 'list':
+            for value in (node.values() if is_schema == 'map' else node):
+                self._count(value, key, True, seen)
+            return
+        if is_schema is True and self._is_candidate(node):
+            canon = self._canonical(node)
+            self._counts[canon] = self._counts.get(canon, 0) + 1
+            if canon in seen:
+                return
+            seen.add(canon)
+        for child_key, child, child_is_schema in self._iter_children(node, is_schema in (True, 'named')):
+            self._count(child, child_key, child_is_schema, seen)
+
+    def _dedup(self, node, key, is_schema):
+        if not isinstance(node, (dict, list)):
+            return node
+        if is_schema == 'map':
+            return {k: self._dedup(v, k, True) for k, v in node.items()}
+        if is_schema == 'list':
+            return [self._dedup(v, key, True) for v in node]
+        if is_schema is True and self._is_candidate(node):
+            canon = self._canonical(node)
+            if canon in self._shared:
+                self.deduplicated += 1
+                return {'$ref': f'#/components/schemas/{self._shared[canon]}'}
+            if self._counts.get(canon, 0) > 1:
+                title = node.get('title')
+                digest = hashlib.sha1(canon.encode('utf-8')).hexdigest()[:8]
+                base_name = component_name(title) if isinstance(title, str) else f'InlineSchema_{digest}'
+                name = self._allocate('schemas', base_name, digest)
+                self._shared[canon] = name
+                self.components['schemas'][name] = None
+                self.components['schemas'][name] = self._dedup_children(node, True)
+                self.deduplicated += 1
+                return {'$ref': f'#/components/schemas/{name}'}
+        return self._dedup_children(node, is_schema in (True, 'named'))
+
+    def _dedup_children(self, node, is_schema):
+        if isinstance(node, dict):
+            return {k: self._dedup(v, k, s) for k, v, s in self._iter_children(node, is_schema)}
+        return [self._dedup(v, k, s) for k, v, s in self._iter_children(node, is_schema)]
+
+    # -- dereferencing -------------------------------------------------
+
+    def dereference(self, document):
+        """Inline every #/components ref; refs that would recurse are kept"""
+        self._memo = {}
+        result = {}
+        for key, value in document.items():
+            if key == 'components':
+                result[key] = {
+                    section: {name: self._deref(value, [(section, name)])[0] for name, value in entries.items()}
+                    for section, entries in value.items()
+                }
+            else:
+                result[key] = self._deref(value, [])[0]
+        return result
+
+    def _deref(self, node, stack):
+        """(dereferenced node, True when it still holds a recursive $ref)"""
+        if isinstance(node, list):
+            items = [self._deref(v, stack) for v in node]
+            return [v for v, _ in items], any(r for _, r in items)
+        if not isinstance(node, dict):
+            return node, False
+        ref = node.get('$ref')
+        if isinstance(ref, str) and ref.startswith('#/components/'):
+            tokens = split_pointer(ref[1:])
+            if len(tokens) == 3:
+                key = (tokens[1], tokens[2])
+                target = self.components.get(key[0], {}).get(key[1])
+                if target is not None:
+                    if key in stack:
+                        return dict(node), True
+                    if key in self._memo:
+                        value, recursive = self._memo[key], False
+                    else:
+                        value, recursive = self._deref(target, stack + [key])
+                        if not recursive:
+                            self._memo[key] = value
+                    siblings = [(k, self._deref(v, stack)) for k, v in node.items() if k != '$ref']
+                    if siblings and isinstance(value, dict):
+                        value = dict(value)
+                        for k, (v, r) in siblings:
+                            value[k] = v
+                            recursive = recursive or r
+                    return value, recursive
+        items = [(k, self._deref(v, stack)) for k, v in node.items()]
+        return {k: v for k, (v, _) in items}, any(r for _, (_, r) in items)
+
+def manifest_path(output):
+    return MANIFEST_DIR / f'{Path(output).name}.manifest.pickle'
+
+def load_manifest(output, entry='openapi.yaml'):
+    """Manifest of the previous build of output, or None"""
+    try:
+        with open(manifest_path(output), 'rb') as f:
+            manifest = pickle.load(f)
+    except Exception:
+        return None
+    if not isinstance(manifest, dict) or manifest.get('format') != MANIFEST_FORMAT or manifest.get('entry') != entry:
+        return None
+    return manifest
+
+def save_manifest(output, manifest):
+    path = manifest_path(output)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(manifest, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+
+def build_bundle(entry='openapi.yaml', dereference=False, dedup=True, root=None, previous=None, profiler=None):
+    """(document, Bundler) for entry, reusing unchanged units of previous (a manifest)"""
+    profiler = profiler or Profiler('spec-bundler', enabled=False)
+    bundler = Bundler(root, previous=previous)
+    # Files are parsed on first use, so 'load' is part of 'bundle' (and of 'resolve')
+    with profiler.span('bundle'), profiler.measure(RefResolver, ('document',), 'load'), \
+            profiler.measure(RefResolver, ('locate', 'resolve_pointer', 'resolve')):
+        document = bundler.bundle(entry)
+    if dedup:
+        with profiler.span('dedup'):
+            document = bundler.deduplicate(document)
+    if dereference:
+        with profiler.span('dereference'):
+            document = bundler.dereference(document)
+    return document, bundler
+
+def dump_bundle(document):
+    """Serialized bundle; stable for identical input"""
+    return json.dumps(document, indent=2, ensure_ascii=False) + '\n'
+
+def write_bundle(text, output):
+    """Write text to output atomically"""
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=output.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, output)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def main():
+    parser = argparse.ArgumentParser(description='Bundle openapi.yaml and its $refs into one JSON file')
+    parser.add_argument('--entry', default='openapi.yaml', help='entry document relative to openapi/')
+    parser.add_argument('-o', '--output', help='output file (default: generated/openapi.bundle[.deref].json)')
+    parser.add_argument('--dereference', action='store_true', help='inline every $ref instead of hoisting')
+    parser.add_argument('--no-dedup', action='store_true', help='keep repeated inline schemas inline')
+    parser.add_argument('--strict', action='store_true', help='exit 1 when a $ref cannot be resolved')
+    parser.add_argument('--incremental', action='store_true',
+                        help='reuse unchanged parts of the previous build (see .cache/bundle/)')
+    add_profile_argument(parser)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    profiler = profiler_from_args('spec-bundler', args)
+    output = Path(args.output) if args.output else (DEREF_BUNDLE_FILE if args.dereference else BUNDLE_FILE)
+    previous = load_manifest(output, args.entry) if args.incremental else None
+    document, bundler = build_bundle(args.entry, args.dereference, not args.no_dedup, previous=previous,
+                                     profiler=profiler)
+    with profiler.span('serialize'):
+        text = dump_bundle(document)
+    with profiler.span('write'):
+        try:
+            unchanged = output.read_text(encoding='utf-8') == text
+        except OSError:
+            unchanged = False
+        if not unchanged:
+            write_bundle(text, output)
+        if args.incremental:
+            save_manifest(output, bundler.manifest())
+    elapsed = (time.perf_counter() - start) * 1000
+
+    print('=' * 60)
+    print('OPENAPI BUNDLE')
+    print('=' * 60)
+    print(f'Mode:               {"dereferenced" if args.dereference else "bundled"}')
+    print(f'Output:             {output}')
+    print(f'Size:               {len(text.encode("utf-8")) / 1024:.1f} KB')
+    print(f'Files parsed:       {bundler.resolver.parses}')
+    print(f'Hoisted components: {bundler.hoisted}')
+    print(f'Inlined path items: {bundler.inlined}')
+    print(f'Deduplicated:       {bundler.deduplicated} inline schemas')
+    for section, entries in bundler.components.items():
+        print(f'  components.{section:16} {len(entries)}')
+    if args.incremental:
+        reused, total, reused_bytes, total_bytes = bundler.reuse_stats()
+        share = reused_bytes / total_bytes * 100 if total_bytes else 0.0
+        print(f'Reused:             {reused}/{total} units, {share:.1f}% of the bundle'
+              f'{"" if previous else " (no previous build)"}')
+        print(f'Output changed:     {"no" if unchanged else "yes"}')
+    print(f'Time:               {elapsed:.1f} ms')
+
+    if bundler.errors:
+        print(f'\n⚠️  UNRESOLVED REFERENCES ({len(bundler.errors)}), left as written:')
+        for file, ref, error in bundler.errors:
+            print(f'  {file}: {ref}')
+            print(f'    Issue: {error}')
+    profiler.finish(args.profile)
+    return 1 if args.strict and bundler.errors else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
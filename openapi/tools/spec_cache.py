@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+On-disk parse cache for the OpenAPI YAML tree
+Parsed documents are pickled under openapi/.cache/parse, keyed by the SHA-256
+of the file content (salted with the cache format, PyYAML version and loader),
+so an edited file can never be served from a stale entry. Entries are touched
+on every hit and the least recently used ones are evicted once the cache grows
+past its size bound.
+"""
+
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+from pathlib import Path
+
+CACHE_FORMAT = 1
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+_MISS = object()
+
+class ParseCache:
+    """Content-addressed store of parsed YAML documents"""
+
+    def __init__(self, cache_dir, salt='', max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.salt = f'{CACHE_FORMAT}:{salt}'.encode('utf-8')
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._size = None
+
+    def key(self, data):
+        """Cache key for raw file bytes"""
+        digest = hashlib.sha256(self.salt)
+        digest.update(b'\0')
+        digest.update(data)
+        return digest.hexdigest()
+
+    def _entry_path(self, key):
+        return self.cache_dir / key[:2] / f'{key}.pickle'
+
+    def get(self, key, default=None):
+        """Return the cached tree for key, or default on a miss"""
+        entry = self._entry_path(key)
+        try:
+            with open(entry, 'rb') as f:
+                tree = pickle.load(f)
+        except FileNotFoundError:
+            self.misses += 1
+            return default
+        except Exception:
+            # Truncated or foreign entry - drop it and reparse
+            self._remove(entry)
+            self.misses += 1
+            return default
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+        self.hits += 1
+        return tree
+
+    def put(self, key, tree):
+        """Store a parsed tree, evicting old entries if the bound is exceeded"""
+        entry = self._entry_path(key)
+        payload = pickle.dumps(tree, protocol=pickle.HIGHEST_PROTOCOL)
+        try:
+            entry.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=entry.parent, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, entry)
+        except OSError:
+            # A read-only checkout must never break validation
+            return
+        if self._size is not None:
+            self._size += len(payload)
+        if self.size() > self.max_bytes:
+            self.evict()
+
+    def load(self, data, parse):
+        """Return the tree for raw file bytes, calling parse(text) on a miss"""
+        key = self.key(data)
+        tree = self.get(key, _MISS)
+        if tree is _MISS:
+            tree = parse(data.decode('utf-8'))
+            self.put(key, tree)
+        return tree
+
+    def _entries(self):
+        if not self.cache_dir.exists():
+            return []
+        return [p for p in self.cache_dir.glob('*/*.pickle') if p.is_file()]
+
+    def size(self):
+        """Total bytes currently held by the cache"""
+        if self._size is None:
+            self._size = sum(p.stat().st_size for p in self._entries())
+        return self._size
+
+    def evict(self, target_bytes=None):
+        """Drop least recently used entries until the cache fits target_bytes"""
+        if target_bytes is None:
+            target_bytes = int(self.max_bytes * 0.8)
+        entries = []
+        for p in self._entries():
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+        entries.sort(key=lambda e: e[0])
+        total = sum(e[1] for e in entries)
+        removed = 0
+        for _, size, p in entries:
+            if total <= target_bytes:
+                break
+            self._remove(p)
+            total -= size
+            removed += 1
+        self._size = total
+        return removed
+
+    def clear(self):
+        """Remove every entry"""
+        removed = 0
+        for p in self._entries():
+            self._remove(p)
+            removed += 1
+        self._size = 0
+        return removed
+
+    @staticmethod
+    def _remove(path):
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+def main():
+    from spec_loader import get_parse_cache, iter_spec_files, load_yaml
+
+    cache = get_parse_cache()
+    if cache is None:
+        print('Parse cache is disabled (OPENAPI_PARSE_CACHE=0)')
+        return 0
+
+    if '--clear' in sys.argv:
+        print(f'Removed {cache.clear()} cache entries from {cache.cache_dir}')
+        return 0
+
+    if '--warm' in sys.argv:
+        for file_path in iter_spec_files():
+            load_yaml(file_path)
+        print(f'Warmed cache: {cache.hits} hits, {cache.misses} misses')
+
+    entries = cache._entries()
+    print(f'Cache directory: {cache.cache_dir}')
+    print(f'Entries: {len(entries)}')
+    print(f'Size: {cache.size() / 1024:.1f} KB / {cache.max_bytes / 1024 / 1024:.0f} MB')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
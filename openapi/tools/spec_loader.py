@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Shared YAML loader for the OpenAPI Python tools
+Uses the libyaml C parser (CSafeLoader) when PyYAML was built with it and
+falls back to the pure-Python SafeLoader otherwise. Both produce identical
+trees, the C loader is roughly an order of magnitude faster.
+
+Files are looked up in the content-hash parse cache (see spec_cache.py)
+before they are parsed. Set OPENAPI_PARSE_CACHE=0 to bypass it.
+
+load_spec_tree() loads whole directories, optionally across a process
+pool, and merges the results into a SpecTree in sorted path order so the
+outcome never depends on worker scheduling.
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import yaml
+
+from spec_cache import ParseCache
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+    LIBYAML = True
+except ImportError:
+    from yaml import SafeLoader
+    LIBYAML = False
+
+OPENAPI_ROOT = Path(__file__).resolve().parent.parent
+CACHE_DIR = OPENAPI_ROOT / '.cache' / 'parse'
+
+# Directories loaded by default: every paths/ and schemas/ group plus components/
+SPEC_DIRS = ('paths/*', 'schemas/*', 'components')
+
+_parse_cache = None
+
+def loader_name():
+    """Name of the loader in use, for report headers"""
+    return 'CSafeLoader (libyaml)' if LIBYAML else 'SafeLoader (pure Python)'
+
+def load_yaml_text(text, name=None):
+    """Parse a YAML string with the fastest available safe loader"""
+    if name is not None:
+        # Named stream so parser errors point at the file, not "<unicode string>"
+        text = io.StringIO(text)
+        text.name = name
+    return yaml.load(text, Loader=SafeLoader)
+
+def get_parse_cache():
+    """Shared parse cache, or None when disabled via OPENAPI_PARSE_CACHE=0"""
+    global _parse_cache
+    if os.environ.get('OPENAPI_PARSE_CACHE', '1') == '0':
+        return None
+    if _parse_cache is None:
+        salt = f'{yaml.__version__}:{loader_name()}'
+        _parse_cache = ParseCache(os.environ.get('OPENAPI_CACHE_DIR', CACHE_DIR), salt=salt)
+    return _parse_cache
+
+def load_yaml(file_path, cache=True):
+    """Load a YAML file with the fastest available safe loader, consulting the parse cache first"""
+    parse_cache = get_parse_cache() if cache else None
+    if parse_cache is None:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return yaml.load(f, Loader=SafeLoader)
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    return parse_cache.load(data, lambda text: load_yaml_text(text, name=str(file_path)))
+
+def iter_spec_files(root=None):
+    """Yield every spec YAML file (openapi.yaml, paths/, schemas/, components/) in stable order"""
+    root = Path(root) if root else OPENAPI_ROOT
+    main_file = root / 'openapi.yaml'
+    if main_file.exists():
+        yield main_file
+    for section in ('paths', 'schemas', 'components'):
+        section_dir = root / section
+        if section_dir.exists():
+            yield from sorted(section_dir.rglob('*.yaml'))
+
+class SpecTree:
+    """Documents loaded from one or more spec directories, keyed by resolved path"""
+
+    def __init__(self, root=None):
+        self.root = Path(root) if root else OPENAPI_ROOT
+        self.documents = {}
+        self.errors = {}
+        # Wall time of reading and parsing each file, in milliseconds
+        self.load_ms = {}
+
+    def __contains__(self, file_path):
+        file_path = Path(file_path).resolve()
+        return file_path in self.documents or file_path in self.errors
+
+    def files(self, directory=None):
+        """Loaded files (including failed ones) under directory, in sorted order"""
+        all_files = sorted(set(self.documents) | set(self.errors))
+        if directory is None:
+            return all_files
+        directory = Path(directory).resolve()
+        return [f for f in all_files if f.parent == directory]
+
+    def get(self, file_path):
+        """Parsed document for file_path; re-raises the load error if it failed"""
+        file_path = Path(file_path).resolve()
+        if file_path in self.errors:
+            raise self.errors[file_path]
+        return self.documents[file_path]
+
+    def relpath(self, file_path):
+        return Path(file_path).resolve().relative_to(self.root).as_posix()
+
+def _load_one(file_path):
+    start = time.perf_counter()
+    try:
+        document, error = load_yaml(file_path), None
+    except Exception as e:
+        document, error = None, e
+    return file_path, document, error, (time.perf_counter() - start) * 1000
+
+def resolve_jobs(jobs):
+    """Normalise a --jobs value: 0 or None means one worker per CPU"""
+    if not jobs:
+        return os.cpu_count() or 1
+    return max(1, jobs)
+
+def load_spec_tree(dirs=None, jobs=1, root=None, files=None):
+    """Load every *.yaml in dirs (glob patterns relative to root) into a SpecTree
+
+    files, when given, is an explicit list of files to load instead of dirs.
+    """
+    tree = SpecTree(root)
+    if files is not None:
+        files = [Path(f).resolve() for f in files]
+    else:
+        files = []
+        for pattern in dirs or SPEC_DIRS:
+            for directory in sorted(tree.root.glob(pattern)):
+                if directory.is_dir():
+                    files.extend(p.resolve() for p in directory.glob('*.yaml'))
+    files = sorted(set(files))
+
+    jobs = min(resolve_jobs(jobs), len(files) or 1)
+    if jobs == 1:
+        results = map(_load_one, files)
+    else:
+        # Biggest files first so one large document does not finish last
+        by_size = sorted(files, key=lambda p: p.stat().st_size, reverse=True)
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(_load_one, by_size))
+
+    loaded = {}
+    for file_path, document, error, elapsed in results:
+        loaded[file_path] = (document, error)
+        tree.load_ms[file_path] = elapsed
+    for file_path in files:
+        document, error = loaded[file_path]
+        if error is not None:
+            tree.errors[file_path] = error
+        else:
+            tree.documents[file_path] = document
+    return tree
+
+def add_jobs_argument(parser):
+    """Register the shared --jobs option on an argparse parser"""
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='parse files across N worker processes (0 = one per CPU)')
+
+def main():
+    parser = argparse.ArgumentParser(description='Time a full load of the OpenAPI tree')
+    parser.add_argument('--tree', action='store_true',
+                        help='load paths/, schemas/ and components/ through load_spec_tree()')
+    add_jobs_argument(parser)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.tree:
+        tree = load_spec_tree(jobs=args.jobs)
+        count, errors = len(tree.documents), len(tree.errors)
+    else:
+        files = list(iter_spec_files())
+        for file_path in files:
+            load_yaml(file_path)
+        count, errors = len(files), 0
+    elapsed = (time.perf_counter() - start) * 1000
+
+    print(f'Loader: {loader_name()}')
+    parse_cache = get_parse_cache()
+    if parse_cache is not None and not (args.tree and resolve_jobs(args.jobs) > 1):
+        print(f'Parse cache: {parse_cache.hits} hits, {parse_cache.misses} misses')
+    if args.tree:
+        print(f'Jobs: {resolve_jobs(args.jobs)}')
+    print(f'Loaded {count} files ({errors} errors) in {elapsed:.1f} ms ({elapsed / max(count, 1):.2f} ms/file)')
+    return 0 if not errors else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Lazy, reachability-based loading of the OpenAPI tree
+Starts at openapi.yaml and follows the $ref closure: a file is parsed only
+when some reached fragment points into it, and only the reached fragments
+are walked for further references. Everything under paths/, schemas/ and
+components/ that is never reached is reported as dead.
+
+Usage:
+    python tools/spec_reach.py            # summary
+    python tools/spec_reach.py --dead     # list unreachable spec files
+    python tools/spec_reach.py --json     # machine-readable result
+"""
+
+import argparse
+import json
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+from json_pointer import join_pointer, parent_pointers, parse_ref, resolve_pointer
+from spec_loader import OPENAPI_ROOT, SpecTree, iter_spec_files, load_yaml
+
+def iter_refs(value, pointer=''):
+    """Yield (pointer, ref) for every $ref below value, in document order"""
+    stack = [(pointer, value)]
+    while stack:
+        pointer, value = stack.pop()
+        if isinstance(value, dict):
+            ref = value.get('$ref')
+            if isinstance(ref, str):
+                yield pointer, ref
+            children = [(join_pointer(pointer, k), v) for k, v in value.items() if isinstance(v, (dict, list))]
+        elif isinstance(value, list):
+            children = [(join_pointer(pointer, i), v) for i, v in enumerate(value) if isinstance(v, (dict, list))]
+        else:
+            continue
+        stack.extend(reversed(children))
+
+class Reachability:
+    """$ref closure of one or more entry documents"""
+
+    def __init__(self, root=None, lenient=False):
+        self.root = Path(root).resolve() if root else OPENAPI_ROOT
+        # lenient: follow legacy '#Name' fragments as if they were '#/Name'
+        self.lenient = lenient
+        self.documents = {}
+        self.load_errors = {}
+        self.fragments = defaultdict(set)
+        self.unresolved = []
+        self._walked = defaultdict(set)
+
+    def relpath(self, file_path):
+        try:
+            return Path(file_path).relative_to(self.root).as_posix()
+        except ValueError:
+            return str(file_path)
+
+    def _document(self, file_path):
+        if file_path not in self.documents and file_path not in self.load_errors:
+            try:
+                self.documents[file_path] = load_yaml(file_path)
+            except Exception as e:
+                self.load_errors[file_path] = e
+        return self.documents.get(file_path)
+
+    def _covered(self, file_path, pointer):
+        walked = self._walked[file_path]
+        return pointer in walked or any(p in walked for p in parent_pointers(pointer))
+
+    def walk(self, entry='openapi.yaml', pointer=''):
+        """Follow every $ref reachable from entry#pointer"""
+        queue = [(Path(self.root / entry).resolve(), pointer)]
+        self.fragments[queue[0][0]].add(pointer)
+        while queue:
+            file_path, pointer = queue.pop()
+            if self._covered(file_path, pointer):
+                continue
+            document = self._document(file_path)
+            if document is None and file_path in self.load_errors:
+                continue
+            self._walked[file_path].add(pointer)
+            try:
+                fragment = resolve_pointer(document, pointer)
+            except (KeyError, ValueError):
+                # Already recorded as unresolved by the referrer
+                continue
+            for site, ref in iter_refs(fragment, pointer):
+                target, target_pointer = parse_ref(ref, file_path)
+                if target is None:
+                    continue  # remote reference, out of scope
+                if not target.exists():
+                    self.unresolved.append((file_path, site, ref, 'file not found'))
+                    continue
+                if target_pointer and not target_pointer.startswith('/'):
+                    self.unresolved.append((file_path, site, ref, 'fragment is not a JSON pointer'))
+                    if not self.lenient:
+                        continue
+                    target_pointer = '/' + target_pointer
+                target_document = self._document(target)
+                if target_document is None and target in self.load_errors:
+                    self.unresolved.append((file_path, site, ref, 'target failed to load'))
+                    continue
+                try:
+                    resolve_pointer(target_document, target_pointer)
+                except (KeyError, ValueError) as e:
+                    self.unresolved.append((file_path, site, ref, str(e).strip('"\'')))
+                    continue
+                self.fragments[target].add(target_pointer)
+                if not self._covered(target, target_pointer):
+                    queue.append((target, target_pointer))
+        return self
+
+    @property
+    def files(self):
+        return sorted(self.documents)
+
+    def dead_files(self):
+        """Spec files that the closure never touched"""
+        reached = set(self.documents) | set(self.load_errors)
+        return [f for f in iter_spec_files(self.root) if f.resolve() not in reached]
+
+    def to_tree(self):
+        """The reached documents as a SpecTree, for the rule engine and validators"""
+        tree = SpecTree(self.root)
+        for file_path in sorted(self.documents):
+            tree.documents[file_path] = self.documents[file_path]
+        for file_path, error in self.load_errors.items():
+            tree.errors[file_path] = error
+        return tree
+
+def load_reachable_tree(entry='openapi.yaml', root=None):
+    """SpecTree holding only the files reachable from entry"""
+    return Reachability(root).walk(entry).to_tree()
+
+def main():
+    parser = argparse.ArgumentParser(description='Report the $ref closure of openapi.yaml')
+    parser.add_argument('--entry', default='openapi.yaml', help='entry document relative to openapi/')
+    parser.add_argument('--dead', action='store_true', help='list spec files that are never reached')
+    parser.add_argument('--json', action='store_true', help='print the result as JSON')
+    args = parser.parse_args()
+
+    reach = Reachability().walk(args.entry)
+    dead = reach.dead_files()
+
+    if args.json:
+        print(json.dumps({
+            'entry': args.entry,
+            'files': {reach.relpath(f): sorted(reach.fragments[f]) for f in reach.files},
+            'dead_files': [reach.relpath(f) for f in dead],
+            'unresolved': [
+                {'file': reach.relpath(f), 'pointer': p, 'ref': r, 'error': e}
+                for f, p, r, e in reach.unresolved
+            ],
+        }, indent=2))
+        return 0
+
+    print('=' * 60)
+    print(f'REACHABILITY FROM {args.entry}')
+    print('=' * 60)
+    for file_path in reach.files:
+        fragments = reach.fragments[file_path]
+        scope = 'whole file' if '' in fragments else f'{len(fragments)} fragments'
+        print(f'  {reach.relpath(file_path):55} {scope}')
+    print()
+    print(f'Reached files:    {len(reach.files)}')
+    print(f'Dead spec files:  {len(dead)}')
+    print(f'Unresolved refs:  {len(reach.unresolved)}')
+
+    if args.dead and dead:
+        print('\nDEAD FILES (not reachable from the entry document):')
+        for file_path in dead:
+            print(f'  - {reach.relpath(file_path)}')
+
+    if reach.unresolved:
+        print('\nUNRESOLVED REFERENCES:')
+        for file_path, pointer, ref, error in reach.unresolved:
+            print(f'  {reach.relpath(file_path)}#{pointer}')
+            print(f'    Ref: {ref}')
+            print(f'    Issue: {error}')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Global symbol table of operationIds, tags and x-permissions
+Filled from the rule engine walk (SymbolTableRule in validation_rules.py),
+so it costs no extra pass over the tree. Every symbol keeps the sites that
+define or use it:
+
+- operationId:  each operation carrying it (file, pointer, method, path)
+- tag:          operations tagged with it, plus its openapi.yaml#/tags entry
+- permission:   each operation listing it in x-permissions
+
+operationIds must be unique; fix-separated-endpoints.py derives
+x-permissions from them, so a duplicate silently merges two permissions.
+Near-duplicates are names that only differ in case or separators
+(getFaqItem / get_faq_item / get-FAQ-item).
+
+The table is written to generated/symbol-index.json. Other tools and
+generators load it with SymbolTable.load() and query it
+(operation(), tag(), permission(), similar()) without reparsing the spec.
+
+Usage:
+    python tools/symbol_table.py                       # report and write the index
+    python tools/symbol_table.py --query getFaqItem    # look a name up in the index
+    python tools/symbol_table.py --json
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+from pathlib import Path
+
+from spec_loader import OPENAPI_ROOT
+
+INDEX_FILE = OPENAPI_ROOT / 'generated' / 'symbol-index.json'
+INDEX_FORMAT = 1
+KINDS = ('operationId', 'tag', 'permission')
+
+_SEPARATORS = re.compile(r'[\s_.:/-]+')
+
+def normalize(name):
+    """Comparison key that ignores case and separators"""
+    return _SEPARATORS.sub('', str(name)).casefold()
+
+class SymbolTable:
+    """Sites of every operationId, tag and x-permission, queryable by name"""
+
+    def __init__(self):
+        self.symbols = {kind: {} for kind in KINDS}
+        self._keys = None
+
+    def _add(self, kind, name, site):
+        self.symbols[kind].setdefault(str(name), []).append(site)
+        self._keys = None
+
+    def add_operation(self, file, pointer, method, path, operation):
+        """Record the symbols an operation object defines or uses"""
+        site = {'file': file, 'pointer': pointer, 'method': method.upper(), 'path': path}
+        operation_id = operation.get('operationId')
+        if isinstance(operation_id, str):
+            site['operationId'] = operation_id
+            self._add('operationId', operation_id, site)
+        tags = operation.get('tags')
+        for tag in tags if isinstance(tags, list) else ():
+            if isinstance(tag, str):
+                self._add('tag', tag, site)
+        permissions = operation.get('x-permissions')
+        for permission in permissions if isinstance(permissions, list) else ():
+            if isinstance(permission, str):
+                self._add('permission', permission, site)
+
+    def declare_tag(self, file, pointer, name):
+        """Record a tag declared in a top-level tags list"""
+        self._add('tag', name, {'file': file, 'pointer': pointer, 'declared': True})
+
+    def operation(self, operation_id):
+        """Sites of operationId (more than one is a duplicate)"""
+        return self.symbols['operationId'].get(operation_id, [])
+
+    def tag(self, name):
+        return self.symbols['tag'].get(name, [])
+
+    def permission(self, name):
+        return self.symbols['permission'].get(name, [])
+
+    def similar(self, name, kinds=KINDS):
+        """{kind: [names]} whose case- and separator-insensitive key equals name's"""
+        if self._keys is None:
+            self._keys = {}
+            for kind, names in self.symbols.items():
+                for symbol in names:
+                    self._keys.setdefault((kind, normalize(symbol)), []).append(symbol)
+        key = normalize(name)
+        return {kind: sorted(self._keys[(kind, key)]) for kind in kinds if (kind, key) in self._keys}
+
+    def duplicates(self):
+        """(name, sites) of every operationId used by more than one operation"""
+        return [(name, sites) for name, sites in sorted(self.symbols['operationId'].items()) if len(sites) > 1]
+
+    def near_duplicates(self, kind):
+        """Groups of names of kind that differ only in case or separators"""
+        groups = {}
+        for name in self.symbols[kind]:
+            groups.setdefault(normalize(name), []).append(name)
+        return [sorted(names) for _, names in sorted(groups.items()) if len(names) > 1]
+
+    def to_dict(self):
+        return {'format': INDEX_FORMAT, **{kind: dict(sorted(self.symbols[kind].items())) for kind in KINDS}}
+
+    @classmethod
+    def from_dict(cls, data):
+        table = cls()
+        for kind in KINDS:
+            table.symbols[kind] = data.get(kind, {})
+        return table
+
+    def save(self, path=None):
+        """Write the index atomically"""
+        path = Path(path) if path else INDEX_FILE
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+                f.write('\n')
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path=None):
+        """Table from a written index; raises ValueError when it is of another format"""
+        path = Path(path) if path else INDEX_FILE
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('format') != INDEX_FORMAT:
+            raise ValueError(f'{path}: unsupported symbol index format {data.get("format")!r}')
+        return cls.from_dict(data)
+
+def _site(site):
+    if site.get('declared'):
+        return f'{site["file"]}#{site["pointer"]} (declared)'
+    return f'{site["method"]} {site["path"]}  ({site["file"]})'
+
+def build_table(root=None):
+    """SymbolTable of openapi.yaml and every path file"""
+    from rule_engine import RuleEngine
+    from spec_loader import iter_spec_files, load_spec_tree
+    from validation_rules import SymbolTableRule
+
+    root = Path(root) if root else OPENAPI_ROOT
+    files = [f for f in iter_spec_files(root)
+             if f.name == 'openapi.yaml' or f.relative_to(root).parts[0] == 'paths']
+    rule = SymbolTableRule()
+    RuleEngine([rule]).run(load_spec_tree(files=files, root=root))
+    return rule
+
+def main():
+    parser = argparse.ArgumentParser(description='Index operationIds, tags and x-permissions and report duplicates')
+    parser.add_argument('--query', metavar='NAME', help='look NAME up in the written index instead of rebuilding it')
+    parser.add_argument('--index', default=str(INDEX_FILE), help='index file (default: generated/symbol-index.json)')
+    parser.add_argument('--json', action='store_true', help='print the findings as JSON')
+    args = parser.parse_args()
+
+    if args.query:
+        try:
+            table = SymbolTable.load(args.index)
+        except (OSError, ValueError) as e:
+            print(f'❌ Could not read the symbol index: {e}', file=sys.stderr)
+            return 2
+        found = False
+        for kind in KINDS:
+            sites = table.symbols[kind].get(args.query, [])
+            if sites:
+                found = True
+                print(f'{kind} {args.query}:')
+                for site in sites:
+                    print(f'  {_site(site)}')
+        for kind, names in table.similar(args.query).items():
+            others = [name for name in names if name != args.query]
+            if others:
+                found = True
+                print(f'similar {kind}: {", ".join(others)}')
+        return 0 if found else 1
+
+    rule = build_table()
+    rule.table.save(args.index)
+    if args.json:
+        print(json.dumps([f.to_dict() for f in rule.findings], indent=2))
+        return 1 if rule.table.duplicates() else 0
+
+    table = rule.table
+    print('=' * 60)
+    print('SYMBOL TABLE')
+    print('=' * 60)
+    print(f'operationIds: {len(table.symbols["operationId"])}   tags: {len(table.symbols["tag"])}   '
+          f'permissions: {len(table.symbols["permission"])}')
+    print(f'Index:        {args.index}')
+    print()
+    duplicates = table.duplicates()
+    for name, sites in duplicates:
+        print(f'❌ operationId "{name}" used by {len(sites)} operations:')
+        for site in sites:
+            print(f'    {_site(site)}')
+    for kind in KINDS:
+        for names in table.near_duplicates(kind):
+            print(f'⚠️  {kind} near-duplicates: {", ".join(names)}')
+            for name in names:
+                for site in table.symbols[kind][name]:
+                    print(f'    {name}: {_site(site)}')
+    if not rule.findings:
+        print('✅ No duplicate or near-duplicate symbols')
+    return 1 if duplicates else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
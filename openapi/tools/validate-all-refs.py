@@ -4,83 +4,29 @@ Validate all $ref paths in OpenAPI files to ensure they are correctly formatted
 and point to existing components.
 """
 
-import re
 import json
+import sys
 from pathlib import Path
 from collections import defaultdict
 
-def load_yaml_simple(file_path):
-    """Simple YAML loader to extract top-level keys."""
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # Extract top-level keys (component names)
-        keys = set()
-        for line in content.split('\n'):
-            line = line.strip()
-            if line and not line.startswith('#') and ':' in line:
-                key = line.split(':')[0].strip()
-                if key and not key.startswith('-'):
-                    keys.add(key)
-        return keys
-    except:
-        return set()
+from ref_resolver import RefResolver
+from ref_scanner import scan_file
 
 def find_all_refs(file_path):
-    """Find all $ref entries in a file."""
-    refs = []
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        for i, line in enumerate(content.split('\n'), 1):
-            if '$ref' in line:
-                # Extract the reference value
-                match = re.search(r"\$ref:\s+['\"]([^'\"]+)['\"]", line)
-                if match:
-                    refs.append({
-                        'line': i,
-                        'ref': match.group(1),
-                        'text': line.strip()[:80]
-                    })
-    except:
-        pass
-    
-    return refs
+    """Find all $ref entries in a file; raises on files that cannot be read or parsed."""
+    return [
+        {
+            'line': site.line,
+            'column': site.column,
+            'pointer': site.pointer,
+            'ref': site.ref,
+        }
+        for site in scan_file(file_path)
+    ]
 
-def resolve_ref(ref, file_path, openapi_root):
+def resolve_ref(ref, file_path, resolver):
     """Resolve a reference and check if it exists."""
-    # Determine reference type
-    is_external = '/' in ref or '.yaml' in ref
-    
-    if not is_external:
-        # Internal reference like #ParameterName
-        return None, "Internal fragment (valid if defined in same file)"
-    
-    # External reference like ../../components/parameters.yaml#TenantHeader
-    if '#' in ref:
-        target_file, fragment = ref.split('#', 1)
-    else:
-        target_file = ref
-        fragment = None
-    
-    # Resolve relative path
-    try:
-        full_path = (file_path.parent / target_file).resolve()
-        
-        if not full_path.exists():
-            return False, f"File not found: {target_file}"
-        
-        if fragment:
-            # Check if fragment exists in the file
-            components = load_yaml_simple(full_path)
-            if fragment not in components:
-                return False, f"Fragment '{fragment}' not found in {target_file}"
-        
-        return True, f"Valid: {target_file}#{fragment if fragment else ''}"
-    except Exception as e:
-        return False, str(e)
+    return resolver.check(ref, file_path)
 
 def main():
     openapi_root = Path(__file__).parent.parent
@@ -94,10 +40,16 @@ def main():
         'schemas': openapi_root / 'components' / 'schemas.yaml',
     }
     
-    components_map = {}
+    resolver = RefResolver(openapi_root)
+    failed_components = []
     for comp_type, comp_file in components_files.items():
-        components_map[comp_type] = load_yaml_simple(comp_file)
-        print(f"[OK] {comp_type}: {len(components_map[comp_type])} components")
+        try:
+            components = resolver.document(comp_file) or {}
+        except Exception as e:
+            print(f"[ERROR] {comp_type}: {e}")
+            failed_components.append({'file': str(comp_file.relative_to(openapi_root)), 'error': str(e)})
+            continue
+        print(f"[OK] {comp_type}: {len(components)} components")
     
     print("\n[INFO] Validating references in all YAML files...\n")
     
@@ -109,24 +61,34 @@ def main():
         'total_refs': 0,
         'valid_refs': 0,
         'invalid_refs': 0,
-        'errors': []
+        'errors': [],
+        'failed_files': failed_components
     }
     
     for yaml_file in sorted(yaml_files):
         rel_path = yaml_file.relative_to(openapi_root)
-        refs = find_all_refs(yaml_file)
+        try:
+            refs = find_all_refs(yaml_file)
+        except Exception as e:
+            mark = getattr(e, 'problem_mark', None)
+            if mark is not None:
+                error = f"{e.problem} (line {mark.line + 1}, column {mark.column + 1})"
+            else:
+                error = f"{type(e).__name__}: {e}"
+            print(f"[FAILED] {rel_path}: {error}")
+            stats['failed_files'].append({'file': str(rel_path), 'error': error})
+            continue
         
         if refs:
-            print(f"Processing: {rel_path}")
-            for ref_info in refs[:3]:
-                valid, msg = resolve_ref(ref_info['ref'], yaml_file, openapi_root)
-                status = "[OK]" if valid else "[WARN]" if valid is None else "[ERROR]"
-                print(f"  {status} Line {ref_info['line']}: {ref_info['ref'][:60]}")
+            invalid = 0
+            for ref_info in refs:
+                valid, msg = resolve_ref(ref_info['ref'], yaml_file, resolver)
                 
                 stats['total_refs'] += 1
                 if valid is True:
                     stats['valid_refs'] += 1
                 elif valid is False:
+                    invalid += 1
                     stats['invalid_refs'] += 1
                     stats['errors'].append({
                         'file': str(rel_path),
@@ -135,10 +97,10 @@ def main():
                         'error': msg
                     })
             
-            if len(refs) > 3:
-                print(f"  ... and {len(refs) - 3} more")
-            print()
+            status = "[OK]" if invalid == 0 else "[ERROR]"
+            print(f"{status} {rel_path}: {len(refs)} refs, {invalid} invalid")
     
+    print()
     # Print summary
     print("="*60)
     print("VALIDATION SUMMARY")
@@ -147,18 +109,22 @@ def main():
     print(f"Total references found: {stats['total_refs']}")
     print(f"Valid references: {stats['valid_refs']}")
     print(f"Invalid references: {stats['invalid_refs']}")
+    print(f"Files that failed to load: {len(stats['failed_files'])}")
+    
+    if stats['failed_files']:
+        print(f"\nFAILED FILES ({len(stats['failed_files'])}):")
+        for failed in stats['failed_files']:
+            print(f"  {failed['file']}")
+            print(f"    Issue: {failed['error']}")
     
     if stats['errors']:
         print(f"\nERRORS ({len(stats['errors'])}):")
-        for error in stats['errors'][:10]:
+        for error in stats['errors']:
             print(f"  {error['file']}:{error['line']}")
             print(f"    Ref: {error['ref']}")
             print(f"    Issue: {error['error']}")
-        if len(stats['errors']) > 10:
-            print(f"  ... and {len(stats['errors']) - 10} more")
     
-    return 0 if stats['invalid_refs'] == 0 else 1
+    return 0 if stats['invalid_refs'] == 0 and not stats['failed_files'] else 1
 
 if __name__ == '__main__':
-    import sys
     sys.exit(main())
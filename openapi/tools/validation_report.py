@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Machine-readable validation reports (JSON and SARIF 2.1.0)
+Collects every finding of a rule engine run, with no truncation, together
+with the YAML syntax errors of the loaded tree. Each finding carries its
+rule id, file, JSON pointer, and the line and column the pointer lands on in
+the source (looked up in the composed YAML node tree of files that have
+findings). Findings are sorted by file, line and rule, and each one has a
+fingerprint built from the file, rule, severity, pointer and message, so
+the reports of two builds can be diffed.
+
+The report also carries the wall time per rule (hooks plus start/finish)
+and per file (parse plus walk), taken from a RuleEngine created with
+timed=True.
+
+Validators opt in through add_output_arguments() and write_report():
+
+    python tools/advanced-validate.py --format json -o generated/validation.json
+    python tools/advanced-validate.py --format sarif -o generated/validation.sarif
+"""
+
+import gc
+import hashlib
+import json
+import sys
+import time
+from pathlib import Path
+
+import yaml
+
+from json_pointer import unescape_token
+from rule_engine import finding_key, syntax_finding
+from spec_loader import SafeLoader
+
+OUTPUT_FORMATS = ('text', 'json', 'sarif')
+REPORT_FORMAT = 1
+SARIF_VERSION = '2.1.0'
+SARIF_SCHEMA = 'https://json.schemastore.org/sarif-2.1.0.json'
+SARIF_LEVELS = {'critical': 'error', 'warning': 'warning', 'info': 'note'}
+SYNTAX_RULE = ('yaml-syntax', 'Spec files are well-formed YAML')
+
+def fingerprint(finding):
+    """Stable identity of a finding across builds (line numbers left out)"""
+    key = f"{finding['file'] or ''}|{finding_key(finding)}"
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]
+
+class SourceLocator:
+    """Line and column of JSON pointers inside spec files, from the composed YAML nodes"""
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self._nodes = {}
+        self._entries = {}
+
+    def _node(self, relpath):
+        if relpath not in self._nodes:
+            try:
+                with open(self.root / relpath, 'r', encoding='utf-8') as f:
+                    self._nodes[relpath] = yaml.compose(f, Loader=SafeLoader)
+            except (OSError, yaml.YAMLError):
+                self._nodes[relpath] = None
+        return self._nodes[relpath]
+
+    def _entry(self, relpath, pointer):
+        """(node, mark) at pointer, memoized; node is None past the deepest existing ancestor"""
+        key = (relpath, pointer)
+        if key in self._entries:
+            return self._entries[key]
+        if not pointer:
+            node = self._node(relpath)
+            entry = (node, node.start_mark if node is not None else None)
+        else:
+            parent_pointer, _, token = pointer.rpartition('/')
+            node, mark = self._entry(relpath, parent_pointer)
+            entry = (None, mark)
+            token = unescape_token(token)
+            if isinstance(node, yaml.MappingNode):
+                for key_node, value_node in node.value:
+                    if isinstance(key_node, yaml.ScalarNode) and key_node.value == token:
+                        entry = (value_node, key_node.start_mark)
+                        break
+            elif isinstance(node, yaml.SequenceNode) and token.isdigit() and int(token) < len(node.value):
+                item = node.value[int(token)]
+                entry = (item, item.start_mark)
+        self._entries[key] = entry
+        return entry
+
+    def locate(self, relpath, pointer):
+        """1-based (line, column) of pointer in relpath, or of its deepest existing ancestor
+
+        A mapping entry is located at its key, which is where an editor
+        should put the cursor. (None, None) when the file cannot be composed.
+        """
+        _, mark = self._entry(relpath, pointer if pointer.startswith('/') else '')
+        if mark is None:
+            return None, None
+        return mark.line + 1, mark.column + 1
+
+class ValidationReport:
+    """Every finding of one validation run plus per-rule and per-file timings"""
+
+    def __init__(self, tool, spec, engine, elapsed_ms):
+        self.tool = tool
+        self.root = Path(spec.root)
+        self.elapsed_ms = elapsed_ms
+        self.generated_at = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+        self.rules = [(rule.id, rule.description, rule.scope) for rule in engine.rules]
+
+        findings = [finding.to_dict() for finding in engine.findings]
+        for file_path, error in sorted(spec.errors.items()):
+            findings.append(syntax_finding(spec.relpath(file_path), error))
+        if spec.errors:
+            self.rules.append((*SYNTAX_RULE, 'file'))
+        # Composing allocates a node per scalar, and each allocation burst
+        # makes the cyclic GC rescan the nodes and the parsed tree around
+        # them. Node trees hold no cycles, so collection can wait.
+        locator = SourceLocator(self.root)
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for finding in findings:
+                if finding['file'] and finding['line'] is None:
+                    finding['line'], finding['column'] = locator.locate(finding['file'], finding['pointer'])
+                finding['fingerprint'] = fingerprint(finding)
+        finally:
+            if enabled:
+                gc.enable()
+        findings.sort(key=lambda f: (f['file'] is None, f['file'] or '', f['line'] or 0, f['column'] or 0,
+                                     f['rule'], f['pointer'], f['message']))
+        self.findings = findings
+
+        self.rule_ms = dict(engine.timings['rules'])
+        self.files = []
+        per_file = {}
+        for finding in findings:
+            per_file[finding['file']] = per_file.get(finding['file'], 0) + 1
+        for file_path in spec.files():
+            relpath = spec.relpath(file_path)
+            parse_ms = spec.load_ms.get(file_path)
+            walk_ms = engine.timings['files'].get(relpath)
+            self.files.append({
+                'file': relpath,
+                'parseMs': _ms(parse_ms),
+                'walkMs': _ms(walk_ms),
+                'totalMs': _ms((parse_ms or 0.0) + (walk_ms or 0.0)),
+                'findings': per_file.get(relpath, 0),
+            })
+
+    def counts(self):
+        counts = {'critical': 0, 'warning': 0, 'info': 0}
+        for finding in self.findings:
+            counts[finding['severity']] = counts.get(finding['severity'], 0) + 1
+        return counts
+
+    def _rule_counts(self):
+        counts = {}
+        for finding in self.findings:
+            counts[finding['rule']] = counts.get(finding['rule'], 0) + 1
+        return counts
+
+    def to_dict(self):
+        rule_counts = self._rule_counts()
+        return {
+            'format': REPORT_FORMAT,
+            'tool': self.tool,
+            'generatedAt': self.generated_at,
+            'root': str(self.root),
+            'elapsedMs': _ms(self.elapsed_ms),
+            'counts': self.counts(),
+            'rules': [{'id': rule_id, 'description': description, 'scope': scope,
+                       'findings': rule_counts.get(rule_id, 0), 'ms': _ms(self.rule_ms.get(rule_id))}
+                      for rule_id, description, scope in self.rules],
+            'files': self.files,
+            'findings': self.findings,
+        }
+
+    def to_sarif(self):
+        rule_index = {rule_id: index for index, (rule_id, _, _) in enumerate(self.rules)}
+        results = []
+        for finding in self.findings:
+            result = {
+                'ruleId': finding['rule'],
+                'level': SARIF_LEVELS.get(finding['severity'], 'note'),
+                'message': {'text': finding['message']},
+                'partialFingerprints': {'findingKey/v1': finding['fingerprint']},
+                'properties': {'severity': finding['severity']},
+            }
+            if finding['rule'] in rule_index:
+                result['ruleIndex'] = rule_index[finding['rule']]
+            if finding['file']:
+                location = {'physicalLocation': {
+                    'artifactLocation': {'uri': finding['file'], 'uriBaseId': 'SPECROOT'},
+                }}
+                if finding['line']:
+                    location['physicalLocation']['region'] = {
+                        'startLine': finding['line'], 'startColumn': finding['column'] or 1,
+                    }
+                if finding['pointer']:
+                    location['logicalLocations'] = [{'fullyQualifiedName': finding['pointer'], 'kind': 'object'}]
+                result['locations'] = [location]
+            results.append(result)
+        return {
+            '$schema': SARIF_SCHEMA,
+            'version': SARIF_VERSION,
+            'runs': [{
+                'tool': {'driver': {
+                    'name': self.tool,
+                    'rules': [{'id': rule_id, 'shortDescription': {'text': description or rule_id},
+                               'properties': {'scope': scope, 'ms': _ms(self.rule_ms.get(rule_id))}}
+                              for rule_id, description, scope in self.rules],
+                }},
+                'originalUriBaseIds': {'SPECROOT': {'uri': self.root.as_uri() + '/'}},
+                'invocations': [{'executionSuccessful': True, 'endTimeUtc': self.generated_at}],
+                'results': results,
+                'properties': {
+                    'elapsedMs': _ms(self.elapsed_ms),
+                    'counts': self.counts(),
+                    'files': self.files,
+                },
+            }],
+        }
+
+def _ms(value):
+    return None if value is None else round(value, 3)
+
+def add_output_arguments(parser):
+    """Register the shared --format/--output options on an argparse parser"""
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='text',
+                        help='text report (default), or every finding as JSON or SARIF 2.1.0')
+    parser.add_argument('-o', '--output', help='write the JSON/SARIF report to a file instead of stdout')
+
+def write_report(report, output_format, output=None):
+    """Write report as 'json' or 'sarif' to output (a path) or stdout"""
+    data = report.to_sarif() if output_format == 'sarif' else report.to_dict()
+    if output is None:
+        json.dump(data, sys.stdout, indent=2, ensure_ascii=False)
+        sys.stdout.write('\n')
+        return
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+        f.write('\n')
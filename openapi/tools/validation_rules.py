@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Validation rules for the single-pass rule engine (see rule_engine.py)
+Each rule keeps the state the report scripts print (per-module verdicts,
+counters) alongside its findings, so advanced-validate.py and
+comprehensive-validate.py render from one walk instead of re-reading files.
+"""
+
+from collections import defaultdict
+
+from json_pointer import join_pointer, parent_pointers
+from ref_resolver import ResolveError
+from route_trie import RouteTrie
+from rule_engine import Rule
+from schema_validator import SchemaCompiler, instance_pointer
+from symbol_table import KINDS, SymbolTable
+
+# Files whose top-level entries are shared response objects
+RESPONSE_FILES = ('components/responses.yaml',)
+
+# Paths that are allowed to omit an explicit security definition
+PUBLIC_PATHS = ('/health', '/status', '/version')
+PUBLIC_PREFIX = '/public/'
+
+def is_module_schema(node):
+    """True for entity schemas of a module (schemas/<group>/<module>.yaml, excluding common/)"""
+    return node.file.startswith('schemas/') and not node.file.startswith('schemas/common/')
+
+class TenantIdRule(Rule):
+    """Every schema module must expose tenant_id on at least one entity"""
+
+    id = 'tenant-id'
+    description = 'Module schemas declare tenant_id directly or through their allOf chain'
+    scope = 'refs'
+
+    def __init__(self):
+        super().__init__()
+        self.module_status = {}
+        self._files = {}
+        self._flattener = None
+
+    def start(self, engine):
+        self._flattener = engine.flattener
+
+    def visit_schema(self, node):
+        if not is_module_schema(node):
+            return
+        module = node.module
+        self._files[module] = node.file
+        self.module_status.setdefault(module, False)
+        if self.module_status[module]:
+            return
+        effective = self._flattener.flatten(self._flattener.resolver.root / node.file, node.pointer)
+        if effective.has('tenant_id'):
+            self.module_status[module] = True
+
+    def finish(self, engine):
+        for module, compliant in self.module_status.items():
+            if not compliant:
+                self.report('critical', f'TENANT_ID: Module "{module}" missing tenant_id field in all entities',
+                            file=self._files[module])
+
+    @property
+    def missing(self):
+        return [module for module, compliant in self.module_status.items() if not compliant]
+
+class SecurityRule(Rule):
+    """Non-public operations must declare security explicitly"""
+
+    id = 'explicit-security'
+    description = 'Operations outside /public/ declare a security requirement'
+
+    def __init__(self):
+        super().__init__()
+        self.by_module = defaultdict(list)
+
+    def visit_operation(self, node):
+        if 'security' in node.value:
+            return
+        if node.path.startswith(PUBLIC_PREFIX) or node.path in PUBLIC_PATHS:
+            return
+        self.by_module[node.module].append(node)
+        self.report('warning', f'SECURITY: {node.module} - {node.method.upper()} {node.path} missing security', node)
+
+class DescriptionCoverageRule(Rule):
+    """At least `threshold` of operations must carry a summary or description"""
+
+    id = 'description-coverage'
+    description = 'Operations document themselves with a summary or description'
+    scope = 'tree'
+
+    def __init__(self, threshold=0.8):
+        super().__init__()
+        self.threshold = threshold
+        self.total = 0
+        self.described = 0
+
+    def visit_operation(self, node):
+        self.total += 1
+        if 'description' in node.value or 'summary' in node.value:
+            self.described += 1
+
+    def finish(self, engine):
+        if self.described < self.total * self.threshold:
+            self.report('warning', f'Only {self.described}/{self.total} endpoints have descriptions')
+
+def _has_media_examples(content):
+    if not isinstance(content, dict):
+        return False
+    return any(isinstance(media, dict) and ('example' in media or 'examples' in media)
+               for media in content.values())
+
+class ExampleCoverageRule(Rule):
+    """Counts operations that ship request or response examples"""
+
+    id = 'example-coverage'
+    description = 'Operations carry request or response examples'
+
+    def __init__(self):
+        super().__init__()
+        self.total = 0
+        self.with_examples = 0
+
+    def visit_operation(self, node):
+        self.total += 1
+        operation = node.value
+        request_body = operation.get('requestBody')
+        if isinstance(request_body, dict) and _has_media_examples(request_body.get('content')):
+            self.with_examples += 1
+            return
+        responses = operation.get('responses')
+        if isinstance(responses, dict):
+            for response in responses.values():
+                if isinstance(response, dict) and _has_media_examples(response.get('content')):
+                    self.with_examples += 1
+                    return
+
+class ExampleSchemaRule(Rule):
+    """Request and response examples must validate against their media type schema"""
+
+    id = 'example-schema'
+    description = 'Media type examples match their resolved schema'
+    scope = 'refs'
+
+    def __init__(self):
+        super().__init__()
+        self.checked = 0
+        self.mismatched = 0
+        self._compiler = None
+
+    def start(self, engine):
+        # One compiler per run: every component schema is compiled once for all examples
+        self._compiler = SchemaCompiler(engine.flattener.resolver)
+
+    def visit_operation(self, node):
+        # Referenced request bodies and responses are checked where they are defined
+        request_body = node.value.get('requestBody')
+        if isinstance(request_body, dict) and '$ref' not in request_body:
+            self._check_content(node.file, join_pointer(node.pointer, 'requestBody'), request_body)
+        responses = node.value.get('responses')
+        if isinstance(responses, dict):
+            for status, response in responses.items():
+                if isinstance(response, dict) and '$ref' not in response:
+                    self._check_content(node.file, join_pointer(node.pointer, 'responses', status), response)
+
+    def visit_document(self, node):
+        if not isinstance(node.value, dict):
+            return
+        if node.file in RESPONSE_FILES:
+            sections = [('', node.value)]
+        elif node.file == 'openapi.yaml' and isinstance(node.value.get('components'), dict):
+            components = node.value['components']
+            sections = [(f'/components/{key}', components[key]) for key in ('responses', 'requestBodies')
+                        if isinstance(components.get(key), dict)]
+        else:
+            return
+        for base, entries in sections:
+            for name, entry in entries.items():
+                if isinstance(entry, dict) and '$ref' not in entry:
+                    self._check_content(node.file, join_pointer(base, name), entry)
+
+    def _examples(self, media, base_file):
+        """(name, tokens below the media type, value) of each example, $ref'd ones resolved"""
+        if 'example' in media:
+            yield 'example', ('example',), media['example']
+        examples = media.get('examples')
+        if not isinstance(examples, dict):
+            return
+        for name, example in examples.items():
+            if isinstance(example, dict) and isinstance(example.get('$ref'), str):
+                try:
+                    _, _, example = self._compiler.resolver.resolve(example['$ref'], base_file, follow=True)
+                except ResolveError:
+                    continue  # reported by ref-target
+            if isinstance(example, dict) and 'value' in example:
+                yield name, ('examples', name, 'value'), example['value']
+
+    def _check_content(self, file, pointer, holder):
+        content = holder.get('content')
+        if not isinstance(content, dict):
+            return
+        base_file = self._compiler.resolver.root / file
+        for media_type, media in content.items():
+            if not isinstance(media, dict) or not isinstance(media.get('schema'), dict):
+                continue
+            examples = list(self._examples(media, base_file))
+            if not examples:
+                continue
+            validate = self._compiler.compile_node(media['schema'], base_file)
+            media_pointer = join_pointer(pointer, 'content', media_type)
+            for name, tokens, value in examples:
+                self.checked += 1
+                errors = []
+                validate(value, (), errors)
+                if errors:
+                    self.mismatched += 1
+                # allOf parts often restate the same constraint; report it once
+                for path, message in dict.fromkeys(errors):
+                    where = instance_pointer(path)
+                    self.report('warning', f'Example "{name}" does not match its schema at {where or "/"}: {message}',
+                                file=file, pointer=join_pointer(media_pointer, *tokens) + where)
+
+class RefFormatRule(Rule):
+    """Collects $ref usage per paths module and flags non-local references"""
+
+    id = 'ref-format'
+    description = 'References inside path files are local (#/...)'
+
+    def __init__(self):
+        super().__init__()
+        self.refs_by_module = defaultdict(list)
+
+    def visit_ref(self, node):
+        if not node.file.startswith('paths/'):
+            return
+        ref = node.name
+        refs = self.refs_by_module[node.module]
+        if ref in refs:
+            return
+        refs.append(ref)
+        if not ref.startswith('#/'):
+            self.report('warning', f'Unsupported reference format in {node.module}: {ref}', node)
+
+class RefTargetRule(Rule):
+    """Every $ref must point at an existing file and fragment"""
+
+    id = 'ref-target'
+    description = 'References resolve to an existing file and JSON pointer'
+    scope = 'refs'
+
+    def __init__(self):
+        super().__init__()
+        self._resolver = None
+        self._bases = {}
+
+    def start(self, engine):
+        self._resolver = engine.flattener.resolver
+
+    def visit_ref(self, node):
+        base = self._bases.get(node.file)
+        if base is None:
+            base = self._bases[node.file] = self._resolver.root / node.file
+        valid, message = self._resolver.check(node.name, base)
+        if valid is False:
+            self.report('warning', f'Unresolved reference {node.name}: {message.splitlines()[0]}', node)
+
+class DuplicateEntityRule(Rule):
+    """Reports entity names defined by more than one module"""
+
+    id = 'duplicate-entity'
+    description = 'Entity names are unique across modules'
+    scope = 'tree'
+
+    def __init__(self):
+        super().__init__()
+        self.modules_by_entity = defaultdict(list)
+
+    def visit_schema(self, node):
+        if is_module_schema(node):
+            self.modules_by_entity[node.name].append(node.module)
+
+    def finish(self, engine):
+        for entity, modules in self.conflicts:
+            self.report('info', f'Entity "{entity}" found in modules: {", ".join(modules)}')
+
+    @property
+    def conflicts(self):
+        return [(entity, modules) for entity, modules in self.modules_by_entity.items() if len(modules) > 1]
+
+class RouteConflictRule(Rule):
+    """Reports duplicate, ambiguous and shadowed path templates across all path files (see route_trie.py)"""
+
+    id = 'route-conflict'
+    description = 'Path templates route every request to exactly one operation'
+    scope = 'tree'
+    severities = {'duplicate': 'critical', 'ambiguous': 'warning', 'shadowed': 'warning'}
+
+    def __init__(self):
+        super().__init__()
+        self.trie = RouteTrie()
+        self.conflicts = []
+
+    def visit_operation(self, node):
+        self.trie.add(node.path, node.method, node.file, next(parent_pointers(node.pointer)))
+
+    def finish(self, engine):
+        self.conflicts = self.trie.conflicts()
+        for conflict in self.conflicts:
+            route = conflict.route
+            self.report(self.severities[conflict.kind], conflict.message(),
+                        file=route.file, pointer=route.pointer)
+
+class SymbolTableRule(Rule):
+    """Fills the global symbol table and reports duplicate operationIds and near-duplicate names"""
+
+    id = 'duplicate-symbol'
+    description = 'operationIds are unique; operationIds, tags and x-permissions have one spelling'
+    scope = 'tree'
+
+    def __init__(self):
+        super().__init__()
+        self.table = SymbolTable()
+
+    def visit_document(self, node):
+        if node.file != 'openapi.yaml' or not isinstance(node.value, dict):
+            return
+        tags = node.value.get('tags')
+        for index, tag in enumerate(tags if isinstance(tags, list) else ()):
+            if isinstance(tag, dict) and isinstance(tag.get('name'), str):
+                self.table.declare_tag(node.file, join_pointer('/tags', index), tag['name'])
+
+    def visit_operation(self, node):
+        self.table.add_operation(node.file, node.pointer, node.method, node.path, node.value)
+
+    def finish(self, engine):
+        for name, sites in self.table.duplicates():
+            first = sites[0]
+            for site in sites[1:]:
+                self.report('critical', f'operationId "{name}" of {site["method"]} {site["path"]} is also used by '
+                            f'{first["method"]} {first["path"]} ({first["file"]})',
+                            file=site['file'], pointer=site['pointer'])
+        for kind in KINDS:
+            for names in self.table.near_duplicates(kind):
+                for name in names[1:]:
+                    site = self.table.symbols[kind][name][0]
+                    self.report('warning', f'{kind} "{name}" differs from "{names[0]}" only in case or separators',
+                                file=site['file'], pointer=site['pointer'])
+
+class EndpointStatsRule(Rule):
+    """Operation and endpoint counters per HTTP method and per module"""
+
+    id = 'endpoint-stats'
+    description = 'Endpoint statistics'
+
+    def __init__(self):
+        super().__init__()
+        self.by_method = defaultdict(int)
+        self.operations_by_module = defaultdict(int)
+        self.paths_by_module = defaultdict(set)
+
+    def visit_operation(self, node):
+        self.by_method[node.method.upper()] += 1
+        self.operations_by_module[node.module] += 1
+        self.paths_by_module[node.module].add(node.path)
+
+def default_rules():
+    """The rule set run by the validation scripts"""
+    return [
+        TenantIdRule(),
+        SecurityRule(),
+        RefFormatRule(),
+        DuplicateEntityRule(),
+        DescriptionCoverageRule(),
+        ExampleCoverageRule(),
+        ExampleSchemaRule(),
+        RouteConflictRule(),
+        SymbolTableRule(),
+        EndpointStatsRule(),
+    ]
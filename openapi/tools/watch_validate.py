@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Watch mode: resident validation with a warm in-memory model
+Loads the spec tree, the ref graph and the rule results once and keeps
+them in memory. When a file changes (inotify, or polling where inotify is
+not available, see file_watch.py) only that file is re-parsed and re-scanned
+for $refs. The per-file rules re-run on it, the rules that follow $refs
+(scope 'refs') also on the files whose refs reach it, and the findings that
+appeared or went away are printed. Tree-scoped rules re-run over the
+in-memory documents, which costs a walk but no I/O.
+
+Usage:
+    python tools/watch_validate.py
+    python tools/watch_validate.py --poll --interval 1
+    python tools/watch_validate.py --once          # load, print the summary, exit
+"""
+
+import argparse
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+from file_watch import open_watcher
+from incremental_validate import SEVERITY_MARKS, incremental_rules
+from ref_graph import RefGraph
+from ref_resolver import RefResolver
+from rule_engine import RuleEngine, finding_key, syntax_finding
+from spec_loader import OPENAPI_ROOT, SpecTree, iter_spec_files, load_yaml
+
+class Update:
+    """What one batch of file changes did to the findings"""
+
+    def __init__(self, changed, dependents):
+        self.changed = changed
+        self.dependents = dependents
+        self.added = []
+        self.resolved = []
+        self.parse_ms = 0.0
+        self.rules_ms = 0.0
+        self.elapsed_ms = 0.0
+
+class WarmModel:
+    """Parsed documents, ref graph and findings of the whole tree, kept up to date per file"""
+
+    def __init__(self, root=None, rules=incremental_rules):
+        self.root = Path(root).resolve() if root else OPENAPI_ROOT
+        self.rules = rules
+        self.tree = SpecTree(self.root)
+        self.graph = RefGraph(self.root)
+        self.resolver = RefResolver(self.root)
+        self.findings = {}
+        self.tree_findings = []
+        self._stats = {}
+        self._unscanned = []
+
+    @staticmethod
+    def _stat(file_path):
+        try:
+            st = file_path.stat()
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _forget(self, file_path):
+        self.tree.documents.pop(file_path, None)
+        self.tree.errors.pop(file_path, None)
+        self.resolver.forget(file_path)
+
+    def _parse(self, file_path):
+        self._forget(file_path)
+        try:
+            self.tree.documents[file_path] = document = load_yaml(file_path)
+        except Exception as e:
+            self.tree.errors[file_path] = e
+        else:
+            self.resolver.add_document(file_path, document)
+
+    def load(self):
+        """Parse everything and run every rule once; returns the elapsed milliseconds"""
+        start = time.perf_counter()
+        self.graph.load()
+        self.graph.update()
+        if self.graph.rescanned or self.graph.removed:
+            self.graph.save()
+        for file_path in iter_spec_files(self.root):
+            file_path = file_path.resolve()
+            self._stats[file_path] = self._stat(file_path)
+            self._parse(file_path)
+        self._validate(sorted(self.tree.relpath(f) for f in self.tree.files()))
+        return (time.perf_counter() - start) * 1000
+
+    def refresh_graph(self):
+        """Re-scan the $refs of files changed since the last call
+
+        Who depends on a file is recorded in the other files' edges, which a
+        change to the file itself does not touch, so apply() can answer from
+        the graph as it is and leave the re-scan until the diagnostics are out.
+        """
+        if self._unscanned:
+            self.graph.update(self._unscanned)
+            self._unscanned = []
+
+    def apply(self, paths):
+        """Bring the model up to date with changed paths; None when nothing actually changed"""
+        self.refresh_graph()
+        start = time.perf_counter()
+        changed = []
+        for file_path in sorted(Path(p).resolve() for p in paths):
+            stat = self._stat(file_path)
+            if stat == self._stats.get(file_path):
+                continue  # touched, or an event for a file we already re-read
+            if stat is None:
+                self._stats.pop(file_path, None)
+                self._forget(file_path)
+            else:
+                self._stats[file_path] = stat
+                self._parse(file_path)
+            changed.append(file_path)
+        if not changed:
+            return None
+        parsed = time.perf_counter()
+
+        self._unscanned = changed
+        relpaths = [self.graph.relpath(f) for f in changed]
+        dependents = [r for r in self.graph.dependent_files(relpaths) if r not in relpaths]
+        update = Update(relpaths, dependents)
+        touched = relpaths + dependents
+        before = {relpath: self.findings.get(relpath, []) for relpath in touched}
+        tree_before = self.tree_findings
+        for relpath in relpaths:
+            self.findings.pop(relpath, None)
+        self._validate([r for r in relpaths if self.root / r in self.tree],
+                       [r for r in dependents if self.root / r in self.tree])
+
+        for relpath in touched:
+            self._diff(before[relpath], self.findings.get(relpath, []), update)
+        self._diff(tree_before, self.tree_findings, update)
+        update.parse_ms = (parsed - start) * 1000
+        update.rules_ms = (time.perf_counter() - parsed) * 1000
+        update.elapsed_ms = (time.perf_counter() - start) * 1000
+        return update
+
+    def _validate(self, relpaths, dependents=()):
+        """Re-run the per-file rules on relpaths, the ref-following ones on dependents,
+        and the tree-scoped ones on everything"""
+        fresh = self._run_rules(('file', 'refs'), relpaths)
+        for relpath in relpaths:
+            file_path = (self.root / relpath).resolve()
+            if file_path in self.tree.errors:
+                fresh[relpath].insert(0, syntax_finding(relpath, self.tree.errors[file_path]))
+        self.findings.update(fresh)
+        # A dependent's own content did not change, only what its refs reach
+        rerun = {rule.id for rule in self.rules() if rule.scope == 'refs'}
+        for relpath, findings in self._run_rules(('refs',), dependents).items():
+            kept = [f for f in self.findings.get(relpath, []) if f['rule'] not in rerun]
+            self.findings[relpath] = kept + findings
+        engine = RuleEngine([rule for rule in self.rules() if rule.scope == 'tree'])
+        self.tree_findings = [finding.to_dict() for finding in engine.run(self.tree)]
+
+    def _run_rules(self, scopes, relpaths):
+        """Findings per file of fresh instances of the rules in scopes, walking only relpaths"""
+        findings = {relpath: [] for relpath in relpaths}
+        if relpaths:
+            engine = RuleEngine([rule for rule in self.rules() if rule.scope in scopes], resolver=self.resolver)
+            for finding in engine.run(self.tree, files=[self.root / r for r in relpaths]):
+                findings.setdefault(finding.file, []).append(finding.to_dict())
+        return findings
+
+    @staticmethod
+    def _diff(old, new, update):
+        old_keys = Counter(finding_key(f) for f in old)
+        new_keys = Counter(finding_key(f) for f in new)
+        update.added.extend(f for f in new if old_keys[finding_key(f)] < new_keys[finding_key(f)])
+        update.resolved.extend(f for f in old if new_keys[finding_key(f)] < old_keys[finding_key(f)])
+
+    def counts(self):
+        counts = {'critical': 0, 'warning': 0, 'info': 0}
+        for findings in (*self.findings.values(), self.tree_findings):
+            for finding in findings:
+                counts[finding['severity']] = counts.get(finding['severity'], 0) + 1
+        return counts
+
+def _format(finding):
+    where = finding['file'] or ''
+    if finding['line']:
+        where += f':{finding["line"]}'
+    elif finding['pointer']:
+        where += f'#{finding["pointer"]}'
+    mark = SEVERITY_MARKS.get(finding['severity'], '  ')
+    return f'{mark} [{finding["rule"]}] {finding["message"]}' + (f'  ({where})' if where else '')
+
+def _print_counts(model):
+    counts = model.counts()
+    print(f'  = {counts["critical"]} critical, {counts["warning"]} warnings, {counts["info"]} info')
+
+def print_update(update, model):
+    stamp = time.strftime('%H:%M:%S')
+    files = ', '.join(update.changed)
+    extra = f' (+{len(update.dependents)} dependents)' if update.dependents else ''
+    print(f'[{stamp}] {files}{extra} re-validated in {update.elapsed_ms:.1f} ms '
+          f'(parse {update.parse_ms:.1f} ms, rules {update.rules_ms:.1f} ms)')
+    for finding in update.added:
+        print(f'  + {_format(finding)}')
+    for finding in update.resolved:
+        print(f'  - {_format(finding)}')
+    if not update.added and not update.resolved:
+        print('  no change in findings')
+    _print_counts(model)
+    sys.stdout.flush()
+
+def main():
+    parser = argparse.ArgumentParser(description='Keep the spec validated in memory and report changes as files are saved')
+    parser.add_argument('--poll', action='store_true', help='poll for changes instead of using inotify')
+    parser.add_argument('--interval', type=float, default=0.5, help='polling interval in seconds (default: 0.5)')
+    parser.add_argument('--once', action='store_true', help='load and validate once, then exit')
+    args = parser.parse_args()
+
+    model = WarmModel()
+    watcher = None if args.once else open_watcher(model.root, polling=args.poll, interval=args.interval)
+    elapsed = model.load()
+
+    print('=' * 60)
+    print('WATCH MODE')
+    print('=' * 60)
+    print(f'Loaded {len(model.tree.documents)} files ({len(model.tree.errors)} errors) in {elapsed:.1f} ms')
+    _print_counts(model)
+    if watcher is None:
+        return 1 if model.tree.errors else 0
+
+    print(f'Watching {model.root} with {watcher.kind} (Ctrl+C to stop)')
+    sys.stdout.flush()
+    try:
+        while True:
+            update = model.apply(watcher.poll())
+            if update is not None:
+                print_update(update, model)
+                model.refresh_graph()
+    except KeyboardInterrupt:
+        print()
+    finally:
+        watcher.close()
+        model.refresh_graph()
+        model.graph.save()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Comment- and format-preserving edits of YAML documents
+Edits are located through the composed node tree (start/end marks) and
+spliced into the original text, so everything the edit does not touch -
+comments, key order, quoting, line wrapping - stays byte for byte the
+same. Only the entries that change are re-rendered (with PyYAML, in the
+block style the spec files use); a prefix added to a quoted or block
+scalar is inserted into the existing text instead.
+
+    document = SpliceDocument(text, name)
+    edits = TextEdits()
+    operation = document.value(document.value(document.root, '/tenant/faq'), 'get')
+    sync_mapping(document, edits, operation, old_dict, new_dict)
+    new_text = edits.apply(document.text)
+
+Entry line ranges come from entry_spans(): comment and blank lines
+trailing an entry belong to whatever follows it.
+"""
+
+import io
+
+import yaml
+
+from rewrite_engine import LineIndex
+from spec_loader import SafeLoader
+
+def _is_filler(line):
+    stripped = line.strip()
+    return not stripped or stripped.startswith('#')
+
+def entry_spans(lines, mapping):
+    """(name, start_line, end_line) of each entry of a composed mapping node
+
+    Line ranges are half-open. Comment and blank lines that trail an entry
+    belong to whatever follows it, so they are left out of the span.
+    """
+    for key_node, value_node in mapping.value:
+        start = key_node.start_mark.line
+        mark = value_node.end_mark
+        # Block nodes end where the next token starts; that line is not theirs
+        end = mark.line if mark.line >= len(lines) or not lines[mark.line][:mark.column].strip() else mark.line + 1
+        while end - 1 > start and _is_filler(lines[end - 1]):
+            end -= 1
+        yield key_node.value, start, end
+
+class SpliceDocument:
+    """Source text of a YAML document with its composed node tree"""
+
+    def __init__(self, text, name=None):
+        self.text = text
+        self.lines = text.splitlines(keepends=True)
+        self.starts = LineIndex(text).starts
+        stream = io.StringIO(text)
+        if name is not None:
+            stream.name = name
+        self.root = yaml.compose(stream, Loader=SafeLoader)
+
+    def offset(self, line):
+        """Offset of the start of line (0-based); the end of the text past the last line"""
+        return self.starts[line] if line < len(self.starts) else len(self.text)
+
+    def entries(self, mapping):
+        """(key, key_node, value_node, start_offset, end_offset) of each entry of a block mapping
+
+        The range runs from the key to the end of the entry's last line,
+        trailing comments and blank lines excluded.
+        """
+        spans = entry_spans(self.lines, mapping)
+        for (key_node, value_node), (name, _, end) in zip(mapping.value, spans):
+            yield name, key_node, value_node, key_node.start_mark.index, self.offset(end)
+
+    def entry(self, mapping, key):
+        for entry in self.entries(mapping):
+            if entry[0] == key:
+                return entry
+        return None
+
+    def value(self, mapping, key):
+        """Value node of key in mapping, or None"""
+        if not isinstance(mapping, yaml.MappingNode):
+            return None
+        for key_node, value_node in mapping.value:
+            if isinstance(key_node, yaml.ScalarNode) and key_node.value == key:
+                return value_node
+        return None
+
+class TextEdits:
+    """Non-overlapping (start, end, text) replacements of one source text"""
+
+    def __init__(self):
+        self.edits = []
+
+    def replace(self, start, end, text):
+        self.edits.append((start, end, text))
+
+    def insert(self, offset, text):
+        self.edits.append((offset, offset, text))
+
+    def __bool__(self):
+        return bool(self.edits)
+
+    def apply(self, text, start=0, end=None):
+        """text[start:end] with the edits inside that range applied"""
+        end = len(text) if end is None else end
+        pieces = []
+        position = start
+        for edit_start, edit_end, new in sorted(e for e in self.edits if start <= e[0] and e[1] <= end):
+            if edit_start < position:
+                raise ValueError(f'overlapping edits at offset {edit_start}')
+            pieces.append(text[position:edit_start])
+            pieces.append(new)
+            position = edit_end
+        pieces.append(text[position:end])
+        return ''.join(pieces)
+
+def render_scalar(value):
+    """value as a single-line YAML scalar (quoted only when it has to be)"""
+    rendered = yaml.safe_dump(value, allow_unicode=True, width=float('inf'))
+    return rendered[:-len('\n...\n')] if rendered.endswith('\n...\n') else rendered.rstrip('\n')
+
+def render_entry(key, value, column):
+    """'key: value' in block style, continuation lines indented for a key at column"""
+    rendered = yaml.safe_dump({key: value}, default_flow_style=False, allow_unicode=True, sort_keys=False)
+    lines = rendered.splitlines(keepends=True)
+    return lines[0] + ''.join(' ' * column + line if line.strip() else line for line in lines[1:])
+
+def _escape_prefix(prefix, style):
+    if style == "'":
+        return prefix.replace("'", "''")
+    if style == '"':
+        return prefix.replace('\\', '\\\\').replace('"', '\\"')
+    return prefix
+
+def _prefix_edit(document, node, prefix):
+    """(offset, text) inserting prefix into a quoted or block scalar, or None"""
+    if '\n' in prefix or not isinstance(node, yaml.ScalarNode):
+        return None
+    if node.style in ("'", '"'):
+        return node.start_mark.index + 1, _escape_prefix(prefix, node.style)
+    if node.style in ('|', '>'):
+        # First content line, after its indentation
+        line = node.start_mark.line + 1
+        if line >= len(document.lines) or not document.lines[line].strip():
+            return None
+        text = document.lines[line]
+        return document.offset(line) + len(text) - len(text.lstrip(' ')), prefix
+    return None
+
+def sync_mapping(document, edits, mapping, old, new):
+    """Edits turning the block mapping node (holding old) into new
+
+    Changed entries are re-rendered in place, new ones are appended after
+    the last entry; removed keys are left alone. Returns False when the
+    mapping cannot be edited in place (flow style), so the caller has to
+    re-render it as a whole.
+    """
+    if not isinstance(mapping, yaml.MappingNode) or mapping.flow_style or not mapping.value:
+        return False
+    entries = {name: entry for name, *entry in document.entries(mapping)}
+    column = mapping.value[0][0].start_mark.column
+    appended = []
+    for key, value in new.items():
+        if key in old and old[key] == value:
+            continue
+        if key not in entries:
+            appended.append(' ' * column + render_entry(key, value, column))
+            continue
+        key_node, value_node, start, end = entries[key]
+        before = old.get(key)
+        if isinstance(value, str) and isinstance(before, str) and value.endswith(before) and value != before:
+            edit = _prefix_edit(document, value_node, value[:-len(before)] if before else value)
+            if edit is not None:
+                edits.insert(*edit)
+                continue
+        edits.replace(start, end, render_entry(key, value, column))
+    if appended:
+        last_end = max(end for _, _, _, end in entries.values())
+        if not document.text[:last_end].endswith('\n'):
+            appended.insert(0, '\n')  # last line of a file without a final newline
+        edits.insert(last_end, ''.join(appended))
+    return True